@@ -14,6 +14,33 @@ def home():
     st.write("- **Número de requisições por grupo**: Quantas requisições serão enviadas em cada grupo.")
     st.write("- **Número de grupos**: Quantos grupos de requisições você deseja enviar durante o teste.")
     st.write("- **Delay entre grupos**: O tempo de espera (em segundos) entre o envio de cada grupo de requisições.")
+    st.write("- **Modo de disparo**: Em *grupos em rajada* todas as requisições do grupo são enviadas de uma vez; em *taxa constante (malha aberta)* você informa a taxa alvo (requisições por segundo) e a duração, e as requisições são disparadas no instante previsto mesmo que as anteriores ainda não tenham respondido.")
+    st.write("- **Processos geradores**: Quantos processos dividem o envio das requisições. Use mais de um quando a taxa desejada for alta o suficiente para que a CPU do próprio gerador se torne o gargalo.")
+
+    st.markdown("---")
+
+    st.write("## Opções do cliente HTTP ⚙️")
+    st.write("Nos dois testes, um único cliente HTTP é usado do início ao fim, reaproveitando as conexões já abertas entre os grupos. Na seção **Opções do cliente HTTP** é possível ajustar o número máximo de conexões simultâneas, manter ou não as conexões abertas (keep-alive), habilitar HTTP/2 e definir os tempos limite. Os resultados mostram quantas conexões foram abertas e quantas foram reutilizadas. O motor das requisições pode ser o assíncrono (httpx), padrão, ou o de threads (requests), com um pool fixo de threads criado uma vez por teste e uma sessão com conexões abertas em cada thread, para comparar com clientes síncronos.")
+    st.write("Com um **máximo de requisições em andamento** (padrão: 1000 por processo; 0 desativa o limite), as requisições passam por uma fila atendida por um número fixo de trabalhadores. Assim, a memória do gerador não cresce com o tamanho dos grupos nem com a taxa, e o tempo de espera na fila aparece separado do tempo de resposta do servidor.")
+    st.write("Com a opção **Descartar o corpo das respostas** (marcada por padrão), o corpo de cada resposta é lido em blocos e descartado: o teste guarda apenas o status, o tempo até o primeiro byte e o número de bytes recebidos, de modo que respostas grandes não ocupam memória do gerador.")
+    st.write("Em **Status considerados sucesso** você define quais códigos contam como sucesso (padrão: 200-399). Os resultados separam cada código de status e cada falha sem resposta (tempo limite de conexão, de resposta, de envio ou do pool de conexões, falha de DNS, conexão recusada ou reiniciada pelo servidor), com a quantidade, o p50 e o p99 (nas falhas, do tempo até a falha) e o primeiro grupo em que apareceram. Assim, dá para ver se o sistema começou a falhar por saturação do servidor (ex.: 503 ou 429) ou por esgotamento do próprio cliente (ex.: tempo limite do pool).")
+    st.write("Cada requisição é cronometrada com um relógio monotônico e dividida em fases: resolução de DNS, conexão TCP, negociação TLS, envio da requisição, espera pelo servidor e transferência do corpo. O gráfico de fases por grupo mostra se um aumento da latência vem do servidor ou da abertura de conexões.")
+
+    st.markdown("---")
+
+    st.write("## Acompanhamento do teste 📈")
+    st.write("Durante o teste, a página mostra a cada segundo as requisições enviadas e bem-sucedidas, o tempo médio e o p99 de resposta, e a tabela de resultados é atualizada a cada grupo concluído. O botão **Parar teste** encerra o teste em andamento: os disparos param, as requisições já enviadas são aguardadas e os resultados parciais continuam na página. O teste é executado em segundo plano, num processo separado da página: mudar de página, alterar campos ou recarregar não o interrompe, e os resultados continuam disponíveis na sessão. Cada teste guarda os seus próprios resultados, e os últimos testes da sessão podem ser exibidos novamente pelo seletor **Teste exibido**.")
+    st.write("Em testes longos (ex.: de resistência, por horas), a série do teste ocupa memória limitada: os últimos 10 minutos ficam segundo a segundo, a hora anterior em intervalos de 10 s e as 24 horas anteriores em intervalos de 1 min. A página mostra também a vazão, a taxa de sucesso e o p99 do último minuto, e os gráficos por grupo podem ser exibidos em função do tempo do teste, em vez do número do grupo.")
+
+    st.write("Com a opção **Registrar cada requisição**, cada requisição vira uma linha (grupo, instantes previsto e real, tempo de resposta, status, bytes e classe de erro) gravada em blocos em arquivos Parquet, que podem ser abertos depois com pandas ou pyarrow. Ao fim do teste, a página mostra as requisições por status e por erro, o tempo de resposta de cada requisição ao longo do teste e um resumo por grupo com percentis exatos.")
+
+    st.markdown("---")
+
+    st.write("## Execução distribuída 🌐")
+    st.write("Para gerar carga a partir de várias máquinas, execute em cada uma delas o agente, a partir da pasta `app`, com um mesmo token secreto:")
+    st.code("LOAD_TEST_AGENT_TOKEN=<token secreto> python -m engine.agent --host 0.0.0.0 --port 7341", language="bash")
+    st.write("O agente só aceita planos de quem conhece o token, que deve ser definido também na variável `LOAD_TEST_AGENT_TOKEN` do servidor das páginas (ou da linha de comando). Sem `--host`, o agente escuta apenas na própria máquina; `--host 0.0.0.0` o expõe às outras máquinas, então use-o numa rede confiável ou atrás de um firewall.")
+    st.write("Em seguida, informe os endereços dos agentes (`host:porta`) na seção **Execução distribuída** da página do teste. As requisições de cada grupo são divididas entre os agentes, que começam no mesmo instante (os relógios das máquinas devem estar sincronizados) e devolvem apenas resumos compactos de cada grupo.")
 
     st.markdown("---")
 
@@ -24,6 +51,24 @@ def home():
     st.write("- **Número de requisições inicial**: O número de requisições a serem enviadas no primeiro grupo.")
     st.write("- **Quantidade de incremento**: O número de requisições a serem adicionadas em cada grupo subsequente.")
     st.write("- **Delay entre grupos**: O tempo de espera (em segundos) entre o envio de cada grupo de requisições.")
+    st.write("- **Modo de disparo**: Em *taxa constante (malha aberta)* as requisições de cada grupo são distribuídas uniformemente ao longo de uma janela de tempo, em vez de enviadas todas de uma vez.")
+    st.write("- **Processos geradores**: Quantos processos dividem cada grupo de requisições.")
+
+    st.write("Com a estratégia **Busca de capacidade**, o teste procura a maior taxa que o servidor sustenta. Cada nível é executado em malha aberta numa taxa fixa e julgado pelos objetivos (p99 máximo, falhas máximas e taxa atingida mínima em relação à pretendida). A taxa é multiplicada pelo fator de subida até o primeiro nível reprovado e, depois, uma busca binária entre o último nível aprovado e o primeiro reprovado estreita o limite até a precisão pedida. O resultado é a maior taxa sustentável e a faixa em que está o limite real, em poucos níveis.")
+
+    st.markdown("---")
+
+    st.write("## Linha de comando e comparação de testes ⚖️")
+    st.write("Os mesmos testes podem ser executados sem o navegador (por exemplo, no CI), a partir da pasta `app`. O código de saída é 1 quando um critério é violado, o que permite barrar uma publicação:")
+    st.code("python -m engine.cli load https://api.exemplo.com --rate 100 --duration 60 --rule p99:500:3", language="bash")
+    st.write("Cada teste encerrado, na página ou na linha de comando, é gravado como um arquivo de resultado com o plano, os histogramas de cada grupo e a série por segundo. A página **Comparação de Testes** (ou `python -m engine.cli compare referencia.json.gz novo.json.gz`) compara testes com um teste de referência e aponta as pioras estatisticamente significativas no tempo de resposta, na vazão e nas falhas.")
+
+    st.markdown("---")
+
+    st.write("## Servidor simulado e medição do gerador 🧪")
+    st.write("Para testar a ferramenta sem depender de sites externos, o servidor simulado responde localmente com latência, taxa de erros, tamanho de resposta e limite de concorrência configuráveis (os caminhos `/status/<código>` e `/delay/<segundos>` respondem com o código e o atraso pedidos):")
+    st.code("python -m engine.mock_server --port 8088 --latency exponential:0.05 --error-rate 0.01 --max-concurrency 200", language="bash")
+    st.write("O comando `python -m engine.bench` usa esse servidor para medir o próprio gerador: vazão máxima, tempo de CPU e menor tempo de resposta por requisição e memória por requisição em andamento, para cada motor. As medições vão para um histórico, e uma piora em relação à medição anterior é apontada como regressão. Resultados de testes próximos desses limites refletem o gerador, e não o servidor testado.")
 
 # Executa a home_page como a página principal
 if __name__ == "__main__":
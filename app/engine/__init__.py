@@ -0,0 +1,21 @@
+from .scheduler import run_open_loop, sleep_or_stop
+from .histogram import LatencyHistogram, merge_histograms
+from .client import PHASES, ENGINES, ERROR_CLASSES, TIMEOUT_CLASSES, ERROR_LABELS, DEFAULT_SUCCESS_STATUSES, error_class, is_success, parse_status_ranges, format_status_ranges, phase_durations, req_get_async, make_client, make_client_options, LoadTestClient, ResponseRecord, RequestFailure
+from .groups import DEFAULT_WINDOW_TIERS, GroupResult, WindowedGroups, merge_windows, merge_window_lists, run_burst_group, run_open_loop_group, run_windowed_open_loop
+from .workers import make_plan, planned_sizes, run_group_pool, run_open_loop_pool
+from .coordinator import parse_agents, run_distributed
+from .executor import DEFAULT_MAX_IN_FLIGHT, BoundedExecutor, bounded_executor
+from .live import LiveMonitor, LiveSeries, live_monitor, summarize_second
+from .timeseries import DEFAULT_TIERS, TimeBucket, TimeSeries
+from .runner import TestRun, TestRunner, get_runner, run_plan
+from .records import RequestRecorder, request_recorder, read_records, summarize_groups, status_counts, sample_timeline, success_mask
+from .results import RunResults
+from .capacity import CapacitySearch, make_capacity, make_slo, check_slo
+from .rules import RULE_METRICS, RULE_ACTIONS, RuleEngine, make_rule, describe_rule
+from .scenario import Scenario, make_scenario, make_request_template, load_scenario, compile_scenario
+from .feeds import FEED_MODES, FeedReader, make_feed, open_feed
+from .profiles import LoadProfile, make_stage, make_profile, ramp_profile, spike_profile, soak_profile, profile_points, plan_profile
+from .users import VirtualUsers, make_users, ramp_users, make_think_time, run_virtual_users
+from .artifacts import RESULTS_DIR, RunArtifact, save_artifact, list_artifacts, plan_mode
+from .compare import compare_runs, has_regression, plan_differences, mann_whitney, mann_whitney_counts, bootstrap_percentile_change
+from .analysis import RunAnalysis, merge_moments, histogram_percentiles, second_series, mean_throughput
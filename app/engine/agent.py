@@ -0,0 +1,178 @@
+import os
+import hmac
+import json
+import time
+import struct
+import asyncio
+import hashlib
+import secrets
+import argparse
+import functools
+import traceback
+
+from .client import make_client
+from .scenario import compile_scenario
+from .profiles import plan_profile
+from .users import run_virtual_users
+from .executor import bounded_executor
+from .groups import GroupResult, run_windowed_open_loop
+from .live import live_monitor
+from .scheduler import stop_requested
+from .workers import run_group_share
+
+DEFAULT_PORT = 7341
+# Por padrão, o agente só aceita conexões da própria máquina
+DEFAULT_HOST = "127.0.0.1"
+# Segredo compartilhado entre o coordenador (servidor das páginas ou CLI) e os
+# agentes: sem ele, qualquer um que alcance a porta poderia usar o agente para
+# gerar carga contra qualquer endereço
+TOKEN_ENV = "LOAD_TEST_AGENT_TOKEN"
+
+# Protocolo: quadros com 4 bytes de tamanho (big-endian) seguidos do conteúdo.
+# Ao receber a conexão, o agente envia um desafio; o coordenador responde com
+# um quadro JSON com o plano e a resposta ao desafio (ver `agent_auth`), e o
+# agente recusa o plano se ela não confere. Depois, o agente responde com um
+# quadro por grupo concluído e um quadro final.
+#   b"N" + desafio (16 bytes aleatórios)              primeiro quadro do agente
+#   b"G" + índice (uint32) + GroupResult.to_bytes()   grupo concluído
+#   b"S" + segundo (int64) + GroupResult.to_bytes()   agregado de um segundo (plano com "live")
+#   b"D"                                               fim do teste
+#   b"E" + mensagem                                    erro no agente
+FRAME_SIZE = struct.Struct(">I")
+GROUP_INDEX = struct.Struct(">I")
+SECOND = struct.Struct(">q")
+
+async def read_frame(reader):
+    (size,) = FRAME_SIZE.unpack(await reader.readexactly(FRAME_SIZE.size))
+    return await reader.readexactly(size)
+
+async def write_frame(writer, data):
+    writer.write(FRAME_SIZE.pack(len(data)) + data)
+    await writer.drain()
+
+# Resposta ao desafio: HMAC-SHA256 do desafio com o token, então o token
+# não passa pela rede e uma resposta capturada não serve para outra conexão
+def agent_auth(token, challenge):
+    return hmac.new(token.encode(), challenge, hashlib.sha256).hexdigest()
+
+def encode_group(index, group):
+    return b"G" + GROUP_INDEX.pack(index) + group.to_bytes()
+
+def decode_group(frame):
+    (index,) = GROUP_INDEX.unpack_from(frame, 1)
+    return index, GroupResult.from_bytes(frame[1 + GROUP_INDEX.size:])
+
+def encode_second(second, group):
+    return b"S" + SECOND.pack(second) + group.to_bytes()
+
+def decode_second(frame):
+    (second,) = SECOND.unpack_from(frame, 1)
+    return second, GroupResult.from_bytes(frame[1 + SECOND.size:])
+
+# Converte o instante combinado (relógio de parede, sincronizado entre as
+# máquinas por NTP) para o relógio monotônico local usado pelo agendador
+def wall_to_perf_ns(start_at):
+    return time.perf_counter_ns() + round((start_at - time.time()) * 1e9)
+
+# Executa no agente a sua parte do plano (`agent_id` de `num_agents`),
+# chamando `send_group(índice, grupo)` a cada grupo concluído e, se o plano
+# pedir ("live"), `send_second(segundo, grupo)` a cada segundo. Quando `stop` é
+# acionado, os disparos param e os grupos já medidos são enviados.
+# O plano é o de `make_plan` (com rate e duration, malha aberta contínua; com
+# users, usuários virtuais).
+async def run_agent_plan(plan, agent_id, num_agents, start_at, send_group, send_second=None, stop=None):
+    start_ns = wall_to_perf_ns(start_at)
+    async with make_client(plan.get("client_options"), compile_scenario(plan, agent_id, num_agents)) as client, \
+            live_monitor(client, send_second if plan.get("live") else None), \
+            bounded_executor(client, plan.get("max_in_flight")) as executor:
+        if plan.get("users"):
+            groups = await run_virtual_users(client, plan["url"], plan["users"], plan["window"], start_ns, stop, agent_id, num_agents)
+            for index, group in enumerate(groups):
+                await send_group(index, group)
+            return
+        if plan.get("rate"):
+            rate = plan["rate"]
+            profile = plan_profile(plan, agent_id, num_agents)
+            groups, intended_rate, achieved_rate, _ = await run_windowed_open_loop(
+                client, plan["url"], rate / num_agents, plan["duration"], plan["window"],
+                start_ns + (0 if profile else round(agent_id / rate * 1e9)), executor, stop, profile)
+            # Cada janela leva as taxas do agente na execução inteira; somadas entre agentes, dão as taxas do teste
+            for index, group in enumerate(groups):
+                group.intended_rate = intended_rate
+                group.achieved_rate = achieved_rate
+                await send_group(index, group)
+            return
+
+        index = 0
+        while plan["qtty_of_groups"] is None or index < plan["qtty_of_groups"]:
+            if stop_requested(stop):
+                return
+            group = await run_group_share(client, plan, index, agent_id, num_agents, start_ns, executor, stop=stop)
+            await send_group(index, group)
+            index += 1
+
+            min_success_rate = plan.get("min_success_rate")
+            if min_success_rate is not None and group.success_rate < min_success_rate:
+                return
+
+            start_ns = time.perf_counter_ns() + round(plan["delay_in_seconds"] * 1e9)
+
+async def handle_coordinator(reader, writer, token):
+    try:
+        challenge = secrets.token_bytes(16)
+        await write_frame(writer, b"N" + challenge)
+        request = json.loads(await read_frame(reader))
+        if not hmac.compare_digest(str(request.get("auth", "")), agent_auth(token, challenge)):
+            await write_frame(writer, b"E" + "token inválido (use o mesmo {} no coordenador e nos agentes)".format(TOKEN_ENV).encode())
+            return
+
+        async def send_group(index, group):
+            await write_frame(writer, encode_group(index, group))
+
+        # Chamado fora de corrotina pelo LiveMonitor; o envio é concluído pelo próximo drain
+        def send_second(second, group):
+            frame = encode_second(second, group)
+            writer.write(FRAME_SIZE.pack(len(frame)) + frame)
+
+        # O coordenador não envia mais nada depois do plano: o fim da conexão é o pedido de parada
+        stop = asyncio.Event()
+
+        async def watch_close():
+            await reader.read()
+            stop.set()
+
+        watcher = asyncio.create_task(watch_close())
+        try:
+            await run_agent_plan(request["plan"], request["agent_id"], request["num_agents"], request["start_at"], send_group, send_second, stop)
+        finally:
+            watcher.cancel()
+        await write_frame(writer, b"D")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        # O coordenador encerrou a conexão (por exemplo, ao parar o teste de estresse)
+        pass
+    except Exception:
+        await write_frame(writer, b"E" + traceback.format_exc().encode())
+    finally:
+        writer.close()
+
+async def serve(host, port, token):
+    server = await asyncio.start_server(functools.partial(handle_coordinator, token=token), host, port)
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Agente gerador de carga: recebe planos de teste de um coordenador e devolve os resumos de cada grupo.",
+        epilog="Para receber planos de outras máquinas, escute em todas as interfaces com --host 0.0.0.0 (de preferência "
+               "só numa rede confiável ou atrás de um firewall) e defina o mesmo token no coordenador, pela variável {}.".format(TOKEN_ENV))
+    parser.add_argument("--host", default=DEFAULT_HOST, help="endereço em que o agente escuta (padrão: %(default)s, só a própria máquina)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV), help="segredo compartilhado com o coordenador (padrão: a variável {})".format(TOKEN_ENV))
+    args = parser.parse_args()
+    if not args.token:
+        parser.error("defina o token compartilhado com o coordenador em --token ou na variável {}".format(TOKEN_ENV))
+    print(f"Agente aguardando o coordenador em {args.host}:{args.port}")
+    asyncio.run(serve(args.host, args.port, args.token))
+
+if __name__ == "__main__":
+    main()
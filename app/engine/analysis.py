@@ -0,0 +1,181 @@
+import numpy as np
+
+from .client import ERROR_CLASSES, ERROR_LABELS, DEFAULT_SUCCESS_STATUSES, is_success_status
+from .histogram import DEFAULT_PERCENTILES, LatencyHistogram, bucket_upper_value, merge_histograms
+
+# Faixas da taxa de sucesso usadas nos vereditos das páginas: abaixo de 50%,
+# entre 50% e 80% e a partir de 80%
+SUCCESS_BANDS = (0.5, 0.8)
+# Grupos processados de cada vez nos percentis vetorizados (limita a matriz de contagens)
+PERCENTILE_CHUNK = 256
+
+# Junta momentos de vários subconjuntos (contagem, média, variância
+# populacional) em um só, pela fórmula de Chan para a soma dos quadrados dos
+# desvios (M2): M2 = Σ M2ᵢ + Σ nᵢ (médiaᵢ - média)². Retorna (n, média, variância).
+def merge_moments(counts, means, variances):
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if not total:
+        return 0, 0.0, 0.0
+    means = np.asarray(means, dtype=np.float64)
+    mean = float(np.dot(counts, means) / total)
+    m2 = float(np.dot(counts, variances) + np.dot(counts, (means - mean) ** 2))
+    return int(total), mean, m2 / total
+
+# Percentis (ns) de vários histogramas de uma vez: as contagens são empilhadas
+# numa matriz (grupos × baldes, só na faixa de baldes não vazios) e acumuladas
+# por linha. Retorna uma matriz grupos × percentis (0 nos histogramas vazios).
+def histogram_percentiles(histograms, percentiles=DEFAULT_PERCENTILES):
+    result = np.zeros((len(histograms), len(percentiles)))
+    nonzero = [histogram.nonzero()[0] for histogram in histograms]
+    used = [indexes for indexes in nonzero if len(indexes)]
+    if not used:
+        return result
+    low = min(indexes[0] for indexes in used)
+    high = max(indexes[-1] for indexes in used) + 1
+    upper = np.array([bucket_upper_value(index) for index in range(low, high)], dtype=np.float64)
+    fractions = np.asarray(percentiles, dtype=np.float64) / 100
+    for start in range(0, len(histograms), PERCENTILE_CHUNK):
+        chunk = histograms[start:start + PERCENTILE_CHUNK]
+        cumulative = np.cumsum(np.stack([histogram.dense(low, high) for histogram in chunk]), axis=1)
+        totals = cumulative[:, -1]
+        targets = np.maximum(1, np.ceil(fractions[None, :] * totals[:, None]))
+        # Primeiro balde em que a contagem acumulada alcança o alvo
+        positions = (cumulative[:, None, :] < targets[:, :, None]).sum(axis=2)
+        values = upper[np.minimum(positions, high - low - 1)]
+        maxima = np.array([histogram.max for histogram in chunk], dtype=np.float64)
+        result[start:start + len(chunk)] = np.where(totals[:, None] > 0, np.minimum(values, maxima[:, None]), 0)
+    return result
+
+# Estatísticas de um teste, calculadas uma vez sobre vetores contíguos (um
+# elemento por grupo) e reutilizadas por todos os gráficos, tabelas e
+# vereditos. As médias do teste inteiro são ponderadas pelo número de
+# requisições de cada grupo, e não médias das médias dos grupos.
+class RunAnalysis:
+    def __init__(self, groups, percentiles=DEFAULT_PERCENTILES):
+        size = len(groups)
+        self.percentiles = tuple(percentiles)
+        self.requests = np.fromiter((group.total_requests for group in groups), dtype=np.int64, count=size)
+        self.successes = np.fromiter((group.success_count for group in groups), dtype=np.int64, count=size)
+        self.server_errors = np.fromiter((group.server_errors for group in groups), dtype=np.int64, count=size)
+        self.error_counts = np.array([group.error_counts for group in groups], dtype=np.int64).reshape(size, len(ERROR_CLASSES))
+        # Respostas por código de status (grupos × códigos, na ordem de `statuses`) e
+        # histogramas do teste inteiro por código e por classe de erro (tempo até a falha)
+        self.statuses = sorted({status for group in groups for status in group.status_counts})
+        self.status_counts = np.array([[group.status_counts.get(status, 0) for status in self.statuses] for group in groups],
+                                      dtype=np.int64).reshape(size, len(self.statuses))
+        self.status_histograms = {status: merge_histograms(group.status_histograms[status] for group in groups if status in group.status_histograms)
+                                  for status in self.statuses}
+        self.error_histograms = {index: merge_histograms(group.error_histograms[index] for group in groups if index in group.error_histograms)
+                                 for index in range(1, len(ERROR_CLASSES)) if self.error_counts[:, index].any()}
+        histograms = [group.histogram for group in groups]
+        # Requisições com tempo medido e os seus momentos (as somas exatas dos histogramas)
+        self.counts = np.fromiter((histogram.total_count for histogram in histograms), dtype=np.int64, count=size)
+        sums = np.fromiter((histogram.sum for histogram in histograms), dtype=np.float64, count=size) / 1e9
+        counts = np.maximum(self.counts, 1)
+        self.means = np.where(self.counts > 0, sums / counts, 0.0)
+        # Variâncias nas somas inteiras (ver LatencyHistogram.variance): em float64,
+        # Σx²/n - média² perde todos os dígitos quando o desvio é pequeno frente à média
+        self.variances = np.fromiter((histogram.variance() for histogram in histograms), dtype=np.float64, count=size) / 1e18
+        self.std_devs = np.sqrt(self.variances)
+        self.durations = sums
+        self.success_rates = np.divide(self.successes, self.requests, out=np.full(size, np.nan), where=self.requests > 0)
+        self.maxima = np.fromiter((histogram.max for histogram in histograms), dtype=np.float64, count=size) / 1e9
+        # Percentis de cada grupo (s), uma coluna por percentil
+        self.group_percentiles = histogram_percentiles(histograms, self.percentiles) / 1e9
+        self.histogram = merge_histograms(histograms)
+        self.summary = self.histogram.summary(self.percentiles)
+        _, self.mean, variance = merge_moments(self.counts, self.means, self.variances)
+        self.std_dev = variance ** 0.5
+
+    @property
+    def total_requests(self):
+        return int(self.requests.sum())
+
+    @property
+    def total_successes(self):
+        return int(self.successes.sum())
+
+    @property
+    def success_rate(self):
+        total = self.total_requests
+        return self.total_successes / total if total else None
+
+    # Percentil `key` ("p50", "p99.9"...) de cada grupo, ou o máximo com "max"
+    def group_column(self, key):
+        if key == "max":
+            return self.maxima
+        return self.group_percentiles[:, self.percentiles.index(float(key[1:]))]
+
+    # Resumos por grupo no formato de LatencyHistogram.summary
+    @property
+    def group_summaries(self):
+        keys = ["p{:g}".format(p) for p in self.percentiles]
+        return [{"count": int(count), "mean": mean, "std": std, "max": maximum, **dict(zip(keys, row))}
+                for count, mean, std, maximum, row in zip(self.counts, self.means, self.std_devs, self.maxima, self.group_percentiles.tolist())]
+
+    # Uma linha por classe de resultado: cada código de status recebido e cada
+    # classe de erro sem resposta, com as requisições (no teste e em cada grupo),
+    # se conta como sucesso pelo critério `success_statuses`, p50 e p99 (da
+    # latência nas respostas, do tempo até a falha nos erros) e o primeiro
+    # grupo (a partir de 1) em que a classe apareceu. Em ordem de aparição:
+    # a primeira classe sem sucesso é onde o sistema começou a falhar.
+    def outcomes(self, success_statuses=DEFAULT_SUCCESS_STATUSES):
+        rows = []
+        for column, status in enumerate(self.statuses):
+            rows.append(self._outcome("HTTP {}".format(status), self.status_counts[:, column],
+                                      is_success_status(status, success_statuses), self.status_histograms[status]))
+        # Grupos lidos de arquivos de resultado antigos não têm as respostas por status
+        unknown = self.requests - self.error_counts[:, 1:].sum(axis=1) - self.status_counts.sum(axis=1)
+        if unknown.any():
+            rows.append(self._outcome("Respostas (status não registrado)", unknown, None, LatencyHistogram()))
+        for index, histogram in self.error_histograms.items():
+            rows.append(self._outcome(ERROR_LABELS[ERROR_CLASSES[index]], self.error_counts[:, index], False, histogram))
+        rows.sort(key=lambda row: (row["first_group"], -row["requests"]))
+        return rows
+
+    def _outcome(self, label, counts, success, histogram):
+        total = self.total_requests
+        summary = histogram.summary((50, 99)) if histogram.total_count else {"p50": np.nan, "p99": np.nan}
+        return {"outcome": label, "success": success, "requests": int(counts.sum()), "share": counts.sum() / total if total else 0.0,
+                "p50": summary["p50"], "p99": summary["p99"], "first_group": int(np.flatnonzero(counts)[0]) + 1, "per_group": counts}
+
+    # Primeira classe sem sucesso a aparecer (ver `outcomes`), ou None
+    def first_failure(self, success_statuses=DEFAULT_SUCCESS_STATUSES):
+        return next((row for row in self.outcomes(success_statuses) if row["success"] is False), None)
+
+    # Faixa (0: abaixo de 50%, 1: entre 50% e 80%, 2: a partir de 80%) de cada
+    # grupo com requisições previstas, contadas de uma vez. `planned_sizes`
+    # substitui o total de cada grupo como denominador.
+    def success_bands(self, planned_sizes=None):
+        planned = self.requests if planned_sizes is None else np.asarray(planned_sizes, dtype=np.float64)
+        rates = np.divide(self.successes, planned, out=np.zeros(len(planned)), where=planned > 0)[planned > 0]
+        return np.bincount(np.digitize(rates, SUCCESS_BANDS), minlength=len(SUCCESS_BANDS) + 1)
+
+    # Primeiro grupo (a partir de 1) com taxa de sucesso abaixo de `threshold`, ou None
+    def first_group_below(self, threshold):
+        below = np.flatnonzero(self.success_rates < threshold)
+        return int(below[0]) + 1 if len(below) else None
+
+# Pontos da série temporal (ver `TimeBucket.point`) como vetores: segundos
+# desde o primeiro ponto, duração de cada ponto, média e p99, e requisições e
+# sucessos por segundo (a contagem do ponto dividida pela sua duração, que é
+# de 1 s nos pontos recentes e de 10 s ou 1 min nos mais antigos)
+def second_series(seconds):
+    first_second = seconds[0]["second"] if seconds else 0
+    columns = ("second", "span", "requests", "successes", "mean", "p99")
+    series = {key: np.array([second[key] for second in seconds], dtype=np.float64) for key in columns}
+    series["second"] -= first_second
+    series["requests"] /= np.maximum(series["span"], 1)
+    series["successes"] /= np.maximum(series["span"], 1)
+    return series
+
+# Vazão média (req/s) de um teste pela sua série temporal, sem o primeiro e o
+# último ponto: o teste começa e termina no meio desses segundos, e contá-los
+# como segundos inteiros subestima a vazão. Testes com até dois pontos usam
+# todos; sem pontos, None.
+def mean_throughput(seconds):
+    seconds = seconds[1:-1] or seconds
+    if not seconds:
+        return None
+    return sum(second["requests"] for second in seconds) / sum(second["span"] for second in seconds)
@@ -0,0 +1,112 @@
+import os
+import gzip
+import json
+import time
+import base64
+
+from .client import ERROR_CLASSES, LEGACY_ERROR_CLASSES
+from .groups import GroupResult
+from .results import RunResults
+
+# Pasta dos arquivos de resultado (um por teste encerrado); a variável de
+# ambiente LOAD_TEST_RESULTS_DIR muda o local, ex.: para uma pasta guardada pelo CI
+RESULTS_DIR = os.environ.get("LOAD_TEST_RESULTS_DIR", os.path.join(os.path.expanduser("~"), ".load-test-results"))
+ARTIFACT_SUFFIX = ".json.gz"
+# Versão 2: classes de erro detalhadas, respostas por status e histogramas por
+# classe nos grupos. Os arquivos da versão 1 continuam legíveis.
+ARTIFACT_VERSION = 2
+GROUP_ERROR_CLASSES = {1: LEGACY_ERROR_CLASSES, 2: ERROR_CLASSES}
+
+# Arquivo de resultado de um teste: JSON compactado com gzip contendo o plano,
+# o estado final, os critérios, a série temporal (ver `TimeBucket.point`), o
+# instante de conclusão de cada grupo e os grupos, cada um no formato binário de GroupResult (histogramas só com os
+# baldes não vazios) em base64. Os histogramas dos grupos bastam para refazer
+# os percentis do teste inteiro e para as comparações entre testes.
+# `status` substitui o estado do teste, gravado antes de o executor o encerrar
+def artifact_data(run, status=None):
+    return {
+        "version": ARTIFACT_VERSION,
+        "id": run.id,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "status": status or run.status,
+        "error": run.error,
+        "stop_reason": run.stop_reason,
+        "passed": run.passed,
+        "plan": run.plan,
+        "rates": run.rates,
+        "rules": [[rule, breach] for rule, breach in run.rules.verdicts()],
+        "seconds": run.seconds,
+        "group_times": run.group_times,
+        "groups": [base64.b64encode(group.to_bytes()).decode("ascii") for group in run.groups],
+    }
+
+def artifact_name(run):
+    return "{}-{}{}".format(time.strftime("%Y%m%d-%H%M%S", time.localtime(run.started_at)), run.id[:8], ARTIFACT_SUFFIX)
+
+# Grava o arquivo de resultado do teste em `directory` e retorna o caminho
+def save_artifact(run, directory=RESULTS_DIR, status=None):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, artifact_name(run))
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(artifact_data(run, status), file, ensure_ascii=False)
+    return path
+
+# Modo de disparo do plano, para rótulos e comparações
+def plan_mode(plan):
+    if plan.get("users"):
+        return "users"
+    if plan.get("capacity"):
+        return "capacity"
+    if plan.get("profile"):
+        return "profile"
+    if plan.get("rate"):
+        return "rate"
+    return "stress" if plan.get("increment") else "groups"
+
+# Teste lido de um arquivo de resultado, com os grupos de volta em RunResults
+class RunArtifact:
+    def __init__(self, data, path=None):
+        if data.get("version") not in GROUP_ERROR_CLASSES:
+            raise ValueError("Versão de arquivo de resultado não suportada: {}".format(data.get("version")))
+        self.path = path
+        self.id = data["id"]
+        self.started_at = data["started_at"]
+        self.finished_at = data["finished_at"]
+        self.status = data["status"]
+        self.error = data["error"]
+        self.stop_reason = data["stop_reason"]
+        self.passed = data["passed"]
+        self.plan = data["plan"]
+        self.rates = data["rates"]
+        self.rules = data["rules"]
+        # Arquivos anteriores à série temporal têm um ponto por segundo, sem `span`
+        self.seconds = [{"span": 1, **second} for second in data["seconds"]]
+        self.group_times = data.get("group_times")
+        error_classes = GROUP_ERROR_CLASSES[data["version"]]
+        self.results = RunResults(GroupResult.from_bytes(base64.b64decode(group), error_classes) for group in data["groups"])
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return cls(json.load(file), path)
+
+    # Conteúdo de um arquivo enviado (ex.: pela página de comparação)
+    @classmethod
+    def from_bytes(cls, data, path=None):
+        return cls(json.loads(gzip.decompress(data)), path)
+
+    @property
+    def mode(self):
+        return plan_mode(self.plan)
+
+    @property
+    def label(self):
+        return "{} · {} · {}".format(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)), self.mode, self.plan["url"])
+
+# Arquivos de resultado da pasta, do mais recente ao mais antigo
+def list_artifacts(directory=RESULTS_DIR):
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if name.endswith(ARTIFACT_SUFFIX)]
+    return [os.path.join(directory, name) for name in sorted(names, reverse=True)]
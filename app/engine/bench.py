@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import functools
+import argparse
+import platform
+import threading
+import importlib.util
+import multiprocessing as mp
+import concurrent.futures
+
+from .client import ResponseRecord, make_client, make_client_options
+from .groups import GroupResult
+from .executor import BoundedExecutor, run_bounded_burst_group
+from .artifacts import RESULTS_DIR
+from .mock_server import make_mock_config, mock_server
+
+# Medição do próprio gerador contra o servidor simulado local (ver
+# engine.mock_server), para saber até onde os números da ferramenta refletem o
+# servidor testado e não os limites dela. Para cada motor:
+#   max_rps             requisições com sucesso por segundo em rajada, com
+#                       `concurrency` em andamento e um servidor que responde na hora
+#   cpu_per_request     tempo de CPU do processo gerador por requisição na mesma rajada
+#   latency_floor       p50 das requisições uma a uma contra o mesmo servidor: o
+#                       menor tempo de resposta que o motor consegue medir
+#   memory_per_request  memória residente a mais por requisição em andamento,
+#                       com `in_flight` requisições presas `hold` segundos no servidor
+# Cada motor roda num processo próprio, para que a memória de um não conte no
+# outro. Os resultados são acrescentados ao histórico (JSON Lines) e comparados
+# com a medição anterior do mesmo motor, na mesma máquina e configuração.
+BENCH_HISTORY = os.path.join(RESULTS_DIR, "bench-history.jsonl")
+# Piora relativa a partir da qual uma métrica é apontada como regressão
+DEFAULT_TOLERANCE = 0.15
+
+# Métrica: (rótulo, unidade, escala da unidade, maior é melhor)
+BENCH_METRICS = {
+    "max_rps": ("Vazão máxima", "req/s", 1, True),
+    "cpu_per_request": ("CPU por requisição", "µs", 1e6, False),
+    "latency_floor": ("Menor tempo de resposta (p50)", "ms", 1e3, False),
+    "memory_per_request": ("Memória por requisição em andamento", "KiB", 1 / 1024, False),
+}
+
+def make_bench_config(requests=10000, concurrency=100, sequential=2000, in_flight=500, hold=1.0, payload_size=2):
+    return {"requests": requests, "concurrency": concurrency, "sequential": sequential, "in_flight": in_flight, "hold": hold, "payload_size": payload_size}
+
+# Motores comparados: cada um faz `num_requests` GETs em `url` com até
+# `concurrency` em andamento e retorna um GroupResult
+def client_engine(url, num_requests, concurrency, engine="async"):
+    async def run():
+        options = make_client_options(max_connections=concurrency, max_keepalive_connections=concurrency, engine=engine)
+        async with make_client(options) as client, BoundedExecutor(client, concurrency) as executor:
+            return await run_bounded_burst_group(executor, url, num_requests, GroupResult())
+    return asyncio.run(run())
+
+# O padrão antigo dos scripts de others/, mantido como referência: um
+# ThreadPoolExecutor novo a cada lote, com uma thread por requisição e
+# `requests.get` sem Session (uma conexão nova por requisição)
+def legacy_threads_engine(url, num_requests, concurrency):
+    import requests
+
+    def request(_):
+        start = time.perf_counter_ns()
+        try:
+            response = requests.get(url, timeout=30)
+        except requests.RequestException:
+            return None, None
+        duration = (time.perf_counter_ns() - start) / 1e9
+        return ResponseRecord(response.status_code, "HTTP/1.1", response.headers.get("content-type"), None, len(response.content), True), duration
+
+    group = GroupResult()
+    for start in range(0, num_requests, concurrency):
+        size = min(concurrency, num_requests - start)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=size) as executor:
+            group.add_results(executor.map(request, range(size)))
+    return group
+
+# Motor: (função, módulo exigido ou None)
+BENCH_ENGINES = {
+    "async": (client_engine, None),
+    "threads": (functools.partial(client_engine, engine="threads"), "requests"),
+    "threads-legacy": (legacy_threads_engine, "requests"),
+}
+
+def available_engines():
+    return [name for name, (_, module) in BENCH_ENGINES.items() if module is None or importlib.util.find_spec(module) is not None]
+
+# Memória residente do processo em bytes (no Linux, a atual; nos demais, o pico)
+def resident_memory():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+# Maior memória residente enquanto `function` executa, amostrada a cada `interval` segundos
+def peak_memory(function, interval=0.005):
+    peak = [resident_memory()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], resident_memory())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        function()
+    finally:
+        done.set()
+        sampler.join()
+    return max(peak[0], resident_memory())
+
+# Mede um motor (executado num processo próprio) e retorna as métricas
+def bench_engine(name, url, config):
+    engine, _ = BENCH_ENGINES[name]
+    engine(url, 20, 10)
+    # A memória vem primeiro: depois da rajada, o alocador guarda a memória
+    # liberada e a diferença sobre a base ficaria menor que a real
+    baseline = resident_memory()
+    in_flight = config["in_flight"]
+    peak = peak_memory(lambda: engine("{}delay/{}".format(url, config["hold"]), in_flight, in_flight))
+
+    cpu_start, start = time.process_time(), time.perf_counter()
+    group = engine(url, config["requests"], config["concurrency"])
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+    sequential = engine(url, config["sequential"], 1)
+    return {
+        "max_rps": group.success_count / elapsed,
+        "cpu_per_request": cpu / max(group.total_requests, 1),
+        "latency_floor": sequential.histogram.percentile(50) / 1e9,
+        "memory_per_request": max(peak - baseline, 0) / in_flight,
+        "failures": group.total_requests - group.success_count + sequential.total_requests - sequential.success_count,
+    }
+
+def run_benchmarks(engines=None, config=None, server_processes=2):
+    config = config or make_bench_config()
+    engines = engines or available_engines()
+    results = {}
+    with mock_server(make_mock_config(payload_size=config["payload_size"]), processes=server_processes) as url:
+        for name in engines:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                results[name] = pool.submit(bench_engine, name, url, config).result()
+    return results
+
+def make_history_entry(engine, config, metrics, server_processes):
+    return {"timestamp": time.time(), "engine": engine, "host": platform.node(), "python": platform.python_version(),
+            "server_processes": server_processes, "config": config, "metrics": metrics}
+
+def read_history(path=BENCH_HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def append_history(entries, path=BENCH_HISTORY):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+# Medição anterior comparável (mesmo motor, máquina, configuração e servidor), ou None
+def previous_entry(history, entry):
+    keys = ("engine", "host", "server_processes", "config")
+    for candidate in reversed(history):
+        if all(candidate.get(key) == entry[key] for key in keys):
+            return candidate
+    return None
+
+# Variação relativa de cada métrica em relação à medição anterior; regressão
+# quando a piora passa de `tolerance`. Retorna (métrica, anterior, atual, variação, regressão).
+def compare_entries(previous, entry, tolerance=DEFAULT_TOLERANCE):
+    rows = []
+    for metric, (_, _, _, higher_is_better) in BENCH_METRICS.items():
+        before, after = previous["metrics"].get(metric), entry["metrics"].get(metric)
+        if not before or after is None:
+            continue
+        change = after / before - 1
+        worse = -change if higher_is_better else change
+        rows.append((metric, before, after, change, worse > tolerance))
+    return rows
+
+def format_metric(metric, value):
+    _, unit, scale, _ = BENCH_METRICS[metric]
+    return "{:.1f} {}".format(value * scale, unit)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o próprio gerador (vazão máxima, CPU e tempo mínimo por requisição, memória por requisição em andamento) contra o servidor simulado local e acompanha regressões entre medições.")
+    parser.add_argument("--engine", action="append", choices=list(BENCH_ENGINES), help="motor a medir (repetível; padrão: todos os disponíveis)")
+    parser.add_argument("--requests", type=int, default=10000, help="requisições da rajada de vazão máxima")
+    parser.add_argument("--concurrency", type=int, default=100, help="requisições em andamento na rajada")
+    parser.add_argument("--sequential", type=int, default=2000, help="requisições uma a uma para o tempo mínimo")
+    parser.add_argument("--in-flight", type=int, default=500, help="requisições em andamento na medição de memória")
+    parser.add_argument("--hold", type=float, default=1.0, help="segundos de cada requisição na medição de memória")
+    parser.add_argument("--payload", type=int, default=2, help="bytes do corpo das respostas")
+    parser.add_argument("--server-processes", type=int, default=2, help="processos do servidor simulado")
+    parser.add_argument("--history", default=BENCH_HISTORY, help="arquivo do histórico (padrão: %(default)s)")
+    parser.add_argument("--no-history", action="store_true", help="não grava a medição no histórico")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE * 100, help="piora (%%) apontada como regressão")
+    args = parser.parse_args(argv)
+
+    engines = args.engine or available_engines()
+    missing = [name for name in engines if name not in available_engines()]
+    if missing:
+        parser.error("motor indisponível (falta o módulo {}): {}".format(", ".join(BENCH_ENGINES[name][1] for name in missing), ", ".join(missing)))
+    config = make_bench_config(args.requests, args.concurrency, args.sequential, args.in_flight, args.hold, args.payload)
+    results = run_benchmarks(engines, config, args.server_processes)
+
+    history = read_history(args.history)
+    entries = [make_history_entry(name, config, metrics, args.server_processes) for name, metrics in results.items()]
+    regression = False
+    for entry in entries:
+        metrics = entry["metrics"]
+        print("Motor {}:".format(entry["engine"]))
+        previous = previous_entry(history, entry)
+        changes = {row[0]: row for row in compare_entries(previous, entry, args.tolerance / 100)} if previous else {}
+        for metric, (label, _, _, _) in BENCH_METRICS.items():
+            line = "  {}: {}".format(label, format_metric(metric, metrics[metric]))
+            if metric in changes:
+                _, before, _, change, worse = changes[metric]
+                line += " (antes {}, {:+.1%}){}".format(format_metric(metric, before), change, " REGRESSÃO" if worse else "")
+                regression = regression or worse
+            print(line)
+        if metrics["failures"]:
+            print("  Aviso: {} requisições sem sucesso; os números não refletem só o gerador".format(metrics["failures"]))
+    if not args.no_history:
+        append_history(entries, args.history)
+        print("Histórico: {}".format(args.history))
+    return 1 if regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# Busca da maior taxa sustentável: cada nível é um grupo em malha aberta de
+# `window` segundos a uma taxa fixa, julgado pelos SLOs. A taxa sobe
+# geometricamente (× factor) até o primeiro nível reprovado e, depois, é feita
+# uma busca binária entre o último nível aprovado e o primeiro reprovado, até
+# a distância entre eles ficar abaixo de `precision` (fração da taxa reprovada).
+
+# Objetivos de cada nível (None = não avaliado):
+#   max_p99               p99 máximo do tempo de resposta (s)
+#   max_error_rate        fração máxima de requisições sem sucesso
+#   min_throughput_ratio  fração mínima da taxa pretendida que o gerador conseguiu disparar
+def make_slo(max_p99=None, max_error_rate=0.01, min_throughput_ratio=0.95):
+    return {
+        "max_p99": max_p99,
+        "max_error_rate": max_error_rate,
+        "min_throughput_ratio": min_throughput_ratio,
+    }
+
+# Parâmetros da busca, guardados no plano (ver `make_plan`)
+def make_capacity(start_rate=10, factor=2, max_rate=None, precision=0.05, max_levels=20, slo=None):
+    return {
+        "start_rate": start_rate,
+        "factor": factor,
+        "max_rate": max_rate,
+        "precision": precision,
+        "max_levels": max_levels,
+        "slo": slo or make_slo(),
+    }
+
+# Objetivos violados por um grupo, como mensagens (lista vazia = aprovado)
+def check_slo(group, slo):
+    violations = []
+    if not group.total_requests:
+        return ["Nenhuma requisição no nível"]
+    p99 = group.histogram.percentile(99) / 1e9
+    if slo["max_p99"] is not None and p99 > slo["max_p99"]:
+        violations.append("p99 de {:.3f} s acima de {:.3f} s".format(p99, slo["max_p99"]))
+    error_rate = 1 - group.success_rate
+    if slo["max_error_rate"] is not None and error_rate > slo["max_error_rate"]:
+        violations.append("{:.2%} de falhas, acima de {:.2%}".format(error_rate, slo["max_error_rate"]))
+    if slo["min_throughput_ratio"] is not None and group.intended_rate:
+        ratio = group.achieved_rate / group.intended_rate
+        if ratio < slo["min_throughput_ratio"]:
+            violations.append("taxa atingida de {:.0%} da pretendida, abaixo de {:.0%}".format(ratio, slo["min_throughput_ratio"]))
+    return violations
+
+class CapacitySearch:
+    def __init__(self, start_rate=10, factor=2, max_rate=None, precision=0.05, max_levels=20, slo=None):
+        self.start_rate = start_rate
+        self.factor = factor
+        self.max_rate = max_rate
+        self.precision = precision
+        self.max_levels = max_levels
+        self.slo = slo or make_slo()
+        # Maior taxa aprovada e menor taxa reprovada até aqui
+        self.good = None
+        self.bad = None
+        # (taxa, grupo, violações) de cada nível, na ordem
+        self.levels = []
+
+    @classmethod
+    def from_plan(cls, plan):
+        return cls(**plan["capacity"])
+
+    # Taxa do próximo nível, ou None quando a busca terminou
+    def next_rate(self):
+        if len(self.levels) >= self.max_levels:
+            return None
+        if not self.levels:
+            return self.start_rate
+        if self.bad is None:
+            # Subida geométrica, limitada por max_rate
+            if self.max_rate is not None and self.good >= self.max_rate:
+                return None
+            rate = self.good * self.factor
+            return min(rate, self.max_rate) if self.max_rate is not None else rate
+        if self.good is None:
+            # Reprovado já no primeiro nível: desce até encontrar um nível aprovado
+            rate = self.bad / self.factor
+            return rate if rate >= 1 else None
+        if (self.bad - self.good) / self.bad <= self.precision:
+            return None
+        return (self.good + self.bad) / 2
+
+    # Registra o grupo medido no nível `rate` (por padrão, a taxa pretendida do grupo)
+    def record(self, group, rate=None):
+        rate = rate if rate is not None else group.intended_rate
+        violations = check_slo(group, self.slo)
+        self.levels.append((rate, group, violations))
+        if violations:
+            self.bad = rate if self.bad is None else min(self.bad, rate)
+        else:
+            self.good = rate if self.good is None else max(self.good, rate)
+        return violations
+
+    # Refaz a busca a partir dos grupos já medidos (a página recebe só os grupos)
+    def replay(self, groups):
+        for group in groups:
+            self.record(group)
+        return self
+
+    @property
+    def finished(self):
+        return self.next_rate() is None
+
+    # Maior taxa sustentável encontrada e a faixa em que está o limite real:
+    # entre o último nível aprovado e o primeiro reprovado (sem reprovação, o
+    # limite está acima da maior taxa testada e a faixa fica aberta)
+    @property
+    def max_sustainable_rate(self):
+        return self.good
+
+    @property
+    def band(self):
+        return self.good, self.bad
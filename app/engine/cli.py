@@ -0,0 +1,310 @@
+import sys
+import json
+import time
+import argparse
+
+from .client import ENGINES, DEFAULT_SUCCESS_STATUSES, make_client_options, parse_status_ranges, format_status_ranges
+from .workers import make_plan
+from .executor import DEFAULT_MAX_IN_FLIGHT
+from .runner import TestRunner
+from .artifacts import RESULTS_DIR, RunArtifact
+from .analysis import mean_throughput
+from .compare import DEFAULT_ALPHA, DEFAULT_MIN_CHANGE, DEFAULT_MAX_ERROR_INCREASE, compare_runs, has_regression, plan_differences
+from .coordinator import parse_agents
+from .scenario import load_scenario
+from .feeds import FEED_MODES, make_feed
+from .profiles import make_profile
+from .users import THINK_DISTRIBUTIONS, make_users, ramp_users, make_think_time
+from .capacity import CapacitySearch, make_capacity, make_slo
+from .rules import RULE_METRICS, RULE_ACTIONS, make_rule, describe_rule
+
+# Execução sem navegador (CI, cron): o mesmo plano das páginas, executado pelo
+# mesmo executor de testes, com um resumo no terminal e, opcionalmente, os
+# resultados em JSON. Só importa o pacote do motor, sem streamlit, pandas ou
+# plotly. Uso, a partir da pasta `app`:
+#   python -m engine.cli load URL --rate 100 --duration 60 --rule p99:500:3:stop
+#   python -m engine.cli stress URL --requests 50 --increment 50 --min-success-rate 95
+#   python -m engine.cli capacity URL --start-rate 10 --max-p99 500 --output resultado.json
+#   python -m engine.cli compare referencia.json.gz candidato.json.gz
+# Cada teste também é gravado como arquivo de resultado (ver engine.artifacts)
+# em --results-dir, e `compare` compara arquivos de resultado (ver engine.compare).
+# Código de saída: 0 aprovado, 1 reprovado (critério violado, busca sem nível
+# aprovado, regressão na comparação) ou teste com erro, 2 argumentos inválidos.
+
+# Intervalo (s) entre as linhas de progresso
+PROGRESS_INTERVAL = 5
+
+# Critério no formato métrica:limite[:segundos[:ação]], com o limite na unidade
+# exibida pelas páginas (ms para tempos, % para frações)
+def parse_rule(text):
+    metric, threshold, *rest = text.split(":")
+    if metric not in RULE_METRICS or len(rest) > 2:
+        raise argparse.ArgumentTypeError("use métrica:limite[:segundos[:ação]], com métrica em {}".format(", ".join(RULE_METRICS)))
+    seconds = int(rest[0]) if rest else 1
+    action = rest[1] if len(rest) > 1 else "fail"
+    if action not in RULE_ACTIONS:
+        raise argparse.ArgumentTypeError("ação desconhecida: {} (use {})".format(action, " ou ".join(RULE_ACTIONS)))
+    return make_rule(metric, float(threshold) * RULE_METRICS[metric][2], seconds, action)
+
+# Tempo de pensar no formato distribuição:média[:variação], em segundos
+def parse_think_time(text):
+    distribution, mean, *spread = text.split(":")
+    if distribution not in THINK_DISTRIBUTIONS:
+        raise argparse.ArgumentTypeError("distribuição desconhecida: {} (use {})".format(distribution, ", ".join(THINK_DISTRIBUTIONS)))
+    return make_think_time(distribution, float(mean), float(spread[0]) if spread else 0.0)
+
+# Faixas de status de sucesso, ex.: 200-299,304
+def parse_success_statuses(text):
+    try:
+        return parse_status_ranges(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+def read_text(path):
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m engine.cli", description="Executa testes de carga, estresse e busca de capacidade sem a interface web.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("url", help="URL do teste (base dos caminhos do cenário)")
+    common.add_argument("--scenario", metavar="ARQUIVO", help="cenário em JSON ou YAML (ver engine.scenario)")
+    common.add_argument("--feed", metavar="ARQUIVO", help="massa de dados CSV ou JSONL (ver engine.feeds)")
+    common.add_argument("--feed-mode", choices=FEED_MODES, default="sequential")
+    common.add_argument("--rule", type=parse_rule, action="append", default=[], metavar="MÉTRICA:LIMITE[:SEG[:AÇÃO]]",
+                        help="critério de parada ou aprovação, ex.: p99:500:3:stop, error_rate:1 (repetível)")
+    common.add_argument("--workers", type=int, default=1, help="processos geradores")
+    common.add_argument("--agents", metavar="HOST:PORTA,...", help="agentes para a execução distribuída (com o token da variável LOAD_TEST_AGENT_TOKEN)")
+    common.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="máximo de requisições em andamento por processo (0 = sem limite)")
+    common.add_argument("--connections", type=int, default=100, help="máximo de conexões simultâneas")
+    common.add_argument("--timeout", type=float, default=5.0, help="tempo limite por requisição (s)")
+    common.add_argument("--connect-timeout", type=float, default=5.0, help="tempo limite de conexão (s)")
+    common.add_argument("--no-keep-alive", dest="keep_alive", action="store_false")
+    common.add_argument("--http2", action="store_true")
+    common.add_argument("--engine", choices=ENGINES, default="async", help="motor das requisições: httpx assíncrono ou requests num pool fixo de threads, uma por conexão (padrão: %(default)s)")
+    common.add_argument("--success-status", type=parse_success_statuses, default=DEFAULT_SUCCESS_STATUSES, metavar="FAIXAS",
+                        help="códigos de status contados como sucesso, ex.: 200-299,304 (padrão: {})".format(format_status_ranges(DEFAULT_SUCCESS_STATUSES)))
+    common.add_argument("--keep-bodies", dest="stream_bodies", action="store_false", help="mantém o corpo das respostas em memória")
+    common.add_argument("--records", action="store_true", help="registra cada requisição em Parquet")
+    common.add_argument("--output", metavar="ARQUIVO", help="grava os resultados em JSON")
+    common.add_argument("--quiet", action="store_true", help="sem linhas de progresso")
+    common.add_argument("--results-dir", default=RESULTS_DIR, metavar="PASTA", help="pasta dos arquivos de resultado (padrão: %(default)s)")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    load = modes.add_parser("load", parents=[common], help="teste de carga: grupos em rajada, taxa constante, perfil de carga ou usuários virtuais")
+    load.add_argument("--requests", type=int, default=1, help="requisições por grupo (grupos em rajada)")
+    load.add_argument("--groups", type=int, default=1, help="quantidade de grupos (grupos em rajada)")
+    load.add_argument("--delay", type=float, default=1.0, help="pausa entre grupos (s)")
+    load.add_argument("--rate", type=float, help="taxa constante (req/s), em malha aberta")
+    load.add_argument("--duration", type=float, default=10, help="duração na taxa constante (s)")
+    load.add_argument("--profile", metavar="ARQUIVO", help="perfil de carga em JSON: {\"start_rate\": 0, \"stages\": [{\"duration\": 60, \"target\": 100}]}")
+    load.add_argument("--users", type=int, help="usuários virtuais (modelo fechado)")
+    load.add_argument("--ramp-up", type=float, default=0.0, help="subida dos usuários (s)")
+    load.add_argument("--hold", type=float, default=60.0, help="platô dos usuários (s)")
+    load.add_argument("--ramp-down", type=float, default=0.0, help="descida dos usuários (s)")
+    load.add_argument("--think-time", type=parse_think_time, metavar="DIST:MÉDIA[:VARIAÇÃO]", help="tempo de pensar, ex.: exponential:1")
+    load.add_argument("--no-sessions", dest="sessions", action="store_false", help="usuários compartilham os cookies")
+    load.add_argument("--window", type=int, default=1, help="janela de cada grupo (s)")
+
+    stress = modes.add_parser("stress", parents=[common], help="teste de estresse com incremento linear")
+    stress.add_argument("--requests", type=int, default=1, help="requisições do primeiro grupo")
+    stress.add_argument("--increment", type=int, default=1, help="requisições a mais em cada grupo")
+    stress.add_argument("--min-success-rate", type=float, default=50.0, help="taxa de sucesso mínima por grupo (%%)")
+    stress.add_argument("--max-groups", type=int, help="quantidade máxima de grupos")
+    stress.add_argument("--delay", type=float, default=1.0, help="pausa entre grupos (s)")
+    stress.add_argument("--window", type=int, help="com uma janela (s), cada grupo é disparado em malha aberta ao longo dela")
+
+    capacity = modes.add_parser("capacity", parents=[common], help="busca da maior taxa sustentável")
+    capacity.add_argument("--start-rate", type=float, default=10.0, help="taxa do primeiro nível (req/s)")
+    capacity.add_argument("--factor", type=float, default=2.0, help="fator de subida entre níveis")
+    capacity.add_argument("--max-rate", type=float, help="taxa máxima (req/s)")
+    capacity.add_argument("--precision", type=float, default=5.0, help="precisão da busca (%%)")
+    capacity.add_argument("--max-levels", type=int, default=20)
+    capacity.add_argument("--window", type=int, default=5, help="duração de cada nível (s)")
+    capacity.add_argument("--delay", type=float, default=1.0, help="pausa entre níveis (s)")
+    capacity.add_argument("--max-p99", type=float, default=500.0, help="p99 máximo de cada nível (ms, 0 = não avaliar)")
+    capacity.add_argument("--max-error-rate", type=float, default=1.0, help="falhas máximas de cada nível (%%)")
+    capacity.add_argument("--min-throughput", type=float, default=95.0, help="taxa atingida mínima (%% da pretendida)")
+
+    compare = modes.add_parser("compare", help="compara testes gravados com um teste de referência")
+    compare.add_argument("baseline", help="arquivo de resultado de referência")
+    compare.add_argument("candidates", nargs="+", help="arquivos de resultado comparados com a referência")
+    compare.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="nível de significância (padrão: %(default)s)")
+    compare.add_argument("--min-change", type=float, default=DEFAULT_MIN_CHANGE * 100, help="piora relativa mínima para uma regressão (%%, padrão: %(default)s)")
+    compare.add_argument("--max-error-increase", type=float, default=DEFAULT_MAX_ERROR_INCREASE * 100, help="aumento máximo das falhas (pontos percentuais, padrão: %(default)s)")
+    compare.add_argument("--output", metavar="ARQUIVO", help="grava as comparações em JSON")
+    return parser
+
+def build_plan(args):
+    client_options = make_client_options(max_connections=args.connections, keep_alive=args.keep_alive, max_keepalive_connections=args.connections,
+                                         http2=args.http2, timeout=args.timeout, connect_timeout=args.connect_timeout, stream_bodies=args.stream_bodies,
+                                         engine=args.engine, success_statuses=args.success_status)
+    common = dict(client_options=client_options, max_in_flight=args.max_in_flight or None, records=args.records, rules=args.rule,
+                  scenario=load_scenario(read_text(args.scenario)) if args.scenario else None,
+                  feed=make_feed(args.feed, args.feed_mode) if args.feed else None)
+    if args.mode == "capacity":
+        capacity = make_capacity(args.start_rate, args.factor, args.max_rate, args.precision / 100, args.max_levels,
+                                 make_slo(args.max_p99 / 1000 or None, args.max_error_rate / 100, args.min_throughput / 100))
+        return make_plan(args.url, window=args.window, delay_in_seconds=args.delay, capacity=capacity, **common)
+    if args.mode == "stress":
+        return make_plan(args.url, args.requests, increment=args.increment, qtty_of_groups=args.max_groups, delay_in_seconds=args.delay,
+                         window=args.window, min_success_rate=args.min_success_rate / 100, **common)
+    if args.users:
+        users = make_users(ramp_users(args.users, args.ramp_up, args.hold, args.ramp_down), args.think_time, args.sessions)
+        return make_plan(args.url, window=args.window, users=users, **common)
+    if args.profile:
+        definition = json.loads(read_text(args.profile))
+        return make_plan(args.url, window=args.window, profile=make_profile(definition.get("start_rate", 0), definition["stages"]), **common)
+    if args.rate:
+        return make_plan(args.url, rate=args.rate, duration=args.duration, window=args.window, **common)
+    return make_plan(args.url, args.requests, qtty_of_groups=args.groups, delay_in_seconds=args.delay, **common)
+
+# Resultados do teste em estruturas simples (tempos em segundos), para o resumo e o JSON
+def summarize_run(run):
+    results = run.results
+    analysis = results.analysis()
+    total = analysis.total_requests
+    successes = analysis.total_successes
+    report = {
+        "id": run.id,
+        "status": run.status,
+        "error": run.error,
+        "stop_reason": run.stop_reason,
+        "passed": run.passed,
+        "elapsed": run.elapsed,
+        "plan": run.plan,
+        "requests": total,
+        "successes": successes,
+        "success_rate": successes / total if total else None,
+        "throughput": mean_throughput(run.seconds),
+        "latency": analysis.summary,
+        "outcomes": [{key: value for key, value in row.items() if key != "per_group"}
+                     for row in analysis.outcomes(run.plan["client_options"]["success_statuses"])],
+        "rates": dict(zip(("intended", "achieved", "max_dispatch_lag"), run.rates)) if run.rates else None,
+        "rules": [{"rule": describe_rule(rule), "violation": breach} for rule, breach in run.rules.verdicts()],
+        "groups": [{"requests": group.total_requests, "successes": group.success_count, "users": group.users,
+                    "intended_rate": group.intended_rate, "achieved_rate": group.achieved_rate, **summary}
+                   for group, summary in zip(results.groups, analysis.group_summaries)],
+        "seconds": run.seconds,
+        "records": run.records_path,
+        "artifact": run.artifact_path,
+    }
+    if run.plan.get("capacity"):
+        search = CapacitySearch.from_plan(run.plan).replay(results.groups)
+        report["capacity"] = {"max_sustainable_rate": search.max_sustainable_rate, "band": search.band,
+                              "levels": [{"rate": rate, "violations": violations} for rate, _, violations in search.levels]}
+    return report
+
+def print_summary(report, out=sys.stdout):
+    print("Status: {} em {:.1f} s".format(report["status"], report["elapsed"]), file=out)
+    if report["error"]:
+        print(report["error"], file=out)
+    if report["stop_reason"]:
+        print("Interrompido pelo critério {}".format(report["stop_reason"]), file=out)
+    if report["requests"]:
+        print("Requisições: {} ({:.2%} com sucesso) em {} grupo(s)".format(report["requests"], report["success_rate"], len(report["groups"])), file=out)
+        latency = report["latency"]
+        print("Tempo de resposta (ms): média {:.1f}  p50 {:.1f}  p90 {:.1f}  p99 {:.1f}  p99.9 {:.1f}  max {:.1f}".format(
+            *(latency[key] * 1000 for key in ("mean", "p50", "p90", "p99", "p99.9", "max"))), file=out)
+        for row in report["outcomes"]:
+            print("  {}{}: {} ({:.2%}), p50 {:.1f} ms, p99 {:.1f} ms, desde o grupo {}".format(
+                row["outcome"], "" if row["success"] is not False else " (falha)", row["requests"], row["share"],
+                row["p50"] * 1000, row["p99"] * 1000, row["first_group"]), file=out)
+    if report["throughput"] is not None:
+        print("Vazão média: {:.1f} req/s".format(report["throughput"]), file=out)
+    if report["rates"]:
+        print("Taxa pretendida {:.2f} req/s, atingida {:.2f} req/s".format(report["rates"]["intended"], report["rates"]["achieved"]), file=out)
+    if "capacity" in report:
+        good, bad = report["capacity"]["band"]
+        if good is None:
+            print("Capacidade: nenhum nível aprovado", file=out)
+        else:
+            print("Capacidade: {:.1f} req/s sustentáveis (limite {})".format(good, "entre {:.1f} e {:.1f} req/s".format(good, bad) if bad else "acima da maior taxa testada"), file=out)
+    for verdict in report["rules"]:
+        violation = verdict["violation"]
+        print("{} {}".format("FALHOU" if violation else "OK    ", verdict["rule"]), file=out)
+    if report["records"]:
+        print("Registro por requisição: {}".format(report["records"]), file=out)
+    if report["artifact"]:
+        print("Arquivo de resultado: {}".format(report["artifact"]), file=out)
+
+def exit_code(report):
+    if report["status"] == "failed" or report["passed"] is False:
+        return 1
+    if "capacity" in report and report["capacity"]["max_sustainable_rate"] is None:
+        return 1
+    return 0
+
+# Aguarda o teste, com uma linha de progresso a cada PROGRESS_INTERVAL
+# segundos; o primeiro Ctrl+C para o teste e mantém os resultados parciais
+def wait(runner, run, quiet=False):
+    last_progress = time.monotonic()
+    while run.running:
+        try:
+            time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("Parando o teste...", file=sys.stderr)
+            runner.stop(run.id)
+            continue
+        if not quiet and time.monotonic() - last_progress >= PROGRESS_INTERVAL and run.seconds:
+            last = run.seconds[-1]
+            print("{:6.0f} s  {} requisições  último segundo: {} req/s, p99 {:.1f} ms".format(
+                run.elapsed, run.total_requests, last["requests"], last["p99"] * 1000), file=sys.stderr)
+            last_progress = time.monotonic()
+
+def format_comparison(comparison):
+    metric = comparison["metric"]
+    if metric == "error_rate":
+        values = "{:.2%} → {:.2%} ({:+.2f} p.p.)".format(comparison["baseline"], comparison["candidate"], comparison["change"] * 100)
+    elif metric in ("throughput", "capacity"):
+        values = "{:.1f} → {} ({:+.1%})".format(comparison["baseline"], "{:.1f}".format(comparison["candidate"]) if comparison["candidate"] is not None else "—", comparison["change"])
+    else:
+        values = "{:.1f} ms → {:.1f} ms ({:+.1%})".format(comparison["baseline"] * 1000, comparison["candidate"] * 1000, comparison["change"])
+    if comparison["interval"] is not None:
+        values += ", IC [{:+.1%}, {:+.1%}]".format(*comparison["interval"])
+    if comparison["p_value"] is not None:
+        values += ", p = {:.3g}".format(comparison["p_value"])
+    return "{} {}: {}".format("REGRESSÃO" if comparison["regression"] else "ok       ", comparison["label"], values)
+
+def run_compare(args):
+    baseline = RunArtifact.load(args.baseline)
+    report = []
+    for path in args.candidates:
+        candidate = RunArtifact.load(path)
+        comparisons = compare_runs(baseline, candidate, args.alpha, args.min_change / 100, args.max_error_increase / 100)
+        differences = plan_differences(baseline.plan, candidate.plan)
+        print("{} × {}".format(baseline.label, candidate.label))
+        if differences:
+            print("  Atenção: os planos diferem em {}".format(", ".join(differences)))
+        for comparison in comparisons:
+            print("  " + format_comparison(comparison))
+        report.append({"baseline": args.baseline, "candidate": path, "plan_differences": differences, "comparisons": comparisons})
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return 1 if any(has_regression(item["comparisons"]) for item in report) else 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.mode == "compare":
+        try:
+            return run_compare(args)
+        except (OSError, ValueError, KeyError) as error:
+            parser.error(str(error))
+    try:
+        plan = build_plan(args)
+    except (OSError, ValueError, KeyError) as error:
+        parser.error(str(error))
+    runner = TestRunner(results_dir=args.results_dir)
+    run = runner.get(runner.start(plan, args.workers, parse_agents(args.agents or "")))
+    wait(runner, run, args.quiet)
+    report = summarize_run(run)
+    print_summary(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return exit_code(report)
+
+if __name__ == "__main__":
+    sys.exit(main())
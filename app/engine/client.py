@@ -0,0 +1,378 @@
+import time
+import socket
+import asyncio
+import functools
+import contextvars
+import httpx
+import httpcore
+
+# Fases de uma requisição, em ns (monotônico, time.perf_counter_ns):
+#   dns       resolução do nome (só em conexões novas)
+#   connect   conexão TCP (só em conexões novas)
+#   tls       negociação TLS (só em conexões novas com https)
+#   write     envio dos cabeçalhos e do corpo da requisição
+#   ttfb      espera pelos cabeçalhos da resposta (tempo do servidor)
+#   transfer  leitura do corpo da resposta
+PHASES = ("dns", "connect", "tls", "write", "ttfb", "transfer")
+
+# Classes de erro das requisições sem resposta (o índice vai para a coluna
+# "error" do registro por requisição; 0 = sem erro). Os tempos limite são
+# separados pela etapa em que estouraram: conexão, leitura da resposta, envio
+# da requisição ou espera por uma conexão livre no pool do cliente (este
+# último aponta o próprio gerador, e não o servidor, como gargalo).
+ERROR_CLASSES = ("", "connect_timeout", "read_timeout", "write_timeout", "pool_timeout", "dns", "connect", "reset", "network", "protocol", "other")
+TIMEOUT_CLASSES = tuple(ERROR_CLASSES.index(name) for name in ("connect_timeout", "read_timeout", "write_timeout", "pool_timeout"))
+ERROR_LABELS = {
+    "connect_timeout": "Tempo limite de conexão",
+    "read_timeout": "Tempo limite de resposta",
+    "write_timeout": "Tempo limite de envio",
+    "pool_timeout": "Tempo limite do pool de conexões",
+    "dns": "Falha de DNS",
+    "connect": "Conexão recusada ou inalcançável",
+    "reset": "Conexão reiniciada pelo servidor",
+    "network": "Outro erro de rede",
+    "protocol": "Erro de protocolo HTTP",
+    "other": "Outro erro",
+}
+# Classes dos arquivos de resultado da versão 1, que tinham um só tempo limite
+# (contado como tempo limite de resposta, o mais comum)
+LEGACY_ERROR_CLASSES = ("", "timeout", "connect", "network", "protocol", "other")
+RENAMED_ERROR_CLASSES = {"timeout": "read_timeout"}
+
+# Critério de sucesso padrão: respostas 2xx e 3xx (os redirecionamentos não
+# são seguidos, então um 3xx é a resposta esperada do endereço testado)
+DEFAULT_SUCCESS_STATUSES = ((200, 399),)
+
+# Instantes da requisição que está abrindo uma conexão, para o resolvedor registrar a duração do DNS
+_connecting_timings = contextvars.ContextVar("connecting_timings", default=None)
+# Instante previsto (ns) da requisição em andamento, definido pelos agendadores de malha aberta
+intended_start_ns = contextvars.ContextVar("intended_start_ns", default=None)
+# Cookies da sessão do usuário virtual em andamento (ver engine.users); sem sessão, valem os do cliente
+session_cookies = contextvars.ContextVar("session_cookies", default=None)
+
+# Motores de requisição: "async" (httpx, num laço de eventos) ou "threads"
+# (requests, num pool fixo de threads; ver engine.threaded)
+ENGINES = ("async", "threads")
+
+# Opções do cliente HTTP, compartilhado por todos os grupos de um teste
+# stream_bodies: lê o corpo das respostas em blocos e o descarta, guardando apenas um ResponseRecord
+# engine: motor das requisições; com "threads", `max_connections` é o número de threads
+# success_statuses: faixas [menor, maior] dos códigos de status contados como sucesso
+def make_client_options(max_connections=100, keep_alive=True, max_keepalive_connections=20, keepalive_expiry=5.0, http2=False, timeout=5.0, connect_timeout=5.0, stream_bodies=True, engine="async",
+                        success_statuses=DEFAULT_SUCCESS_STATUSES):
+    if engine not in ENGINES:
+        raise ValueError("Motor desconhecido: {}".format(engine))
+    if not success_statuses:
+        raise ValueError("Informe ao menos um código de status de sucesso")
+    return {
+        "max_connections": max_connections,
+        "keep_alive": keep_alive,
+        "max_keepalive_connections": max_keepalive_connections,
+        "keepalive_expiry": keepalive_expiry,
+        "http2": http2,
+        "timeout": timeout,
+        "connect_timeout": connect_timeout,
+        "stream_bodies": stream_bodies,
+        "engine": engine,
+        "success_statuses": [[low, high] for low, high in success_statuses],
+    }
+
+# Faixas de status a partir do texto, ex.: "200-299, 304" -> [[200, 299], [304, 304]]
+def parse_status_ranges(text):
+    ranges = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        try:
+            low, high = int(low), int(high or low)
+        except ValueError:
+            raise ValueError("Faixa de status inválida: {}".format(part)) from None
+        if not 100 <= low <= high <= 599:
+            raise ValueError("Faixa de status inválida: {} (use códigos de 100 a 599)".format(part))
+        ranges.append([low, high])
+    if not ranges:
+        raise ValueError("Informe ao menos um código de status de sucesso")
+    return ranges
+
+def format_status_ranges(ranges):
+    return ", ".join(str(low) if low == high else "{}-{}".format(low, high) for low, high in ranges)
+
+def is_success_status(status, ranges):
+    return any(low <= status <= high for low, high in ranges)
+
+# Cliente com pool de conexões que marca, em cada requisição, se foi preciso
+# abrir uma conexão nova (`request.extensions["new_connection"]`) ou se uma
+# conexão do pool foi reutilizada
+class LoadTestClient(httpx.AsyncClient):
+    def __init__(self, options=None):
+        options = {**make_client_options(), **(options or {})}
+        limits = httpx.Limits(
+            max_connections=options["max_connections"],
+            max_keepalive_connections=options["max_keepalive_connections"] if options["keep_alive"] else 0,
+            keepalive_expiry=options["keepalive_expiry"],
+        )
+        timeout = httpx.Timeout(options["timeout"], connect=options["connect_timeout"])
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=options["http2"])
+        # O httpx não expõe o backend de rede: trocamos o `_network_backend` do pool
+        # interno do httpcore (atributo privado, testado com httpx 0.28 e httpcore
+        # 1.0; ver as versões fixadas em requirements.txt). Sem ele, a fase de DNS
+        # fica incluída na conexão TCP
+        pool = getattr(transport, "_pool", None)
+        if pool is not None and hasattr(pool, "_network_backend"):
+            pool._network_backend = TimedResolverBackend(pool._network_backend)
+        super().__init__(transport=transport, timeout=timeout, event_hooks={"request": [self._add_trace]})
+        self.opened_connections = 0
+        self.stream_bodies = options["stream_bodies"]
+        self.success_statuses = options["success_statuses"]
+        # Recebe cada resultado para os agregados por segundo (ver engine.live)
+        self.monitor = None
+        # Guarda uma linha por requisição (ver engine.records)
+        self.recorder = None
+        # Sorteia método, URL, cabeçalhos e corpo de cada requisição (ver engine.scenario)
+        self.scenario = None
+
+    # O httpx lê e atualiza `cookies` a cada requisição: dentro de um usuário
+    # virtual com sessão, são os cookies do usuário
+    @property
+    def cookies(self):
+        cookies = session_cookies.get()
+        return self._cookies if cookies is None else cookies
+
+    @cookies.setter
+    def cookies(self, cookies):
+        self._cookies = httpx.Cookies(cookies)
+
+    async def __aexit__(self, *exc_info):
+        await super().__aexit__(*exc_info)
+        if self.scenario is not None:
+            self.scenario.close()
+
+    async def _add_trace(self, request):
+        request.extensions["timings"] = {}
+        request.extensions["trace"] = functools.partial(self._trace, request)
+
+    # Guarda o instante de cada evento do httpcore ("connect_tcp.started",
+    # "receive_response_headers.complete", ...), sem o prefixo do protocolo
+    async def _trace(self, request, event_name, info):
+        timings = request.extensions["timings"]
+        timings[event_name.partition(".")[2]] = time.perf_counter_ns()
+        if event_name == "connection.connect_tcp.started":
+            _connecting_timings.set(timings)
+        elif event_name == "connection.connect_tcp.complete":
+            request.extensions["new_connection"] = True
+            self.opened_connections += 1
+
+# Backend de rede que resolve o nome antes de conectar, medindo a duração do DNS
+class TimedResolverBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        start = time.perf_counter_ns()
+        try:
+            addresses = await asyncio.wait_for(asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout)
+        except asyncio.TimeoutError as e:
+            raise httpcore.ConnectTimeout(str(e)) from e
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        timings = _connecting_timings.get()
+        if timings is not None:
+            timings["dns"] = time.perf_counter_ns() - start
+        # Tenta os endereços na ordem devolvida pelo resolvedor (IPv6/IPv4)
+        for address in addresses[:-1]:
+            try:
+                return await self.backend.connect_tcp(address[4][0], port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout):
+                continue
+        return await self.backend.connect_tcp(addresses[-1][4][0], port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self.backend.sleep(seconds)
+
+def make_client(options=None, scenario=None):
+    if (options or {}).get("engine", "async") == "threads":
+        from .threaded import ThreadedClient
+        client = ThreadedClient(options)
+    else:
+        client = LoadTestClient(options)
+    client.scenario = scenario
+    return client
+
+# Duração de cada fase (na ordem de PHASES), em ns; None para as fases que não ocorreram
+def phase_durations(timings, end_ns):
+    def span(start, end):
+        if start in timings and end in timings:
+            return timings[end] - timings[start]
+        return None
+
+    dns = timings.get("dns")
+    connect = span("connect_tcp.started", "connect_tcp.complete")
+    if connect is not None and dns is not None:
+        connect -= dns
+    tls = span("start_tls.started", "start_tls.complete")
+    write = span("send_request_headers.started", "send_request_body.complete")
+    ttfb = span("send_request_body.complete", "receive_response_headers.complete")
+    headers_end = timings.get("receive_response_headers.complete")
+    transfer = end_ns - headers_end if headers_end is not None else None
+    return (dns, connect, tls, write, ttfb, transfer)
+
+# Registro compacto de uma resposta cujo corpo foi descartado. `success` é
+# definido por `req_get_async` pelo critério de sucesso do cliente.
+class ResponseRecord:
+    __slots__ = ("status_code", "http_version", "content_type", "ttfb", "num_bytes", "new_connection", "phases", "success")
+
+    def __init__(self, status_code, http_version, content_type, ttfb, num_bytes, new_connection, phases=None):
+        self.status_code = status_code
+        self.http_version = http_version
+        self.content_type = content_type
+        self.ttfb = ttfb
+        self.num_bytes = num_bytes
+        self.new_connection = new_connection
+        self.phases = phases
+        self.success = None
+
+# Requisição sem resposta, no lugar da resposta: a classe do erro (índice em
+# ERROR_CLASSES); a duração que acompanha é o tempo até a falha
+class RequestFailure:
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+def is_new_connection(response):
+    if isinstance(response, ResponseRecord):
+        return response.new_connection
+    return response.request.extensions.get("new_connection", False)
+
+def response_bytes(response):
+    if isinstance(response, ResponseRecord):
+        return response.num_bytes
+    return len(response.content)
+
+# Resposta bem-sucedida pelo critério do cliente; sem critério marcado (ex.:
+# respostas de fora de `req_get_async`), pelo critério padrão
+def is_success(response):
+    if response is None or isinstance(response, RequestFailure):
+        return False
+    if isinstance(response, ResponseRecord):
+        success = response.success
+    else:
+        success = response.request.extensions.get("success")
+    return is_success_status(response.status_code, DEFAULT_SUCCESS_STATUSES) if success is None else success
+
+# Classe de erro de uma resposta (0 = respondida; sem resposta nem falha registrada, "other")
+def response_error(response):
+    if response is None:
+        return ERROR_CLASSES.index("other")
+    return response.error if isinstance(response, RequestFailure) else 0
+
+# A exceção e as suas causas: as encadeadas (`raise ... from`) e as guardadas
+# como atributo ou argumento (como o urllib3 faz com a causa de cada tentativa)
+def _error_chain(error):
+    seen = set()
+    pending = [error]
+    while pending:
+        error = pending.pop()
+        if id(error) in seen:
+            continue
+        seen.add(id(error))
+        yield error
+        pending.extend(cause for cause in (error.__cause__, error.__context__, getattr(error, "reason", None), *error.args)
+                       if isinstance(cause, BaseException))
+
+_TIMEOUT_EXCEPTIONS = ((httpx.ConnectTimeout, "connect_timeout"), (httpx.ReadTimeout, "read_timeout"),
+                    (httpx.WriteTimeout, "write_timeout"), (httpx.PoolTimeout, "pool_timeout"))
+
+def error_class(error):
+    if error is None:
+        return 0
+    for timeout_class, name in _TIMEOUT_EXCEPTIONS:
+        if isinstance(error, timeout_class):
+            return ERROR_CLASSES.index(name)
+    if isinstance(error, httpx.TimeoutException):
+        return ERROR_CLASSES.index("read_timeout")
+    chain = list(_error_chain(error))
+    if any(isinstance(cause, socket.gaierror) for cause in chain):
+        return ERROR_CLASSES.index("dns")
+    if isinstance(error, httpx.ConnectError):
+        return ERROR_CLASSES.index("connect")
+    if any(isinstance(cause, (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)) for cause in chain):
+        return ERROR_CLASSES.index("reset")
+    if isinstance(error, httpx.NetworkError):
+        return ERROR_CLASSES.index("network")
+    if isinstance(error, httpx.ProtocolError):
+        return ERROR_CLASSES.index("protocol")
+    return ERROR_CLASSES.index("other")
+
+def response_phases(response):
+    if isinstance(response, ResponseRecord):
+        return response.phases
+    return response.request.extensions.get("phases")
+
+# Requisição em modo streaming: registra status, cabeçalhos relevantes, tempo
+# até o primeiro byte e número de bytes, lendo e descartando o corpo em blocos
+async def _get_streaming(client, url, method="GET", headers=None, content=None):
+    start = time.perf_counter_ns()
+    async with client.stream(method, url, headers=headers, content=content) as response:
+        ttfb = (time.perf_counter_ns() - start) / 1e9
+        num_bytes = 0
+        async for chunk in response.aiter_raw():
+            num_bytes += len(chunk)
+        end = time.perf_counter_ns()
+        timings = response.request.extensions.get("timings")
+        record = ResponseRecord(response.status_code, response.http_version, response.headers.get("content-type"),
+                                ttfb, num_bytes, is_new_connection(response),
+                                phase_durations(timings, end) if timings is not None else None)
+    return record, (end - start) / 1e9
+
+async def _get_full(client, url, method="GET", headers=None, content=None):
+    start = time.perf_counter_ns()
+    response = await client.request(method, url, headers=headers, content=content)
+    end = time.perf_counter_ns()
+    timings = response.request.extensions.get("timings")
+    if timings is not None:
+        response.request.extensions["phases"] = phase_durations(timings, end)
+    return response, (end - start) / 1e9
+
+# Realizar as requisições (relógio monotônico; a duração é devolvida em segundos).
+# Com um cenário no cliente, cada requisição é sorteada dele e `url` não é usada.
+# Com o motor de threads, a requisição vai para uma thread do pool do cliente.
+# Sem resposta, devolve um RequestFailure com a classe do erro e o tempo até a falha.
+async def req_get_async(client, url):
+    method, headers, content = "GET", None, None
+    scenario = getattr(client, "scenario", None)
+    if scenario is not None:
+        method, url, headers, content = scenario.next_request()
+    start_ns = time.perf_counter_ns()
+    fetch_in_thread = getattr(client, "fetch_in_thread", None)
+    try:
+        if fetch_in_thread is not None:
+            response, duration = await fetch_in_thread(method, url, headers, content)
+        elif getattr(client, "stream_bodies", False):
+            response, duration = await _get_streaming(client, url, method, headers, content)
+        else:
+            response, duration = await _get_full(client, url, method, headers, content)
+        error = 0
+        success = is_success_status(response.status_code, getattr(client, "success_statuses", DEFAULT_SUCCESS_STATUSES))
+        if isinstance(response, ResponseRecord):
+            response.success = success
+        else:
+            response.request.extensions["success"] = success
+    except httpx.RequestError as e:
+        error = error_class(e)
+        response, duration = RequestFailure(error), (time.perf_counter_ns() - start_ns) / 1e9
+    monitor = getattr(client, "monitor", None)
+    if monitor is not None:
+        monitor.record(response, duration)
+    recorder = getattr(client, "recorder", None)
+    if recorder is not None:
+        recorder.record(intended_start_ns.get(), start_ns, round(duration * 1e9),
+                        0 if error else response.status_code,
+                        0 if error else response_bytes(response),
+                        error)
+    return response, duration
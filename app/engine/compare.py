@@ -0,0 +1,152 @@
+import math
+
+import numpy as np
+
+from .histogram import bucket_upper_value
+from .capacity import CapacitySearch
+
+# Comparação de um teste com um teste de referência (ex.: o da última versão
+# publicada), para apontar regressões de desempenho. Cada métrica só é marcada
+# como regressão quando a piora é estatisticamente significativa (nível
+# `alpha`) e também maior que `min_change` (relativa), para que diferenças
+# mínimas em testes com milhões de requisições não reprovem o teste.
+#   latency      Mann-Whitney unilateral sobre os histogramas inteiros: o
+#                candidato é mais lento que a referência? A piora exigida é a
+#                do tempo médio
+#   p50/p90/p99  intervalo de confiança bootstrap da variação relativa do
+#                percentil, reamostrando os histogramas
+#   throughput   Mann-Whitney unilateral sobre as requisições por segundo
+#                (sem o primeiro e o último segundo, incompletos)
+#   error_rate   teste z de duas proporções; a piora exigida é absoluta
+#                (`max_error_increase`)
+#   capacity     maior taxa sustentável da busca de capacidade, sem teste
+#                estatístico (cada nível é uma única medição)
+DEFAULT_ALPHA = 0.05
+DEFAULT_MIN_CHANGE = 0.05
+DEFAULT_MAX_ERROR_INCREASE = 0.005
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_PERCENTILES = (50, 90, 99)
+# Segundos mínimos de cada teste para comparar a vazão
+MIN_SECONDS = 3
+
+METRIC_LABELS = {
+    "latency": "Distribuição do tempo de resposta",
+    "p50": "p50 do tempo de resposta",
+    "p90": "p90 do tempo de resposta",
+    "p99": "p99 do tempo de resposta",
+    "throughput": "Vazão (req/s)",
+    "error_rate": "Requisições sem sucesso",
+    "capacity": "Maior taxa sustentável (req/s)",
+}
+
+def _normal_sf(z):
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+# Mann-Whitney com amostras dadas como contagens por valor, em ordem crescente
+# de valor (os baldes de um histograma ou os valores distintos de uma série).
+# Retorna (P(candidato > referência), p-valor de "candidato maior", p-valor de
+# "candidato menor"), com a aproximação normal corrigida para empates.
+def mann_whitney_counts(baseline_counts, candidate_counts):
+    a = np.asarray(baseline_counts, dtype=np.float64)
+    b = np.asarray(candidate_counts, dtype=np.float64)
+    na, nb = a.sum(), b.sum()
+    if not na or not nb:
+        return None, 1.0, 1.0
+    # Pares em que o candidato supera a referência, com metade dos empates
+    u = float(np.dot(b, np.cumsum(a) - a / 2))
+    n = na + nb
+    ties = a + b
+    variance = na * nb / 12 * ((n + 1) - float(np.sum(ties ** 3 - ties)) / (n * (n - 1)))
+    if variance <= 0:
+        return u / (na * nb), 1.0, 1.0
+    z = (u - na * nb / 2) / math.sqrt(variance)
+    return u / (na * nb), _normal_sf(z), _normal_sf(-z)
+
+def mann_whitney(baseline, candidate):
+    values = np.unique(np.concatenate([baseline, candidate]))
+    counts = lambda sample: np.bincount(np.searchsorted(values, sample), minlength=len(values))
+    return mann_whitney_counts(counts(baseline), counts(candidate))
+
+# Percentis de `resamples` reamostras de um histograma (multinomial sobre os
+# baldes não vazios, com o mesmo total), em ns
+def _bootstrap_percentiles(histogram, percentile, resamples, rng):
+    indexes, counts = histogram.nonzero()
+    total = int(counts.sum())
+    samples = rng.multinomial(total, counts / total, size=resamples)
+    target = max(1, int(np.ceil(percentile / 100 * total)))
+    positions = np.argmax(np.cumsum(samples, axis=1) >= target, axis=1)
+    values = np.array([min(bucket_upper_value(int(index)), histogram.max) for index in indexes], dtype=np.float64)
+    return values[positions]
+
+# Variação relativa do percentil (candidato / referência - 1) e o seu intervalo de confiança 1 - alpha
+def bootstrap_percentile_change(baseline, candidate, percentile, alpha=DEFAULT_ALPHA, resamples=BOOTSTRAP_RESAMPLES, seed=None):
+    rng = np.random.default_rng(seed)
+    base = _bootstrap_percentiles(baseline, percentile, resamples, rng)
+    cand = _bootstrap_percentiles(candidate, percentile, resamples, rng)
+    changes = cand / np.maximum(base, 1) - 1
+    estimate = candidate.percentile(percentile) / max(baseline.percentile(percentile), 1) - 1
+    low, high = np.quantile(changes, [alpha / 2, 1 - alpha / 2])
+    return estimate, (float(low), float(high))
+
+def _comparison(metric, baseline, candidate, change, regression, p_value=None, interval=None):
+    return {"metric": metric, "label": METRIC_LABELS[metric], "baseline": baseline, "candidate": candidate,
+            "change": change, "p_value": p_value, "interval": interval, "regression": bool(regression)}
+
+# Requisições por segundo de cada ponto da série, sem o primeiro e o último (incompletos)
+def _throughput_series(run):
+    return np.array([second["requests"] / second["span"] for second in run.seconds[1:-1]], dtype=np.float64)
+
+# Compara `candidate` com `baseline` (TestRun ou RunArtifact: ambos têm
+# `results`, `seconds` e `plan`) e retorna uma comparação por métrica
+def compare_runs(baseline, candidate, alpha=DEFAULT_ALPHA, min_change=DEFAULT_MIN_CHANGE, max_error_increase=DEFAULT_MAX_ERROR_INCREASE, seed=None):
+    comparisons = []
+    base_analysis, cand_analysis = baseline.results.analysis(), candidate.results.analysis()
+    base_histogram, cand_histogram = base_analysis.histogram, cand_analysis.histogram
+    if base_histogram.total_count and cand_histogram.total_count:
+        probability, p_slower, _ = mann_whitney_counts(base_histogram.dense(), cand_histogram.dense())
+        base_mean, cand_mean = base_histogram.mean() / 1e9, cand_histogram.mean() / 1e9
+        change = cand_mean / base_mean - 1 if base_mean else 0.0
+        comparison = _comparison("latency", base_mean, cand_mean, change, p_slower < alpha and change > min_change, p_slower)
+        comparison["probability"] = probability
+        comparisons.append(comparison)
+        for percentile in BOOTSTRAP_PERCENTILES:
+            change, interval = bootstrap_percentile_change(base_histogram, cand_histogram, percentile, alpha, seed=seed)
+            comparisons.append(_comparison("p{}".format(percentile), base_histogram.percentile(percentile) / 1e9, cand_histogram.percentile(percentile) / 1e9,
+                                           change, interval[0] > 0 and change > min_change, interval=interval))
+
+    base_series, cand_series = _throughput_series(baseline), _throughput_series(candidate)
+    if len(base_series) >= MIN_SECONDS and len(cand_series) >= MIN_SECONDS:
+        _, _, p_lower = mann_whitney(base_series, cand_series)
+        base_mean, cand_mean = float(base_series.mean()), float(cand_series.mean())
+        change = cand_mean / base_mean - 1 if base_mean else 0.0
+        comparisons.append(_comparison("throughput", base_mean, cand_mean, change, p_lower < alpha and change < -min_change, p_lower))
+
+    base_total, cand_total = base_analysis.total_requests, cand_analysis.total_requests
+    if base_total and cand_total:
+        base_errors = base_total - base_analysis.total_successes
+        cand_errors = cand_total - cand_analysis.total_successes
+        base_rate, cand_rate = base_errors / base_total, cand_errors / cand_total
+        pooled = (base_errors + cand_errors) / (base_total + cand_total)
+        deviation = math.sqrt(pooled * (1 - pooled) * (1 / base_total + 1 / cand_total))
+        p_value = _normal_sf((cand_rate - base_rate) / deviation) if deviation else (0.0 if cand_rate > base_rate else 1.0)
+        comparisons.append(_comparison("error_rate", base_rate, cand_rate, cand_rate - base_rate,
+                                       p_value < alpha and cand_rate - base_rate > max_error_increase, p_value))
+
+    if baseline.plan.get("capacity") and candidate.plan.get("capacity"):
+        base_rate = CapacitySearch.from_plan(baseline.plan).replay(baseline.results.groups).max_sustainable_rate
+        cand_rate = CapacitySearch.from_plan(candidate.plan).replay(candidate.results.groups).max_sustainable_rate
+        if base_rate:
+            change = (cand_rate or 0) / base_rate - 1
+            comparisons.append(_comparison("capacity", base_rate, cand_rate, change, change < -min_change))
+    return comparisons
+
+def has_regression(comparisons):
+    return any(comparison["regression"] for comparison in comparisons)
+
+# Parâmetros do plano que diferem entre os dois testes (exceto os que não
+# mudam a carga), para avisar quando a comparação não é entre testes iguais
+IGNORED_PLAN_KEYS = ("records", "live")
+
+def plan_differences(baseline_plan, candidate_plan):
+    keys = sorted(set(baseline_plan) | set(candidate_plan))
+    return [key for key in keys if key not in IGNORED_PLAN_KEYS and baseline_plan.get(key) != candidate_plan.get(key)]
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import asyncio
+
+from .agent import DEFAULT_PORT, TOKEN_ENV, agent_auth, read_frame, write_frame, decode_group, decode_second
+from .groups import GroupResult, merge_window_lists
+from .scheduler import STOP_POLL_INTERVAL, stop_requested
+
+# Antecedência (s) do instante de início combinado com os agentes
+START_DELAY = 2.0
+
+# Converte "host1:porta, host2" em [(host1, porta), (host2, porta padrão)]
+def parse_agents(text):
+    agents = []
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":") if ":" in item else (item, "", "")
+        agents.append((host, int(port) if port else DEFAULT_PORT))
+    return agents
+
+async def _read_agent(agent_id, reader, messages):
+    try:
+        while True:
+            frame = await read_frame(reader)
+            if frame[:1] == b"G":
+                index, group = decode_group(frame)
+                await messages.put((agent_id, "group", index, group))
+            elif frame[:1] == b"S":
+                second, group = decode_second(frame)
+                await messages.put((agent_id, "second", second, group))
+            elif frame[:1] == b"D":
+                await messages.put((agent_id, "done", None, None))
+                return
+            else:
+                await messages.put((agent_id, "error", None, frame[1:].decode(errors="replace")))
+                return
+    except (asyncio.IncompleteReadError, ConnectionError) as e:
+        await messages.put((agent_id, "error", None, "conexão encerrada ({})".format(e)))
+
+# Envia o plano a todos os agentes, com um instante de início comum, e soma os
+# grupos de mesmo índice à medida que chegam. `on_group` recebe os grupos em
+# ordem; se retornar False, as conexões são encerradas e os agentes param.
+# Quando `stop` (threading.Event) é acionado, os agentes são avisados (fim da
+# escrita na conexão), param de disparar e enviam o que já mediram. Com
+# `on_second`, os agentes também enviam agregados por segundo. Com `windowed`
+# (malha aberta contínua e usuários virtuais), os grupos são as janelas do
+# teste, que cada agente envia no fim e já juntadas em grupos maiores quando
+# antigas; são então juntados por janela (ver `merge_window_lists`) e entregues
+# depois que todos os agentes terminam. `token` é o segredo compartilhado com
+# os agentes (por padrão, a variável de ambiente LOAD_TEST_AGENT_TOKEN).
+async def run_distributed(agents, plan, on_group, start_delay=START_DELAY, on_second=None, stop=None, windowed=False, token=None):
+    token = token or os.environ.get(TOKEN_ENV)
+    if not token:
+        raise RuntimeError("Defina a variável {} com o token dos agentes".format(TOKEN_ENV))
+    plan = {**plan, "live": on_second is not None}
+    connections = await asyncio.gather(*(asyncio.open_connection(host, port) for host, port in agents))
+    start_at = time.time() + start_delay
+    messages = asyncio.Queue()
+
+    for agent_id, (reader, writer) in enumerate(connections):
+        challenge = await read_frame(reader)
+        if challenge[:1] != b"N":
+            host, port = agents[agent_id]
+            raise RuntimeError("Erro no agente {}:{}: {}".format(host, port, challenge[1:].decode(errors="replace")))
+        request = {"plan": plan, "agent_id": agent_id, "num_agents": len(agents), "start_at": start_at, "auth": agent_auth(token, challenge[1:])}
+        await write_frame(writer, json.dumps(request).encode())
+
+    readers = [asyncio.create_task(_read_agent(agent_id, reader, messages)) for agent_id, (reader, _) in enumerate(connections)]
+
+    lists = [[] for _ in agents]
+    pending = {}
+    reporters = {}
+    reported = [-1] * len(agents)
+    done = [False] * len(agents)
+    next_index = 0
+    stopping = False
+    try:
+        while not all(done) or next_index in pending:
+            if not stopping and stop_requested(stop):
+                stopping = True
+                for _, writer in connections:
+                    writer.write_eof()
+            # Um grupo está completo quando todos os agentes já o enviaram ou terminaram antes dele
+            if next_index in pending and all(reported[a] >= next_index or done[a] for a in range(len(agents))):
+                group = pending.pop(next_index)
+                num_reporters = reporters.pop(next_index)
+                next_index += 1
+                # Depois da parada, um grupo que só parte dos agentes chegou a executar é descartado
+                if stopping and num_reporters < len(agents):
+                    continue
+                if on_group(group) is False:
+                    return
+                continue
+
+            try:
+                agent_id, kind, index, payload = await asyncio.wait_for(messages.get(), STOP_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                continue
+            if kind == "second":
+                if on_second is not None:
+                    on_second(index, payload)
+                continue
+            if kind == "error":
+                host, port = agents[agent_id]
+                raise RuntimeError("Erro no agente {}:{}: {}".format(host, port, payload))
+            if kind == "done":
+                done[agent_id] = True
+                continue
+            if windowed:
+                lists[agent_id].append(payload)
+                continue
+            reported[agent_id] = index
+            reporters[index] = reporters.get(index, 0) + 1
+            pending.setdefault(index, GroupResult()).merge(payload)
+        if windowed:
+            for group in merge_window_lists(lists):
+                on_group(group)
+    finally:
+        for task in readers:
+            task.cancel()
+        for _, writer in connections:
+            writer.close()
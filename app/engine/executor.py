@@ -0,0 +1,139 @@
+import time
+import asyncio
+import contextlib
+
+from .client import req_get_async, intended_start_ns
+from .scheduler import sleep_until, stop_requested, open_loop_schedule
+
+# Executor com número fixo de corrotinas trabalhadoras e fila limitada.
+# `submit` bloqueia quando a fila está cheia (contrapressão), então nunca há
+# mais que `max_in_flight` requisições em andamento nem mais que `queue_size`
+# aguardando, por maior que seja o grupo. Cada resultado é entregue a um
+# callback assim que chega e descartado em seguida, mantendo a memória constante.
+class BoundedExecutor:
+    def __init__(self, client, max_in_flight, queue_size=None):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.queue = asyncio.Queue(maxsize=queue_size or max_in_flight)
+        self.workers = []
+
+    async def __aenter__(self):
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+    # `on_result(resposta, duração, espera na fila em ns, instante previsto em ns, latência desde o instante previsto em ns)`;
+    # os dois últimos são None quando a requisição não tem instante previsto (rajada)
+    async def submit(self, url, on_result, intended_ns=None):
+        await self.queue.put((url, on_result, time.perf_counter_ns(), intended_ns))
+
+    async def _worker(self):
+        while True:
+            url, on_result, enqueued_ns, intended_ns = await self.queue.get()
+            queue_delay_ns = time.perf_counter_ns() - enqueued_ns
+            intended_start_ns.set(intended_ns)
+            try:
+                response, duration = await req_get_async(self.client, url)
+            except Exception:
+                # Erros inesperados (URL inválida, etc.) contam como falha para o grupo não ficar pendente
+                response, duration = None, None
+            corrected_ns = time.perf_counter_ns() - intended_ns if intended_ns is not None else None
+            try:
+                on_result(response, duration, queue_delay_ns, intended_ns, corrected_ns)
+            finally:
+                self.queue.task_done()
+
+# Limite padrão de requisições em andamento por processo: sem ele, uma rajada
+# ou uma malha aberta acima da capacidade do servidor acumula uma tarefa por
+# requisição pendente e a memória do gerador cresce a cada nível do teste.
+# 0 ou None desativa o limite.
+DEFAULT_MAX_IN_FLIGHT = 1000
+
+# Abre um BoundedExecutor, ou não abre nada (None) quando não há limite de requisições em andamento
+@contextlib.asynccontextmanager
+async def bounded_executor(client, max_in_flight):
+    if not max_in_flight:
+        yield None
+        return
+    async with BoundedExecutor(client, max_in_flight) as executor:
+        yield executor
+
+# Contador de requisições pendentes de um grupo, que libera a espera quando todas terminam
+class PendingCounter:
+    def __init__(self, total):
+        self.remaining = total
+        self.done = asyncio.Event()
+        if total <= 0:
+            self.done.set()
+
+    def finish_one(self):
+        self.finish(1)
+
+    # Desconta requisições que não serão enviadas (teste interrompido)
+    def finish(self, count):
+        self.remaining -= count
+        if self.remaining <= 0:
+            self.done.set()
+
+    async def wait(self):
+        await self.done.wait()
+
+# Grupo em rajada pelo executor: o tempo de serviço vai para o histograma de
+# latência e a espera na fila para o histograma de fila do grupo. Com `stop`,
+# as requisições que ainda não entraram na fila deixam de ser enviadas.
+async def run_bounded_burst_group(executor, url, num_requests, group, stop=None):
+    pending = PendingCounter(num_requests)
+
+    def on_result(response, duration, queue_delay_ns, *_):
+        group.add_result(response, duration, queue_delay_ns)
+        pending.finish_one()
+
+    submitted = 0
+    for _ in range(num_requests):
+        if stop_requested(stop):
+            break
+        await executor.submit(url, on_result)
+        submitted += 1
+    pending.finish(num_requests - submitted)
+    await pending.wait()
+    return group
+
+# Malha aberta pelo executor: o agendador entrega cada requisição no instante
+# previsto. Se a fila estiver cheia, o agendador atrasa (e o atraso aparece na
+# latência, medida a partir do instante previsto), mas a memória não cresce.
+# Retorna (taxa atingida, maior atraso de disparo em s). Com `profile`
+# (LoadProfile), os instantes vêm do perfil de carga.
+async def run_bounded_open_loop(executor, url, rate, duration, start_ns, on_result, stop=None, profile=None):
+    if profile is not None:
+        rate, duration = profile.mean_rate, profile.duration
+    interval_ns = 1e9 / rate
+    total, offset_ns = open_loop_schedule(rate, duration, profile)
+    pending = PendingCounter(total)
+    last_dispatch_ns = start_ns
+    max_lag_ns = 0
+    dispatched = 0
+
+    def on_done(*result):
+        on_result(*result)
+        pending.finish_one()
+
+    for i in range(total):
+        if stop_requested(stop):
+            break
+        intended_ns = start_ns + offset_ns(i)
+        await sleep_until(intended_ns)
+        await executor.submit(url, on_done, intended_ns)
+        last_dispatch_ns = time.perf_counter_ns()
+        max_lag_ns = max(max_lag_ns, last_dispatch_ns - intended_ns)
+        dispatched += 1
+
+    pending.finish(total - dispatched)
+    await pending.wait()
+    if not dispatched:
+        return 0.0, 0.0
+    achieved_rate = dispatched / ((last_dispatch_ns - start_ns + interval_ns) / 1e9)
+    return achieved_rate, max_lag_ns / 1e9
@@ -0,0 +1,117 @@
+import os
+import re
+import csv
+import json
+import mmap
+import random
+
+# Massa de dados: arquivo CSV (com cabeçalho) ou JSONL cujas colunas viram
+# variáveis ${coluna} nos modelos do cenário (ver engine.scenario). O arquivo é
+# mapeado em memória e lido linha a linha, sem índice de linhas, então a
+# memória do gerador não depende do tamanho do arquivo.
+# Modos de leitura:
+#   sequential  linhas em ordem, recomeçando do início ao chegar ao fim; com
+#               vários processos geradores (ou agentes), cada um lê as linhas
+#               part, part + parts, ... (como os usuários virtuais), então
+#               juntos usam cada linha uma vez por volta no arquivo
+#   random      linha sorteada a cada requisição (a chance de cada linha é
+#               proporcional ao seu tamanho em bytes)
+#   unique      cada processo gerador (ou agente) lê só a sua faixa do
+#               arquivo, em ordem, então uma linha não é usada por dois
+#               processos; ao fim da faixa, a leitura recomeça do início dela
+FEED_MODES = ("sequential", "random", "unique")
+FEED_FORMATS = ("csv", "jsonl")
+
+_NON_BLANK = re.compile(rb"\S")
+
+def make_feed(path, mode="sequential", format=None):
+    if mode not in FEED_MODES:
+        raise ValueError("Modo de leitura desconhecido: {}".format(mode))
+    if format is None:
+        format = "jsonl" if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson") else "csv"
+    if format not in FEED_FORMATS:
+        raise ValueError("Formato desconhecido: {}".format(format))
+    return {"path": path, "mode": mode, "format": format}
+
+class FeedReader:
+    def __init__(self, path, mode="sequential", format="csv", part=0, parts=1):
+        self.mode = mode
+        self.format = format
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError("O arquivo de dados está vazio: {}".format(path))
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.data)
+        start = 0
+        self.columns = None
+        if format == "csv":
+            header, start = self._line_at(0, size)
+            self.columns = next(csv.reader([header.decode()]))
+        if mode == "unique":
+            self.start = self._align(start + (size - start) * part // parts, start)
+            self.end = self._align(start + (size - start) * (part + 1) // parts, start)
+        else:
+            self.start, self.end = start, size
+        if not _NON_BLANK.search(self.data, self.start, self.end):
+            raise ValueError("Nenhuma linha de dados para este processo em {}".format(path))
+        # Linhas puladas depois de cada leitura e início de cada volta no modo
+        # sequencial; num arquivo com menos linhas que processos, todos leem o arquivo inteiro
+        self.skip, self.first = 0, self.start
+        if mode == "sequential" and parts > 1:
+            first = self._skip_lines(self.start, part)
+            if _NON_BLANK.search(self.data, first, self.end):
+                self.skip, self.first = parts - 1, first
+        self.position = self.first
+        if self.columns is None:
+            self.columns = list(self.next_row())
+            self.position = self.first
+
+    def _line_at(self, offset, end):
+        line_end = self.data.find(b"\n", offset, end)
+        if line_end == -1:
+            return self.data[offset:end], end
+        return self.data[offset:line_end], line_end + 1
+
+    # Primeiro início de linha a partir de `offset`
+    def _align(self, offset, start):
+        if offset <= start:
+            return start
+        line_end = self.data.find(b"\n", offset - 1)
+        return len(self.data) if line_end == -1 else line_end + 1
+
+    # Início da linha `count` linhas depois da que começa em `offset`
+    def _skip_lines(self, offset, count):
+        for _ in range(count):
+            line_end = self.data.find(b"\n", offset, self.end)
+            if line_end == -1:
+                return self.end
+            offset = line_end + 1
+        return offset
+
+    def _next_line(self):
+        if self.mode == "random":
+            offset = random.randrange(self.start, self.end)
+            line_start = max(self.start, self.data.rfind(b"\n", self.start, offset) + 1)
+            return self._line_at(line_start, self.end)[0]
+        if self.position >= self.end:
+            self.position = self.first
+        line, self.position = self._line_at(self.position, self.end)
+        if self.skip:
+            self.position = self._skip_lines(self.position, self.skip)
+        return line
+
+    # Próxima linha como {coluna: texto}; linhas em branco são ignoradas
+    def next_row(self):
+        line = self._next_line().strip()
+        while not line:
+            line = self._next_line().strip()
+        if self.format == "csv":
+            return dict(zip(self.columns, next(csv.reader([line.decode()]))))
+        return {key: value if isinstance(value, str) else json.dumps(value) for key, value in json.loads(line).items()}
+
+    def close(self):
+        self.data.close()
+
+# Leitor da massa de dados do plano para o processo `part` de `parts`
+def open_feed(feed, part=0, parts=1):
+    return FeedReader(feed["path"], feed["mode"], feed["format"], part, parts)
@@ -0,0 +1,414 @@
+import math
+import time
+import struct
+import asyncio
+import collections
+
+from .client import ERROR_CLASSES, TIMEOUT_CLASSES, RENAMED_ERROR_CLASSES, PHASES, req_get_async, is_new_connection, is_success, response_error, response_phases
+from .histogram import LatencyHistogram
+from .scheduler import run_open_loop
+from .executor import run_bounded_burst_group, run_bounded_open_loop
+
+# Cabeçalho binário: total, sucessos, conexões novas e reutilizadas, bytes recebidos,
+# taxa pretendida e atingida (NaN = não se aplica)
+HEADER = struct.Struct("<qqqqqdd")
+# Respostas 5xx e requisições por classe de erro (ver `ERROR_CLASSES`; índice 0 = sem erro)
+ERROR_COUNTS = struct.Struct("<" + "q" * (1 + len(ERROR_CLASSES)))
+# Média de usuários virtuais ativos (NaN = não se aplica)
+USERS = struct.Struct("<d")
+# Depois dos histogramas fixos: número de códigos de status, cada um com
+# (código, respostas) e o histograma de latências; número de classes de erro,
+# cada uma com o índice e o histograma do tempo até a falha
+SECTION_SIZE = struct.Struct("<I")
+STATUS_ENTRY = struct.Struct("<hq")
+ERROR_ENTRY = struct.Struct("<h")
+# Por último, o número de janelas que o grupo cobre (ausente nos dados antigos = 1)
+WINDOWS = struct.Struct("<I")
+
+# Resoluções das janelas guardadas num teste contínuo, da mais fina à mais
+# grossa: (janelas por grupo, grupos guardados). As janelas mais recentes ficam
+# separadas e as mais antigas são juntadas em grupos de 10, 100... janelas,
+# então a memória cresce com o logaritmo da duração do teste. Além da última
+# resolução, novas são criadas com 10 vezes mais janelas por grupo.
+DEFAULT_WINDOW_TIERS = ((1, 300), (10, 150), (100, 150))
+
+# Contagens por classe de erro gravadas com outra lista de classes (ex.: arquivos
+# de resultado antigos), levadas para as classes atuais pelo nome
+def _map_error_counts(counts, error_classes):
+    mapped = [0] * len(ERROR_CLASSES)
+    for name, count in zip(error_classes, counts):
+        mapped[ERROR_CLASSES.index(RENAMED_ERROR_CLASSES.get(name, name))] += count
+    return mapped
+
+# Resumo compacto de um grupo de requisições: contadores e histograma de
+# latências. Pode ser enviado entre processos e somado a outros resumos do
+# mesmo grupo (vindos de outros processos ou máquinas).
+class GroupResult:
+    def __init__(self, total_requests=0, success_count=0, histogram=None, intended_rate=None, achieved_rate=None, users=None):
+        self.total_requests = total_requests
+        self.success_count = success_count
+        self.histogram = histogram if histogram is not None else LatencyHistogram()
+        # Espera na fila do executor antes do envio (vazio quando não há limite de requisições em andamento)
+        self.queue_histogram = LatencyHistogram()
+        # Tempo até o primeiro byte e bytes do corpo (só no modo streaming)
+        self.ttfb_histogram = LatencyHistogram()
+        self.bytes_received = 0
+        # Duração de cada fase da requisição (ver `PHASES`); DNS, conexão e TLS só em conexões novas
+        self.phase_histograms = {phase: LatencyHistogram() for phase in PHASES}
+        self.intended_rate = intended_rate
+        self.achieved_rate = achieved_rate
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.server_errors = 0
+        self.error_counts = [0] * len(ERROR_CLASSES)
+        # Respostas e histograma de latências por código de status, e histograma
+        # do tempo até a falha por classe de erro (criados na primeira ocorrência)
+        self.status_counts = {}
+        self.status_histograms = {}
+        self.error_histograms = {}
+        # Usuários virtuais ativos, em média, durante o grupo (modelo fechado; ver engine.users)
+        self.users = users
+        # Janelas consecutivas cobertas pelo grupo (> 1 quando janelas antigas
+        # de um teste contínuo foram juntadas; ver WindowedGroups)
+        self.windows = 1
+
+    @classmethod
+    def from_results(cls, results, **kwargs):
+        group = cls(**kwargs)
+        group.add_results(results)
+        return group
+
+    def add_results(self, results):
+        for response, duration in results:
+            self.add_result(response, duration)
+
+    # `response` é a resposta ou, sem resposta, um RequestFailure (a duração
+    # é então o tempo até a falha, que fica fora do histograma de latências)
+    def add_result(self, response, duration, queue_delay_ns=None):
+        self.total_requests += 1
+        if queue_delay_ns is not None:
+            self.queue_histogram.record(queue_delay_ns)
+        error = response_error(response)
+        self.error_counts[error] += 1
+        if error:
+            if duration is not None:
+                if error not in self.error_histograms:
+                    self.error_histograms[error] = LatencyHistogram()
+                self.error_histograms[error].record_seconds(duration)
+            return
+        if is_new_connection(response):
+            self.new_connections += 1
+        else:
+            self.reused_connections += 1
+        ttfb = getattr(response, "ttfb", None)
+        if ttfb is not None:
+            self.ttfb_histogram.record_seconds(ttfb)
+            self.bytes_received += response.num_bytes
+        phases = response_phases(response)
+        if phases is not None:
+            for phase, value in zip(PHASES, phases):
+                if value is not None:
+                    self.phase_histograms[phase].record(value)
+        status = response.status_code
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if is_success(response):
+            self.success_count += 1
+        if status >= 500:
+            self.server_errors += 1
+        if duration is not None:
+            self.histogram.record_seconds(duration)
+            if status not in self.status_histograms:
+                self.status_histograms[status] = LatencyHistogram()
+            self.status_histograms[status].record_seconds(duration)
+
+    def merge(self, other):
+        self.total_requests += other.total_requests
+        self.success_count += other.success_count
+        self.new_connections += other.new_connections
+        self.reused_connections += other.reused_connections
+        self.server_errors += other.server_errors
+        self.error_counts = [count + other_count for count, other_count in zip(self.error_counts, other.error_counts)]
+        self.histogram.merge(other.histogram)
+        self.queue_histogram.merge(other.queue_histogram)
+        self.ttfb_histogram.merge(other.ttfb_histogram)
+        self.bytes_received += other.bytes_received
+        for phase in PHASES:
+            self.phase_histograms[phase].merge(other.phase_histograms[phase])
+        for status, count in other.status_counts.items():
+            self.status_counts[status] = self.status_counts.get(status, 0) + count
+        for histograms, other_histograms in ((self.status_histograms, other.status_histograms), (self.error_histograms, other.error_histograms)):
+            for key, histogram in other_histograms.items():
+                histograms.setdefault(key, LatencyHistogram()).merge(histogram)
+        if other.intended_rate is not None:
+            self.intended_rate = (self.intended_rate or 0) + other.intended_rate
+            self.achieved_rate = (self.achieved_rate or 0) + other.achieved_rate
+        if other.users is not None:
+            self.users = (self.users or 0) + other.users
+        return self
+
+    def to_bytes(self):
+        intended_rate = math.nan if self.intended_rate is None else self.intended_rate
+        achieved_rate = math.nan if self.achieved_rate is None else self.achieved_rate
+        header = HEADER.pack(self.total_requests, self.success_count, self.new_connections, self.reused_connections,
+                             self.bytes_received, intended_rate, achieved_rate)
+        header += ERROR_COUNTS.pack(self.server_errors, *self.error_counts)
+        header += USERS.pack(math.nan if self.users is None else self.users)
+        histograms = [self.histogram, self.queue_histogram, self.ttfb_histogram] + [self.phase_histograms[phase] for phase in PHASES]
+        parts = [header] + [histogram.to_bytes() for histogram in histograms]
+        parts.append(SECTION_SIZE.pack(len(self.status_counts)))
+        for status, count in sorted(self.status_counts.items()):
+            parts.append(STATUS_ENTRY.pack(status, count))
+            parts.append(self.status_histograms.get(status, LatencyHistogram()).to_bytes())
+        parts.append(SECTION_SIZE.pack(len(self.error_histograms)))
+        for error, histogram in sorted(self.error_histograms.items()):
+            parts.append(ERROR_ENTRY.pack(error))
+            parts.append(histogram.to_bytes())
+        parts.append(WINDOWS.pack(self.windows))
+        return b"".join(parts)
+
+    # `error_classes`: a lista de classes de erro com que os dados foram
+    # gravados (LEGACY_ERROR_CLASSES nos arquivos de resultado da versão 1, que
+    # também não têm as contagens por status nem os histogramas por classe)
+    @classmethod
+    def from_bytes(cls, data, error_classes=ERROR_CLASSES):
+        total_requests, success_count, new_connections, reused_connections, bytes_received, intended_rate, achieved_rate = HEADER.unpack_from(data, 0)
+        error_counts_struct = ERROR_COUNTS if error_classes is ERROR_CLASSES else struct.Struct("<" + "q" * (1 + len(error_classes)))
+        server_errors, *error_counts = error_counts_struct.unpack_from(data, HEADER.size)
+        if error_classes is not ERROR_CLASSES:
+            error_counts = _map_error_counts(error_counts, error_classes)
+        (users,) = USERS.unpack_from(data, HEADER.size + error_counts_struct.size)
+        histogram, offset = LatencyHistogram.read_bytes(data, HEADER.size + error_counts_struct.size + USERS.size)
+        queue_histogram, offset = LatencyHistogram.read_bytes(data, offset)
+        ttfb_histogram, offset = LatencyHistogram.read_bytes(data, offset)
+        phase_histograms = {}
+        for phase in PHASES:
+            phase_histograms[phase], offset = LatencyHistogram.read_bytes(data, offset)
+        status_counts, status_histograms, error_histograms = {}, {}, {}
+        if offset < len(data):
+            (size,) = SECTION_SIZE.unpack_from(data, offset)
+            offset += SECTION_SIZE.size
+            for _ in range(size):
+                status, count = STATUS_ENTRY.unpack_from(data, offset)
+                status_counts[status] = count
+                status_histograms[status], offset = LatencyHistogram.read_bytes(data, offset + STATUS_ENTRY.size)
+            (size,) = SECTION_SIZE.unpack_from(data, offset)
+            offset += SECTION_SIZE.size
+            for _ in range(size):
+                (error,) = ERROR_ENTRY.unpack_from(data, offset)
+                error_histograms[error], offset = LatencyHistogram.read_bytes(data, offset + ERROR_ENTRY.size)
+        windows = 1
+        if offset < len(data):
+            (windows,) = WINDOWS.unpack_from(data, offset)
+        if math.isnan(intended_rate):
+            intended_rate = achieved_rate = None
+        group = cls(total_requests, success_count, histogram, intended_rate, achieved_rate, None if math.isnan(users) else users)
+        group.new_connections = new_connections
+        group.reused_connections = reused_connections
+        group.queue_histogram = queue_histogram
+        group.ttfb_histogram = ttfb_histogram
+        group.bytes_received = bytes_received
+        group.phase_histograms = phase_histograms
+        group.server_errors = server_errors
+        group.error_counts = error_counts
+        group.status_counts = status_counts
+        group.status_histograms = status_histograms
+        group.error_histograms = error_histograms
+        group.windows = windows
+        return group
+
+    # Entre processos, o grupo é enviado no formato binário compacto (só os baldes não vazios)
+    def __reduce__(self):
+        return (GroupResult.from_bytes, (self.to_bytes(),))
+
+    @property
+    def total_time(self):
+        return self.histogram.sum / 1e9
+
+    @property
+    def mean(self):
+        return self.histogram.mean() / 1e9
+
+    @property
+    def std_dev(self):
+        return self.histogram.std() / 1e9
+
+    @property
+    def mean_queue_delay(self):
+        return self.queue_histogram.mean() / 1e9
+
+    # Tempo médio de cada fase por resposta recebida (s). As fases de conexão
+    # são diluídas entre todas as respostas, então a soma das fases se aproxima
+    # da latência média e mostra o custo de abrir conexões
+    @property
+    def phase_means(self):
+        responses = self.new_connections + self.reused_connections
+        return {phase: self.phase_histograms[phase].sum / responses / 1e9 if responses else 0 for phase in PHASES}
+
+    @property
+    def success_rate(self):
+        return self.success_count / self.total_requests if self.total_requests > 0 else 0
+
+    @property
+    def server_error_rate(self):
+        return self.server_errors / self.total_requests if self.total_requests > 0 else 0
+
+    @property
+    def timeouts(self):
+        return sum(self.error_counts[index] for index in TIMEOUT_CLASSES)
+
+    @property
+    def timeout_rate(self):
+        return self.timeouts / self.total_requests if self.total_requests > 0 else 0
+
+# Junta grupos de janelas consecutivas (ou das mesmas janelas, vindos de
+# processos diferentes) num grupo que cobre `windows` janelas (por padrão, a
+# soma das janelas dos grupos): contagens e histogramas são somados, e as taxas
+# e os usuários ativos ficam como médias por janela do grupo resultante
+def merge_windows(groups, windows=None):
+    groups = list(groups)
+    windows = windows or sum(group.windows for group in groups)
+    merged = GroupResult()
+    for group in groups:
+        merged.merge(group)
+    merged.windows = windows
+    rated = [group for group in groups if group.intended_rate is not None]
+    if rated:
+        merged.intended_rate = sum(group.intended_rate * group.windows for group in rated) / windows
+        merged.achieved_rate = sum(group.achieved_rate * group.windows for group in rated) / windows
+    with_users = [group for group in groups if group.users is not None]
+    if with_users:
+        merged.users = sum(group.users * group.windows for group in with_users) / windows
+    return merged
+
+# Janelas de um teste contínuo com memória limitada (ver DEFAULT_WINDOW_TIERS).
+# `group_at(índice)` devolve o grupo que acumula a janela (criado com
+# `factory`, junto com as janelas vazias anteriores), mesmo depois de ela ter
+# sido juntada a outras; `groups` são os grupos do mais antigo ao mais recente.
+class WindowedGroups:
+    def __init__(self, factory=GroupResult, tiers=DEFAULT_WINDOW_TIERS):
+        self.factory = factory
+        self.tiers = [list(tier) for tier in tiers]
+        # Por resolução, pares [primeira janela, grupo], do mais antigo ao mais recente
+        self.levels = [collections.deque() for _ in self.tiers]
+        self.next_window = 0
+
+    def group_at(self, index):
+        while self.next_window <= index:
+            self._push(0, self.next_window, self.factory())
+            self.next_window += 1
+        for level in self.levels:
+            if level and level[0][0] <= index:
+                for first, group in reversed(level):
+                    if first <= index:
+                        return group
+        raise IndexError(index)
+
+    def _push(self, level, first, group):
+        self.levels[level].append([first, group])
+        span, capacity = self.tiers[level]
+        if len(self.levels[level]) <= capacity:
+            return
+        if level + 1 == len(self.tiers):
+            self.tiers.append([span * 10, capacity])
+            self.levels.append(collections.deque())
+        entries = self.levels[level]
+        next_span = self.tiers[level + 1][0]
+        period = entries[0][0] // next_span * next_span
+        members = []
+        while entries and entries[0][0] < period + next_span:
+            members.append(entries.popleft()[1])
+        self._push(level + 1, period, merge_windows(members))
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
+
+    @property
+    def groups(self):
+        return [group for level in reversed(self.levels) for _, group in level]
+
+# Junta as listas de grupos (janelas) de vários processos ou agentes. Cada lista
+# começa na janela 0 e pode ter juntado as janelas antigas em grupos de tamanhos
+# diferentes dos das outras (uma terminou algumas janelas depois), mas as
+# resoluções são as mesmas, então cada grupo maior contém inteiros os menores
+# que cobrem as suas janelas.
+def merge_window_lists(lists):
+    entries = []
+    for groups in lists:
+        first = 0
+        for group in groups:
+            entries.append((first, group))
+            first += group.windows
+    entries.sort(key=lambda entry: (entry[0], -entry[1].windows))
+    merged = []
+    start = end = 0
+    members = []
+    for first, group in entries:
+        if members and first >= end:
+            merged.append(merge_windows(members, end - start))
+            members = []
+        if not members:
+            start, end = first, first + group.windows
+        members.append(group)
+    if members:
+        merged.append(merge_windows(members, end - start))
+    return merged
+
+# Grupo em rajada: todas as requisições disparadas de uma vez. Com um
+# executor (BoundedExecutor; os planos usam DEFAULT_MAX_IN_FLIGHT por padrão),
+# o número de requisições em andamento é limitado e `stop` interrompe o envio
+# das que ainda aguardam a vez.
+async def run_burst_group(client, url, num_requests, executor=None, stop=None):
+    if executor is not None:
+        return await run_bounded_burst_group(executor, url, num_requests, GroupResult(), stop)
+    # Sem limite, cada resultado vai direto para o grupo, sem guardar a lista de respostas
+    group = GroupResult()
+
+    async def send():
+        group.add_result(*await req_get_async(client, url))
+
+    await asyncio.gather(*(send() for _ in range(num_requests)))
+    return group
+
+# Malha aberta sem executor (uma tarefa por requisição) ou pelo executor, com
+# os mesmos argumentos de `run_bounded_open_loop`
+def _open_loop(client, url, executor, rate, duration, start_ns, on_result, stop, profile=None):
+    if executor is None:
+        return run_open_loop(lambda: req_get_async(client, url), rate, duration, start_ns, on_result, stop, profile)
+    return run_bounded_open_loop(executor, url, rate, duration, start_ns, on_result, stop, profile)
+
+# Grupo em malha aberta: as requisições são distribuídas uniformemente ao longo
+# da janela e as latências são medidas a partir do instante previsto. Com
+# `stop`, os disparos param no meio da janela.
+async def run_open_loop_group(client, url, num_requests, window, start_ns=None, executor=None, stop=None):
+    rate = num_requests / window
+    group = GroupResult(intended_rate=rate)
+
+    def on_result(response, duration, queue_delay_ns, intended_ns, corrected_ns):
+        group.add_result(response, None if duration is None else corrected_ns / 1e9, queue_delay_ns)
+
+    group.achieved_rate, _ = await _open_loop(client, url, executor, rate, window, start_ns or time.perf_counter_ns(), on_result, stop)
+    return group
+
+# Malha aberta contínua à taxa `rate` por `duration` segundos, com os resultados
+# separados em grupos de `window` segundos pelo instante previsto. Cada
+# resultado vai direto para o grupo da sua janela, sem guardar as amostras. Com
+# `stop`, a execução pode ser interrompida antes do fim. Com `profile`
+# (LoadProfile), a taxa varia ao longo do teste segundo o perfil de carga.
+# As janelas antigas são juntadas em grupos maiores (ver WindowedGroups).
+# Retorna (grupos, taxa pretendida, taxa atingida, maior atraso de disparo em s).
+async def run_windowed_open_loop(client, url, rate, duration, window, start_ns=None, executor=None, stop=None, profile=None):
+    if profile is not None:
+        rate, duration = profile.mean_rate, profile.duration
+    start_ns = start_ns or time.perf_counter_ns()
+    recorder = getattr(client, "recorder", None)
+    if recorder is not None:
+        recorder.set_windows(start_ns, window)
+    windows = WindowedGroups()
+    window_ns = window * 1e9
+
+    def on_result(response, duration, queue_delay_ns, intended_ns, corrected_ns):
+        group = windows.group_at(int((intended_ns - start_ns) // window_ns))
+        group.add_result(response, None if duration is None else corrected_ns / 1e9, queue_delay_ns)
+
+    achieved_rate, max_dispatch_lag = await _open_loop(client, url, executor, rate, duration, start_ns, on_result, stop, profile)
+    return windows.groups, rate, achieved_rate, max_dispatch_lag
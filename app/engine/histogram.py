@@ -0,0 +1,221 @@
+import struct
+from array import array
+
+import numpy as np
+
+# Histograma de latências com baldes log-lineares (no estilo HdrHistogram).
+# Cada potência de 2 é dividida em SUB_BUCKET_HALF sub-baldes, o que garante
+# erro relativo menor que 1%, independentemente do número de amostras. Só a
+# faixa de baldes entre o menor e o maior valor registrado é alocada (algumas
+# centenas de baldes numa janela típica, no máximo BUCKET_COUNT × 8 bytes ≈ 40 KB),
+# então um histograma vazio quase não ocupa memória. Os valores são
+# registrados em nanossegundos.
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+MAX_VALUE_BITS = 45  # ~9,7 horas em ns
+BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS) * SUB_BUCKET_HALF + 2 * SUB_BUCKET_HALF
+MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+# Cabeçalho binário: total, mínimo (-1 = vazio), máximo, número de baldes não vazios
+HEADER = struct.Struct("<qqqI")
+
+def bucket_index(value):
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return shift * SUB_BUCKET_HALF + (value >> shift)
+
+# Maior valor que cai no mesmo balde (limite superior, como no HdrHistogram)
+def bucket_upper_value(index):
+    shift = max(0, index // SUB_BUCKET_HALF - 1)
+    sub = index - shift * SUB_BUCKET_HALF
+    return ((sub + 1) << shift) - 1
+
+class LatencyHistogram:
+    def __init__(self):
+        # array('q') é mais rápido que numpy para incrementos unitários; as
+        # operações vetorizadas usam uma visão numpy sobre o mesmo buffer.
+        # counts[i] é a contagem do balde offset + i
+        self.counts = array("q")
+        self.offset = 0
+        self.total_count = 0
+        self.min = None
+        self.max = 0
+        # Somas exatas (inteiros do Python) para média e desvio padrão sem perda de precisão
+        self.sum = 0
+        self.sum_sq = 0
+
+    # Contagens da faixa alocada (baldes offset a offset + len(counts) - 1)
+    @property
+    def counts_view(self):
+        return np.frombuffer(self.counts, dtype=np.int64)
+
+    # Contagens dos baldes low a high - 1, com zeros fora da faixa alocada
+    def dense(self, low=0, high=BUCKET_COUNT):
+        result = np.zeros(high - low, dtype=np.int64)
+        start, end = max(low, self.offset), min(high, self.offset + len(self.counts))
+        if start < end:
+            result[start - low:end - low] = self.counts_view[start - self.offset:end - self.offset]
+        return result
+
+    # Índices dos baldes não vazios e as suas contagens
+    def nonzero(self):
+        view = self.counts_view
+        positions = np.flatnonzero(view)
+        return positions + self.offset, view[positions]
+
+    # Amplia a faixa alocada para incluir os baldes low a high - 1
+    def _allocate(self, low, high):
+        if not self.counts:
+            self.counts = array("q", bytes(8 * (high - low)))
+            self.offset = low
+            return
+        end = self.offset + len(self.counts)
+        if high > end:
+            self.counts.extend(array("q", bytes(8 * (high - end))))
+        if low < self.offset:
+            # Folga à esquerda: valores decrescentes não recopiam a faixa a cada balde novo
+            low = max(0, min(low, self.offset - SUB_BUCKET_HALF))
+            self.counts = array("q", bytes(8 * (self.offset - low))) + self.counts
+            self.offset = low
+
+    def record(self, value_ns, count=1):
+        value_ns = int(value_ns)
+        if value_ns < 0:
+            value_ns = 0
+        elif value_ns > MAX_VALUE:
+            value_ns = MAX_VALUE
+        shift = value_ns.bit_length() - SUB_BUCKET_BITS
+        if shift < 0:
+            shift = 0
+        position = shift * SUB_BUCKET_HALF + (value_ns >> shift) - self.offset
+        if not 0 <= position < len(self.counts):
+            index = position + self.offset
+            self._allocate(index, index + 1)
+            position = index - self.offset
+        self.counts[position] += count
+        self.total_count += count
+        self.sum += value_ns * count
+        self.sum_sq += value_ns * value_ns * count
+        if self.min is None or value_ns < self.min:
+            self.min = value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def record_seconds(self, value_s):
+        self.record(round(value_s * 1e9))
+
+    def merge(self, other):
+        if other.counts:
+            self._allocate(other.offset, other.offset + len(other.counts))
+            start = other.offset - self.offset
+            view = self.counts_view[start:start + len(other.counts)]
+            view += other.counts_view
+        self.total_count += other.total_count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self):
+        return LatencyHistogram().merge(self)
+
+    def mean(self):
+        return self.sum / self.total_count if self.total_count else 0.0
+
+    # Variância populacional (ns²) calculada nas somas inteiras exatas: só a
+    # divisão final é arredondada, então não há cancelamento quando o desvio é
+    # muito menor que a média
+    def variance(self):
+        if not self.total_count:
+            return 0.0
+        return max((self.sum_sq * self.total_count - self.sum * self.sum) / (self.total_count * self.total_count), 0)
+
+    def std(self):
+        return self.variance() ** 0.5
+
+    def percentile(self, percentile):
+        if not self.total_count:
+            return 0
+        target = max(1, int(np.ceil(percentile / 100 * self.total_count)))
+        index = int(np.searchsorted(np.cumsum(self.counts_view), target))
+        return min(bucket_upper_value(index + self.offset), self.max)
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        if not self.total_count:
+            return {p: 0 for p in percentiles}
+        cumulative = np.cumsum(self.counts_view)
+        result = {}
+        for p in percentiles:
+            target = max(1, int(np.ceil(p / 100 * self.total_count)))
+            index = int(np.searchsorted(cumulative, target))
+            result[p] = min(bucket_upper_value(index + self.offset), self.max)
+        return result
+
+    # Resumo em segundos, no formato usado pelas páginas
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        data = {
+            "count": self.total_count,
+            "mean": self.mean() / 1e9,
+            "std": self.std() / 1e9,
+            "max": self.max / 1e9,
+        }
+        for p, value in self.percentiles(percentiles).items():
+            data["p{:g}".format(p)] = value / 1e9
+        return data
+
+    # Formato binário compacto: só os baldes não vazios são enviados (índice uint16 + contagem int64)
+    def to_bytes(self):
+        indexes, counts = self.nonzero()
+        header = HEADER.pack(self.total_count, -1 if self.min is None else self.min, self.max, len(indexes))
+        return b"".join([
+            header,
+            _pack_int(self.sum),
+            _pack_int(self.sum_sq),
+            indexes.astype("<u2").tobytes(),
+            counts.astype("<i8").tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        histogram, _ = cls.read_bytes(data, 0)
+        return histogram
+
+    # Lê um histograma a partir de `offset` e retorna também a posição seguinte
+    @classmethod
+    def read_bytes(cls, data, offset):
+        histogram = cls()
+        total_count, minimum, maximum, nonzero = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        histogram.sum, offset = _unpack_int(data, offset)
+        histogram.sum_sq, offset = _unpack_int(data, offset)
+        indexes = np.frombuffer(data, dtype="<u2", count=nonzero, offset=offset)
+        offset += 2 * nonzero
+        counts = np.frombuffer(data, dtype="<i8", count=nonzero, offset=offset)
+        offset += 8 * nonzero
+        if nonzero:
+            histogram._allocate(int(indexes[0]), int(indexes[-1]) + 1)
+            histogram.counts_view[indexes - histogram.offset] = counts
+        histogram.total_count = total_count
+        histogram.min = None if minimum < 0 else minimum
+        histogram.max = maximum
+        return histogram, offset
+
+# Inteiros de tamanho arbitrário (as somas de quadrados passam de 64 bits)
+def _pack_int(value):
+    raw = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+    return struct.pack("<H", len(raw)) + raw
+
+def _unpack_int(data, offset):
+    (length,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    return int.from_bytes(data[offset:offset + length], "little", signed=True), offset + length
+
+# Junta vários histogramas (de grupos ou de processos) em um novo
+def merge_histograms(histograms):
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        merged.merge(histogram)
+    return merged
@@ -0,0 +1,88 @@
+import time
+import asyncio
+import contextlib
+
+from .groups import GroupResult
+
+# Segundos que um segundo já encerrado aguarda por agregados atrasados (de
+# outros processos ou agentes) antes de ser exibido
+CLOSE_DELAY = 2
+
+# Agregados por segundo de um gerador: cada resultado entra no GroupResult do
+# segundo em que terminou e, quando o segundo vira, o agregado é entregue a
+# `publish(segundo, grupo)`. Os segundos são do relógio de parede (time.time),
+# alinhados entre processos e máquinas; as latências continuam monotônicas.
+class LiveMonitor:
+    def __init__(self, publish):
+        self.publish = publish
+        self.second = None
+        self.current = GroupResult()
+
+    def record(self, response, duration):
+        second = int(time.time())
+        if second != self.second:
+            self.flush()
+            self.second = second
+        self.current.add_result(response, duration)
+
+    def flush(self):
+        if self.current.total_requests:
+            self.publish(self.second, self.current)
+            self.current = GroupResult()
+
+    # Publica o último segundo mesmo quando nenhuma requisição termina depois dele
+    async def tick(self):
+        while True:
+            await asyncio.sleep(1 - time.time() % 1)
+            if self.second is not None and int(time.time()) != self.second:
+                self.flush()
+
+# Liga um LiveMonitor ao cliente enquanto o bloco executa; sem `publish`, não faz nada
+@contextlib.asynccontextmanager
+async def live_monitor(client, publish):
+    if publish is None:
+        yield None
+        return
+    monitor = LiveMonitor(publish)
+    client.monitor = monitor
+    ticker = asyncio.create_task(monitor.tick())
+    try:
+        yield monitor
+    finally:
+        ticker.cancel()
+        client.monitor = None
+        monitor.flush()
+
+# Série por segundo do lado de quem exibe: soma os agregados do mesmo segundo
+# vindos de vários geradores e libera, em ordem, os segundos já encerrados
+class LiveSeries:
+    def __init__(self):
+        self.pending = {}
+        self.last_closed = None
+
+    def add(self, second, group):
+        if self.last_closed is not None and second <= self.last_closed:
+            # Chegou depois de o segundo ser exibido; fica só nos resultados por grupo
+            return
+        self.pending.setdefault(second, GroupResult()).merge(group)
+
+    # Retorna [(segundo, grupo)] dos segundos encerrados; com `final`, de todos
+    def pop_closed(self, now=None, final=False):
+        limit = None if final else int(now if now is not None else time.time()) - CLOSE_DELAY
+        seconds = sorted(second for second in self.pending if limit is None or second <= limit)
+        if seconds:
+            self.last_closed = seconds[-1]
+        return [(second, self.pending.pop(second)) for second in seconds]
+
+# Resumo compacto de um segundo, guardado na série exibida durante o teste
+def summarize_second(second, group):
+    summary = group.histogram.summary()
+    return {
+        "second": second,
+        "requests": group.total_requests,
+        "successes": group.success_count,
+        "server_errors": group.server_errors,
+        "timeouts": group.timeouts,
+        "mean": summary["mean"],
+        "p99": summary["p99"],
+    }
@@ -0,0 +1,175 @@
+import os
+import re
+import socket
+import random
+import asyncio
+import argparse
+import contextlib
+import multiprocessing as mp
+
+from .users import THINK_DISTRIBUTIONS, make_think_time, think_time_sampler
+
+DEFAULT_PORT = 8088
+
+# Servidor HTTP/1.1 local que faz o papel do sistema testado, para medir o
+# próprio gerador e testar a ferramenta sem depender de URLs externas.
+# Comportamento, guardado num dicionário (ver `make_mock_config`):
+#   latency          distribuição do tempo de resposta, com as mesmas
+#                    distribuições do tempo de pensar (ver engine.users)
+#   error_rate       fração das respostas com `error_status`, sorteadas
+#   payload_size     bytes do corpo de cada resposta
+#   max_concurrency  requisições atendidas ao mesmo tempo (0 = sem limite); as
+#                    demais esperam numa fila, como nos trabalhadores de um
+#                    servidor real, ou, com `reject_over_capacity`, recebem 503
+# Caminhos especiais, que ignoram a latência e os erros configurados:
+#   /status/<código>   responde com o código pedido
+#   /delay/<segundos>  responde 200 depois do tempo pedido
+# Só HTTP/1.1 sem TLS, com keep-alive e corpos de requisição com Content-Length.
+def make_mock_config(latency=None, error_rate=0.0, error_status=500, payload_size=2, max_concurrency=0, reject_over_capacity=False):
+    if not 0 <= error_rate <= 1:
+        raise ValueError("A taxa de erros deve estar entre 0 e 1")
+    return {"latency": latency or make_think_time(mean=0.0), "error_rate": error_rate, "error_status": error_status,
+            "payload_size": payload_size, "max_concurrency": max_concurrency, "reject_over_capacity": reject_over_capacity}
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+_STATUS_PATH = re.compile(r"^/status/(\d{3})$")
+_DELAY_PATH = re.compile(r"^/delay/(\d+(?:\.\d+)?)$")
+
+class MockServer:
+    def __init__(self, config):
+        self.config = config
+        self.latency = think_time_sampler(config["latency"])
+        self.payload = b"x" * config["payload_size"]
+        self.slots = asyncio.Semaphore(config["max_concurrency"]) if config["max_concurrency"] else None
+
+    def _response(self, status, body=b"", keep_alive=True):
+        head = "HTTP/1.1 {} {}\r\nContent-Length: {}\r\nContent-Type: text/plain\r\n{}\r\n".format(
+            status, REASONS.get(status, "Unknown"), len(body), "" if keep_alive else "Connection: close\r\n")
+        return head.encode("latin-1") + body
+
+    async def _process(self, path):
+        match = _STATUS_PATH.match(path)
+        if match:
+            return int(match.group(1)), b""
+        match = _DELAY_PATH.match(path)
+        if match:
+            await asyncio.sleep(float(match.group(1)))
+            return 200, self.payload
+        delay = self.latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.config["error_rate"] and random.random() < self.config["error_rate"]:
+            return self.config["error_status"], b""
+        return 200, self.payload
+
+    async def respond(self, path):
+        if self.slots is None:
+            return await self._process(path)
+        if self.config["reject_over_capacity"] and self.slots.locked():
+            return 503, b""
+        async with self.slots:
+            return await self._process(path)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, body = await self.respond(target.split("?", 1)[0])
+                writer.write(self._response(status, b"" if method == "HEAD" else body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, sock):
+        server = await asyncio.start_server(self.handle, sock=sock, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+def _bind(host, port, reuse_port=False):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+def _serve_main(config, host, port, ready=None):
+    sock = _bind(host, port, reuse_port=hasattr(socket, "SO_REUSEPORT"))
+    if ready is not None:
+        ready.put(sock.getsockname()[1])
+    asyncio.run(MockServer(config).serve(sock))
+
+# Executa o servidor em `processes` processos (com SO_REUSEPORT, o sistema
+# divide as conexões entre eles) e retorna (processos, porta). Com a porta 0,
+# o sistema escolhe uma porta livre, usada também pelos demais processos.
+def start_mock_server(config, host="127.0.0.1", port=0, processes=1):
+    ctx = mp.get_context("spawn")
+    if processes > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        raise ValueError("Mais de um processo exige SO_REUSEPORT, indisponível neste sistema")
+    ready = ctx.Queue()
+    workers = [ctx.Process(target=_serve_main, args=(config, host, port, ready), daemon=True)]
+    workers[0].start()
+    port = ready.get(timeout=30)
+    for _ in range(processes - 1):
+        workers.append(ctx.Process(target=_serve_main, args=(config, host, port), daemon=True))
+        workers[-1].start()
+    return workers, port
+
+# Servidor simulado enquanto o bloco executa; entrega a URL base
+@contextlib.contextmanager
+def mock_server(config=None, host="127.0.0.1", port=0, processes=1):
+    workers, port = start_mock_server(config or make_mock_config(), host, port, processes)
+    try:
+        yield "http://{}:{}/".format(host, port)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP simulado, com latência, erros, tamanho de resposta e concorrência configuráveis, para testar a ferramenta e medir o próprio gerador.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", default="constant:0", metavar="DIST:MÉDIA[:VARIAÇÃO]",
+                        help="tempo de resposta em segundos, com distribuição em {} (padrão: %(default)s)".format(", ".join(THINK_DISTRIBUTIONS)))
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração das respostas com erro")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--payload", type=int, default=2, help="bytes do corpo de cada resposta")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="requisições atendidas ao mesmo tempo (0 = sem limite)")
+    parser.add_argument("--reject-over-capacity", action="store_true", help="responde 503 acima do limite em vez de enfileirar")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+    distribution, mean, *spread = args.latency.split(":")
+    config = make_mock_config(make_think_time(distribution, float(mean), float(spread[0]) if spread else 0.0), args.error_rate, args.error_status,
+                              args.payload, args.max_concurrency, args.reject_over_capacity)
+    print(f"Servidor simulado em http://{args.host}:{args.port}/ ({args.processes} processo(s), PID {os.getpid()})")
+    if args.processes == 1:
+        _serve_main(config, args.host, args.port)
+        return
+    workers, _ = start_mock_server(config, args.host, args.port, args.processes)
+    for worker in workers:
+        worker.join()
+
+if __name__ == "__main__":
+    main()
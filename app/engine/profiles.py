@@ -0,0 +1,131 @@
+import math
+import bisect
+
+# Perfil de carga: a taxa (req/s) varia ao longo do teste em estágios. Cada
+# estágio vai linearmente da taxa em que o anterior terminou (ou de
+# `start_rate`) até `target` em `duration` segundos; um estágio de duração 0
+# muda a taxa de uma vez (degrau). Definição, guardada no plano:
+#   {"start_rate": 0, "stages": [{"duration": 60, "target": 100}, ...]}
+# Os instantes de cada requisição vêm da integral da taxa: a requisição i sai
+# no instante t em que N(t) = i, onde N(t) é o número de requisições previstas
+# até t. Em cada estágio N(t) é quadrática, então t tem fórmula fechada e o
+# perfil pode durar horas sem que os instantes sejam guardados.
+
+def make_stage(duration, target):
+    if duration < 0 or target < 0:
+        raise ValueError("A duração e a taxa de cada estágio não podem ser negativas")
+    return {"duration": duration, "target": target}
+
+def make_profile(start_rate, stages):
+    if not any(stage["duration"] > 0 for stage in stages):
+        raise ValueError("O perfil deve ter ao menos um estágio com duração")
+    return {"start_rate": start_rate, "stages": list(stages)}
+
+# Formatos prontos
+def ramp_profile(start_rate, target, ramp_duration, hold_duration=0, ramp_down_duration=0):
+    stages = [make_stage(ramp_duration, target)]
+    if hold_duration:
+        stages.append(make_stage(hold_duration, target))
+    if ramp_down_duration:
+        stages.append(make_stage(ramp_down_duration, 0))
+    return make_profile(start_rate, stages)
+
+def spike_profile(base_rate, peak_rate, before, spike_duration, after):
+    return make_profile(base_rate, [make_stage(before, base_rate), make_stage(0, peak_rate), make_stage(spike_duration, peak_rate),
+                                    make_stage(0, base_rate), make_stage(after, base_rate)])
+
+def soak_profile(rate, duration, ramp_duration=0):
+    stages = [make_stage(ramp_duration, rate)] if ramp_duration else []
+    return make_profile(0 if ramp_duration else rate, stages + [make_stage(duration, rate)])
+
+def profile_duration(profile):
+    return sum(stage["duration"] for stage in profile["stages"])
+
+# Valor do perfil (taxa ou, nos usuários virtuais, número de usuários) no instante t (s)
+def profile_value_at(profile, t):
+    value = profile["start_rate"]
+    elapsed = 0
+    for stage in profile["stages"]:
+        if t < elapsed + stage["duration"]:
+            return value + (stage["target"] - value) * (t - elapsed) / stage["duration"]
+        elapsed += stage["duration"]
+        value = stage["target"]
+    return value
+
+# Pontos (segundo, taxa) nas fronteiras dos estágios, para o gráfico do perfil
+def profile_points(profile):
+    points = [(0, profile["start_rate"])]
+    elapsed = 0
+    for stage in profile["stages"]:
+        elapsed += stage["duration"]
+        points.append((elapsed, stage["target"]))
+    return points
+
+# Instantes previstos de um perfil. Com `part` de `parts`, só as requisições
+# part, part + parts, part + 2 × parts, ... (a fatia de um processo gerador ou
+# agente), de modo que a união das fatias é o perfil inteiro.
+class LoadProfile:
+    def __init__(self, profile, part=0, parts=1):
+        self.profile = profile
+        self.part = part
+        self.parts = parts
+        # Estágios com duração: (início em s, duração, taxa inicial, taxa final)
+        self.segments = []
+        # Requisições previstas até o fim de cada estágio
+        self.counts = []
+        rate = profile["start_rate"]
+        elapsed = count = 0
+        for stage in profile["stages"]:
+            if stage["duration"] > 0:
+                self.segments.append((elapsed, stage["duration"], rate, stage["target"]))
+                count += (rate + stage["target"]) / 2 * stage["duration"]
+                self.counts.append(count)
+            elapsed += stage["duration"]
+            rate = stage["target"]
+        if not count:
+            raise ValueError("O perfil não tem nenhuma requisição (taxa zero em todos os estágios)")
+        self.duration = elapsed
+        # Requisições i com N(t) = i dentro do perfil (0 <= i < N(fim))
+        total = math.ceil(count - 1e-9)
+        self.total = max(0, math.ceil((total - part) / parts))
+
+    def share(self, part, parts):
+        return LoadProfile(self.profile, part, parts)
+
+    # Taxa média da fatia
+    @property
+    def mean_rate(self):
+        return self.total / self.duration
+
+    # Requisições previstas do perfil inteiro até o instante t (s): N(t)
+    def count_at(self, t):
+        for index, (start, duration, rate0, rate1) in enumerate(self.segments):
+            if t < start + duration:
+                elapsed = max(0, t - start)
+                before = self.counts[index - 1] if index else 0
+                return before + rate0 * elapsed + (rate1 - rate0) / (2 * duration) * elapsed * elapsed
+        return self.counts[-1]
+
+    # Requisições previstas do perfil inteiro em cada janela de `window` segundos
+    def window_sizes(self, window):
+        edges = [math.ceil(self.count_at(index * window) - 1e-9) for index in range(math.ceil(self.duration / window - 1e-9) + 1)]
+        return [end - start for start, end in zip(edges, edges[1:])]
+
+    # Instante (s, desde o início) da requisição de índice `i` do perfil inteiro
+    def time_of(self, i):
+        index = min(bisect.bisect_right(self.counts, i), len(self.segments) - 1)
+        start, duration, rate0, rate1 = self.segments[index]
+        k = i - (self.counts[index - 1] if index else 0)
+        # N(t) = rate0 t + a t², com a = (rate1 - rate0) / (2 duration); t = 2k / (rate0 + √(rate0² + 4ak))
+        a = (rate1 - rate0) / (2 * duration)
+        root = math.sqrt(max(0.0, rate0 * rate0 + 4 * a * k))
+        t = 2 * k / (rate0 + root) if rate0 + root > 0 else 0.0
+        return start + min(t, duration)
+
+    # Deslocamento (ns) desde o início da requisição `j` da fatia
+    def offset_ns(self, j):
+        return round(self.time_of(self.part + j * self.parts) * 1e9)
+
+# Fatia do perfil de carga do plano para o processo `part` de `parts`, ou None sem perfil
+def plan_profile(plan, part=0, parts=1):
+    return LoadProfile(plan["profile"], part, parts) if plan.get("profile") else None
@@ -0,0 +1,222 @@
+import os
+import glob
+import contextlib
+import numpy as np
+
+from .client import ERROR_CLASSES, DEFAULT_SUCCESS_STATUSES
+
+# Registro por requisição, uma linha por requisição, em colunas:
+#   group        índice do grupo (na malha aberta contínua, a janela do instante previsto)
+#   intended_ns  instante previsto de envio (-1 = sem instante previsto, rajada)
+#   start_ns     instante real de envio
+#   latency_ns   duração da requisição desde o envio real; sem resposta, o tempo até a falha
+#   status       código HTTP (0 = sem resposta)
+#   bytes        bytes do corpo recebidos
+#   error        classe do erro, índice em ERROR_CLASSES (0 = sem erro)
+# Os instantes são do relógio monotônico (time.perf_counter_ns), comparáveis
+# entre os processos de uma mesma máquina.
+RECORD_DTYPE = np.dtype([
+    ("group", np.int32),
+    ("intended_ns", np.int64),
+    ("start_ns", np.int64),
+    ("latency_ns", np.int64),
+    ("status", np.int16),
+    ("bytes", np.int64),
+    ("error", np.int8),
+])
+COLUMNS = RECORD_DTYPE.names
+# Linhas por bloco: a memória cresce de bloco em bloco (~2.5 MB) em vez de linha a linha
+CHUNK_ROWS = 65536
+SPILL_FORMATS = {".parquet": "parquet", ".arrow": "arrow"}
+
+# Grava as requisições em blocos pré-alocados. Sem `spill_path`, os blocos
+# cheios ficam em memória; com ele, cada bloco cheio é gravado no arquivo
+# (Parquet ou Arrow IPC, pela extensão) e o mesmo bloco é reutilizado, então a
+# memória fica constante em execuções com milhões de requisições.
+class RequestRecorder:
+    def __init__(self, spill_path=None, chunk_rows=CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self.spill_path = spill_path
+        self.writer = None
+        self.closed = False
+        self.chunks = []
+        self.buffer = np.empty(chunk_rows, dtype=RECORD_DTYPE)
+        self.size = 0
+        self.rows = 0
+        # Grupo das próximas requisições (testes em grupos)
+        self.group = 0
+        # Início e tamanho (ns) das janelas, quando o grupo vem do instante previsto
+        self.window_start_ns = None
+        self.window_ns = None
+
+    def set_windows(self, start_ns, window):
+        self.window_start_ns = start_ns
+        self.window_ns = window * 1e9
+
+    def record(self, intended_ns, start_ns, latency_ns, status, num_bytes, error):
+        group = self.group
+        if self.window_ns is not None:
+            # Sem instante previsto (usuários virtuais), a janela é a do início real
+            group = int(((start_ns if intended_ns is None else intended_ns) - self.window_start_ns) // self.window_ns)
+        if intended_ns is None:
+            intended_ns = -1
+        self.buffer[self.size] = (group, intended_ns, start_ns, latency_ns, status, num_bytes, error)
+        self.size += 1
+        self.rows += 1
+        if self.size == self.chunk_rows:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if self.spill_path is None:
+            self.chunks.append(self.buffer)
+            self.buffer = np.empty(self.chunk_rows, dtype=RECORD_DTYPE)
+        elif self.size:
+            self._write(self.buffer[:self.size])
+        self.size = 0
+
+    def _write(self, chunk):
+        import pyarrow as pa
+
+        table = pa.Table.from_arrays([pa.array(chunk[name]) for name in COLUMNS], names=list(COLUMNS))
+        if self.writer is None:
+            self.writer = _open_writer(self.spill_path, table.schema)
+        self.writer.write_table(table)
+
+    # Colunas de tudo o que foi gravado ({nome: ndarray}); com `spill_path`, lidas do arquivo
+    def columns(self):
+        if self.spill_path is not None:
+            self.close()
+            return read_records(self.spill_path)
+        return _split_columns(np.concatenate(self.chunks + [self.buffer[:self.size]]))
+
+    def close(self):
+        if self.spill_path is None or self.closed:
+            return
+        self.closed = True
+        self._flush_chunk()
+        if self.writer is None:
+            # Nenhuma requisição: grava um arquivo vazio com o esquema, para a leitura não falhar
+            self._write(self.buffer[:0])
+        self.writer.close()
+        self.writer = None
+
+def _open_writer(path, schema):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if SPILL_FORMATS.get(os.path.splitext(path)[1]) == "arrow":
+        return pa.ipc.new_file(path, schema)
+    return pq.ParquetWriter(path, schema)
+
+def _split_columns(records):
+    return {name: records[name] for name in COLUMNS}
+
+# Lê um arquivo gravado por RequestRecorder ou uma pasta com vários (um por
+# processo gerador), devolvendo as colunas concatenadas
+def read_records(path, columns=COLUMNS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if os.path.isdir(path):
+        paths = sorted(file for file in glob.glob(os.path.join(path, "*")) if os.path.splitext(file)[1] in SPILL_FORMATS)
+    else:
+        paths = [path]
+    tables = []
+    for file in paths:
+        if SPILL_FORMATS[os.path.splitext(file)[1]] == "arrow":
+            with pa.memory_map(file) as source:
+                tables.append(pa.ipc.open_file(source).read_all().select(list(columns)))
+        else:
+            tables.append(pq.read_table(file, columns=list(columns)))
+    if not tables:
+        return {name: np.empty(0, dtype=RECORD_DTYPE[name]) for name in columns}
+    table = pa.concat_tables(tables)
+    return {name: table.column(name).to_numpy().astype(RECORD_DTYPE[name], copy=False) for name in columns}
+
+# Liga um RequestRecorder ao cliente enquanto o bloco executa, gravando em
+# `<pasta>/part-<id>.parquet`; sem pasta, não faz nada
+@contextlib.asynccontextmanager
+async def request_recorder(client, directory, part=0):
+    if not directory:
+        yield None
+        return
+    os.makedirs(directory, exist_ok=True)
+    recorder = RequestRecorder(os.path.join(directory, "part-{}.parquet".format(part)))
+    client.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        client.recorder = None
+        recorder.close()
+
+def has_records(directory):
+    return bool(directory) and bool(glob.glob(os.path.join(directory, "*.parquet")) + glob.glob(os.path.join(directory, "*.arrow")))
+
+# Latência desde o instante previsto (correção de coordinated omission) ou,
+# sem instante previsto, desde o envio real (nas requisições sem resposta, o
+# tempo até a falha); -1 quando a duração não foi medida (registros antigos)
+def corrected_latency_ns(columns):
+    intended = columns["intended_ns"]
+    latency = columns["latency_ns"]
+    corrected = np.where(intended >= 0, columns["start_ns"] - intended + latency, latency)
+    return np.where(latency >= 0, corrected, -1)
+
+# Requisições com status de sucesso, pelas faixas [menor, maior] do critério
+# (ver `make_client_options`)
+def success_mask(status, success_statuses=DEFAULT_SUCCESS_STATUSES):
+    mask = np.zeros(len(status), dtype=bool)
+    for low, high in success_statuses:
+        mask |= (status >= low) & (status <= high)
+    return mask
+
+# Resumo por grupo, calculado sobre as colunas sem laços em Python.
+# Percentis exatos: as latências são ordenadas dentro de cada grupo. Os
+# tempos até a falha das requisições sem resposta ficam fora da média e dos percentis.
+def summarize_groups(columns, success_statuses=DEFAULT_SUCCESS_STATUSES):
+    group = columns["group"]
+    if not len(group):
+        return {"group": np.empty(0, dtype=np.int64)}
+    latency = corrected_latency_ns(columns)
+    groups, inverse = np.unique(group, return_inverse=True)
+    size = len(groups)
+    answered = (latency >= 0) & (columns["error"] == 0)
+    requests = np.bincount(inverse, minlength=size)
+    responses = np.bincount(inverse, weights=answered, minlength=size)
+    latency_sum = np.bincount(inverse, weights=np.where(answered, latency, 0), minlength=size)
+    summary = {
+        "group": groups,
+        "requests": requests,
+        "successes": np.bincount(inverse, weights=success_mask(columns["status"], success_statuses), minlength=size).astype(np.int64),
+        "errors": np.bincount(inverse, weights=columns["error"] > 0, minlength=size).astype(np.int64),
+        "bytes": np.bincount(inverse, weights=columns["bytes"], minlength=size).astype(np.int64),
+        "mean": np.divide(latency_sum, responses, out=np.zeros(size), where=responses > 0) / 1e9,
+    }
+    # Ordena por (grupo, latência) com as sem resposta no fim de cada grupo
+    order = np.lexsort((np.where(answered, latency, np.iinfo(np.int64).max), inverse))
+    sorted_latency = latency[order]
+    starts = np.concatenate(([0], np.cumsum(requests)[:-1]))
+    counts = responses.astype(np.int64)
+    for key, quantile in (("p50", 0.5), ("p99", 0.99)):
+        ranks = np.maximum(np.ceil(counts * quantile).astype(np.int64) - 1, 0)
+        values = sorted_latency[np.minimum(starts + ranks, len(sorted_latency) - 1)] / 1e9
+        summary[key] = np.where(counts > 0, values, np.nan)
+    return summary
+
+# Quantidade de requisições por código de status e por classe de erro
+def status_counts(columns):
+    statuses, counts = np.unique(columns["status"], return_counts=True)
+    errors, error_counts = np.unique(columns["error"], return_counts=True)
+    return (dict(zip(statuses.tolist(), counts.tolist())),
+            {ERROR_CLASSES[error]: count for error, count in zip(errors.tolist(), error_counts.tolist()) if error})
+
+# Amostra de até `max_points` requisições para gráficos de dispersão:
+# (segundos desde a primeira requisição, latência ou tempo até a falha em s, status)
+def sample_timeline(columns, max_points=20000, seed=0):
+    start = columns["start_ns"]
+    if not len(start):
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int16)
+    index = np.arange(len(start))
+    if len(start) > max_points:
+        index = np.sort(np.random.default_rng(seed).choice(len(start), max_points, replace=False))
+    latency = corrected_latency_ns(columns)[index]
+    return (start[index] - start.min()) / 1e9, np.where(latency >= 0, latency / 1e9, np.nan), columns["status"][index]
@@ -0,0 +1,109 @@
+from .analysis import RunAnalysis
+
+# Resultados de um teste: os grupos concluídos, na ordem, e as séries por
+# grupo lidas pelos gráficos e tabelas das páginas. Cada teste tem o seu
+# objeto, então testes seguidos não misturam resultados.
+class RunResults:
+    def __init__(self, groups=()):
+        self.groups = list(groups)
+        self._analysis = None
+
+    def add(self, group):
+        self.groups.append(group)
+
+    def __len__(self):
+        return len(self.groups)
+
+    @property
+    def durations(self):
+        return [group.total_time for group in self.groups]
+
+    @property
+    def total_requests(self):
+        return [group.total_requests for group in self.groups]
+
+    @property
+    def success_counts(self):
+        return [group.success_count for group in self.groups]
+
+    @property
+    def success_rates(self):
+        return [group.success_rate for group in self.groups]
+
+    @property
+    def means(self):
+        return [group.mean for group in self.groups]
+
+    @property
+    def std_devs(self):
+        return [group.std_dev for group in self.groups]
+
+    @property
+    def histograms(self):
+        return [group.histogram for group in self.groups]
+
+    @property
+    def queue_histograms(self):
+        return [group.queue_histogram for group in self.groups]
+
+    @property
+    def ttfb_histograms(self):
+        return [group.ttfb_histogram for group in self.groups]
+
+    @property
+    def phase_histograms(self):
+        return [group.phase_histograms for group in self.groups]
+
+    @property
+    def phase_means(self):
+        return [group.phase_means for group in self.groups]
+
+    @property
+    def bytes_received(self):
+        return [group.bytes_received for group in self.groups]
+
+    @property
+    def new_connections(self):
+        return [group.new_connections for group in self.groups]
+
+    @property
+    def reused_connections(self):
+        return [group.reused_connections for group in self.groups]
+
+    # Janelas cobertas por cada grupo (> 1 nas janelas antigas juntadas de um
+    # teste contínuo; ver WindowedGroups) e a primeira janela de cada um, a partir de 0
+    @property
+    def windows(self):
+        return [group.windows for group in self.groups]
+
+    @property
+    def window_starts(self):
+        starts, first = [], 0
+        for group in self.groups:
+            starts.append(first)
+            first += group.windows
+        return starts
+
+    # Média de usuários virtuais ativos em cada grupo (modelo fechado; None nos demais)
+    @property
+    def users(self):
+        return [group.users for group in self.groups]
+
+    # Taxas pretendida e atingida, só dos grupos em malha aberta
+    @property
+    def intended_rates(self):
+        return [group.intended_rate for group in self.groups if group.intended_rate is not None]
+
+    @property
+    def achieved_rates(self):
+        return [group.achieved_rate for group in self.groups if group.intended_rate is not None]
+
+    def merged_histogram(self):
+        return self.analysis().histogram
+
+    # Estatísticas do teste (ver engine.analysis), refeitas só quando chegam
+    # novos grupos: os grupos concluídos não mudam
+    def analysis(self):
+        if self._analysis is None or self._analysis.requests.size != len(self.groups):
+            self._analysis = RunAnalysis(self.groups)
+        return self._analysis
@@ -0,0 +1,114 @@
+# Critérios de parada e de aprovação do teste, avaliados segundo a segundo
+# sobre a série ao vivo (agregados por segundo de todos os geradores). Cada
+# regra compara uma métrica do segundo com um limite e é violada quando o
+# limite é ultrapassado por `seconds` segundos seguidos. Uma regra com ação
+# "stop" interrompe o teste assim que é violada; com "fail", o teste continua
+# e só é reprovado no fim.
+
+# Métrica: (descrição, unidade exibida, fator da unidade exibida para a unidade da regra)
+#   p99, mean          tempo de resposta do segundo (s)
+#   error_rate         fração das requisições sem sucesso
+#   server_error_rate  fração das requisições com resposta 5xx
+#   timeout_rate       fração das requisições encerradas por tempo limite
+#   throughput_drop    queda das requisições concluídas no segundo em relação
+#                      ao maior valor anterior (fração); faz sentido com carga
+#                      contínua, e não com grupos em rajada separados por pausas
+RULE_METRICS = {
+    "p99": ("p99 do tempo de resposta", "ms", 1e-3),
+    "mean": ("Tempo médio de resposta", "ms", 1e-3),
+    "error_rate": ("Requisições sem sucesso", "%", 1e-2),
+    "server_error_rate": ("Respostas 5xx", "%", 1e-2),
+    "timeout_rate": ("Timeouts", "%", 1e-2),
+    "throughput_drop": ("Queda da vazão em relação ao pico", "%", 1e-2),
+}
+RULE_ACTIONS = {"fail": "Reprovar", "stop": "Parar o teste"}
+
+def make_rule(metric, threshold, seconds=1, action="fail"):
+    if metric not in RULE_METRICS:
+        raise ValueError("Métrica desconhecida: {}".format(metric))
+    if action not in RULE_ACTIONS:
+        raise ValueError("Ação desconhecida: {}".format(action))
+    return {"metric": metric, "threshold": threshold, "seconds": max(1, int(seconds)), "action": action}
+
+# Descrição da regra na unidade exibida, ex.: "p99 do tempo de resposta acima de 500 ms por 3 s seguidos"
+def describe_rule(rule):
+    label, unit, scale = RULE_METRICS[rule["metric"]]
+    return "{} acima de {:g} {} por {} s seguido{}".format(
+        label, rule["threshold"] / scale, unit, rule["seconds"], "s" if rule["seconds"] > 1 else "")
+
+def format_value(metric, value):
+    _, unit, scale = RULE_METRICS[metric]
+    return "{:.4g} {}".format(value / scale, unit)
+
+# Avalia as regras incrementalmente: `observe` recebe cada segundo encerrado,
+# em ordem, e guarda só as sequências em andamento e a primeira violação de
+# cada regra, então o custo por segundo não depende da duração do teste.
+class RuleEngine:
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        # Segundos seguidos acima do limite, por regra
+        self.streaks = [0] * len(self.rules)
+        # Primeira violação de cada regra: {"second", "value"} (segundo em que a sequência se completou)
+        self.breaches = [None] * len(self.rules)
+        self.last_second = None
+        self.peak_requests = 0
+        self.observed = 0
+
+    def _value(self, metric, group):
+        if metric == "p99":
+            return group.histogram.percentile(99) / 1e9
+        if metric == "mean":
+            return group.mean
+        if metric == "error_rate":
+            return 1 - group.success_rate
+        if metric == "server_error_rate":
+            return group.server_error_rate
+        if metric == "timeout_rate":
+            return group.timeout_rate
+        # O primeiro segundo é parcial (o teste começou no meio dele) e não serve de pico
+        if self.observed < 2 or not self.peak_requests:
+            return None
+        return 1 - group.total_requests / self.peak_requests
+
+    # Avalia um segundo encerrado; `partial` indica um segundo incompleto (o
+    # último do teste), que não entra na comparação de vazão.
+    # Retorna os índices das regras violadas neste segundo pela primeira vez.
+    def observe(self, second, group, partial=False):
+        if not group.total_requests:
+            return []
+        if self.last_second is not None and second != self.last_second + 1:
+            # Segundo sem nenhuma requisição concluída: as sequências recomeçam
+            self.streaks = [0] * len(self.rules)
+        self.last_second = second
+        self.observed += 1
+        breached = []
+        for index, rule in enumerate(self.rules):
+            if partial and rule["metric"] == "throughput_drop":
+                continue
+            value = self._value(rule["metric"], group)
+            if value is None or value <= rule["threshold"]:
+                self.streaks[index] = 0
+                continue
+            self.streaks[index] += 1
+            if self.streaks[index] >= rule["seconds"] and self.breaches[index] is None:
+                self.breaches[index] = {"second": second, "value": value}
+                breached.append(index)
+        if self.observed > 1 and not partial:
+            self.peak_requests = max(self.peak_requests, group.total_requests)
+        return breached
+
+    # Primeira regra de parada violada, como (regra, violação), ou None
+    @property
+    def stop_breach(self):
+        for rule, breach in zip(self.rules, self.breaches):
+            if breach is not None and rule["action"] == "stop":
+                return rule, breach
+        return None
+
+    @property
+    def passed(self):
+        return all(breach is None for breach in self.breaches)
+
+    # (regra, violação ou None) de cada regra, na ordem
+    def verdicts(self):
+        return list(zip(self.rules, self.breaches))
@@ -0,0 +1,343 @@
+import os
+import time
+import uuid
+import queue
+import shutil
+import asyncio
+import threading
+import tempfile
+import traceback
+import collections
+import multiprocessing as mp
+
+from .client import make_client
+from .scenario import compile_scenario
+from .profiles import plan_profile
+from .executor import bounded_executor
+from .live import LiveSeries, live_monitor
+from .records import request_recorder
+from .results import RunResults
+from .timeseries import TimeSeries
+from .scheduler import sleep_or_stop, stop_requested
+from .groups import run_windowed_open_loop
+from .workers import run_group_share, run_group_pool, run_open_loop_pool, run_users_pool, planned_sizes
+from .users import run_virtual_users
+from .capacity import CapacitySearch
+from .rules import RuleEngine, describe_rule, format_value
+from .coordinator import run_distributed
+from .artifacts import RESULTS_DIR, save_artifact
+
+# Intervalo (s) com que o coletor libera os segundos encerrados da série ao vivo
+COLLECT_INTERVAL = 0.5
+# Pasta com o registro por requisição de cada teste (uma subpasta por teste)
+RECORDS_DIR = os.path.join(tempfile.gettempdir(), "load-test-records")
+# Testes mantidos pelo executor (de todas as sessões); os mais antigos já
+# encerrados são descartados, com o seu registro por requisição
+MAX_RUNS = 20
+
+# Grupos em sequência no próprio processo, com um único cliente
+async def _run_groups(plan, on_group, on_second, stop, next_size):
+    async with make_client(plan["client_options"], compile_scenario(plan)) as client, \
+            live_monitor(client, on_second), \
+            request_recorder(client, plan["records"]), \
+            bounded_executor(client, plan["max_in_flight"]) as executor:
+        index = 0
+        while not stop_requested(stop):
+            num_requests = next_size(index)
+            if num_requests is None:
+                break
+            group = await run_group_share(client, plan, index, 0, 1, time.perf_counter_ns(), executor, num_requests, stop)
+            index += 1
+            if on_group(group) is False:
+                break
+            if plan["delay_in_seconds"]:
+                await sleep_or_stop(plan["delay_in_seconds"], stop)
+
+async def _run_open_loop(plan, on_second, stop):
+    async with make_client(plan["client_options"], compile_scenario(plan)) as client, \
+            live_monitor(client, on_second), \
+            request_recorder(client, plan["records"]), \
+            bounded_executor(client, plan["max_in_flight"]) as executor:
+        return await run_windowed_open_loop(client, plan["url"], plan["rate"], plan["duration"], plan["window"], executor=executor, stop=stop,
+                                            profile=plan_profile(plan))
+
+async def _run_users(plan, on_second, stop):
+    async with make_client(plan["client_options"], compile_scenario(plan)) as client, \
+            live_monitor(client, on_second), \
+            request_recorder(client, plan["records"]):
+        return await run_virtual_users(client, plan["url"], plan["users"], plan["window"], stop=stop)
+
+# Encerra o teste quando a taxa de sucesso de um grupo fica abaixo de `min_success_rate`
+def _stop_below(plan, on_group):
+    def on_stop_group(group):
+        if on_group(group) is False:
+            return False
+        min_success_rate = plan["min_success_rate"]
+        return min_success_rate is None or group.success_rate >= min_success_rate
+    return on_stop_group
+
+# Busca de capacidade: cada grupo medido alimenta a busca, que define o tamanho
+# do próximo (taxa do nível × janela) ou encerra o teste
+def _capacity_sizes(plan, on_group):
+    search = CapacitySearch.from_plan(plan)
+
+    def next_size(index):
+        rate = search.next_rate()
+        return None if rate is None else max(1, round(rate * plan["window"]))
+
+    def on_level(group):
+        search.record(group)
+        return on_group(group)
+    return next_size, on_level
+
+# Executa um plano (ver `make_plan`) no próprio processo, em `num_workers`
+# processos geradores ou nos agentes informados. Cada grupo concluído vai para
+# `on_group` (que pode retornar False para encerrar o teste) e, com
+# `on_second`, os agregados por segundo também são entregues. Retorna
+# (taxa pretendida, taxa atingida, maior atraso de disparo) na malha aberta
+# contínua e None nos testes em grupos (inclusive na busca de capacidade, cujo
+# resultado é refeito a partir dos grupos com `CapacitySearch.replay`) e nos
+# de usuários virtuais, cujos grupos são as janelas do teste.
+# O registro por requisição fica nas máquinas geradoras e não é coletado dos agentes.
+def run_plan(plan, on_group, on_second=None, stop=None, num_workers=1, agents=None):
+    plan = {**plan, "live": on_second is not None}
+    if agents:
+        plan["records"] = None
+    if plan.get("users"):
+        if agents:
+            groups = []
+            asyncio.run(run_distributed(agents, plan, groups.append, on_second=on_second, stop=stop, windowed=True))
+        elif num_workers > 1:
+            groups = run_users_pool(plan, num_workers, on_second, stop)
+        else:
+            groups = asyncio.run(_run_users(plan, on_second, stop))
+        for group in groups:
+            on_group(group)
+        return None
+    if plan.get("capacity"):
+        if agents:
+            raise ValueError("A busca de capacidade não é suportada na execução distribuída")
+        next_size, on_group = _capacity_sizes(plan, on_group)
+    elif not plan["rate"]:
+        next_size, on_group = planned_sizes(plan), _stop_below(plan, on_group)
+    if not plan["rate"]:
+        if agents:
+            asyncio.run(run_distributed(agents, plan, on_group, on_second=on_second, stop=stop))
+        elif num_workers > 1:
+            run_group_pool(plan, num_workers, on_group, on_second, stop, next_size)
+        else:
+            asyncio.run(_run_groups(plan, on_group, on_second, stop, next_size))
+        return None
+
+    if agents:
+        groups = []
+        asyncio.run(run_distributed(agents, plan, groups.append, on_second=on_second, stop=stop, windowed=True))
+        # Cada janela leva as taxas somadas dos agentes; o atraso de disparo não é enviado
+        rates = (groups[0].intended_rate, groups[0].achieved_rate, None) if groups else (plan["rate"], 0.0, None)
+    elif num_workers > 1:
+        groups, *rates = run_open_loop_pool(plan["url"], plan["rate"], plan["duration"], plan["window"], num_workers,
+                                            plan["client_options"], plan["max_in_flight"], on_second, stop, plan["records"], plan.get("scenario"), plan.get("feed"),
+                                            plan.get("profile"))
+    else:
+        groups, *rates = asyncio.run(_run_open_loop(plan, on_second, stop))
+    for group in groups:
+        on_group(group)
+    return tuple(rates)
+
+def _run_main(plan, num_workers, agents, messages, stop):
+    try:
+        rates = run_plan(plan, lambda group: messages.put(("group", group)),
+                         lambda second, group: messages.put(("second", second, group)), stop, num_workers, agents)
+        messages.put(("done", rates))
+    except Exception:
+        messages.put(("error", traceback.format_exc()))
+
+# Um teste executado em segundo plano. Os resultados (grupos) e a série por
+# segundo são preenchidos pelo coletor enquanto o teste roda; a página só os lê.
+#   status: "running", "stopping", "finished", "stopped" ou "failed"
+class TestRun:
+    def __init__(self, run_id, plan, num_workers=1, agents=None):
+        self.id = run_id
+        self.plan = plan
+        self.num_workers = num_workers
+        self.agents = agents
+        self.status = "running"
+        self.error = None
+        self.rates = None
+        self.results = RunResults()
+        # Série temporal com memória limitada: por segundo nos últimos minutos
+        # e em baldes de 10 s e 1 min antes disso (ver engine.timeseries)
+        self.series = TimeSeries()
+        # Instante (s desde o início) em que cada grupo foi concluído, para os
+        # gráficos por grupo em função do tempo
+        self.group_times = []
+        # Critérios do plano, avaliados a cada segundo encerrado; `stop_reason`
+        # descreve a regra que interrompeu o teste
+        self.rules = RuleEngine(plan.get("rules") or ())
+        self.stop_reason = None
+        # Pasta do registro por requisição (ver engine.records), ou None
+        self.records_path = plan.get("records")
+        # Arquivo de resultado gravado ao fim do teste (ver engine.artifacts), ou
+        # o erro que impediu a gravação
+        self.artifact_path = None
+        self.artifact_error = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+    @property
+    def groups(self):
+        return self.results.groups
+
+    @property
+    def running(self):
+        return self.status in ("running", "stopping")
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    # Pontos da série temporal (ver `TimeBucket.point`), do mais antigo ao mais recente
+    @property
+    def seconds(self):
+        return self.series.points()
+
+    @property
+    def total_requests(self):
+        return self.series.total_requests
+
+    # Primeiro segundo da série, origem do eixo de tempo dos gráficos
+    @property
+    def first_second(self):
+        return self.series.first_second or 0
+
+    # Aprovado quando nenhum critério foi violado (None quando não há critérios)
+    @property
+    def passed(self):
+        return self.rules.passed if self.rules.rules else None
+
+# Serviço que executa os testes fora da thread da página: cada teste roda num
+# processo próprio (com seu loop de eventos, e que pode abrir processos
+# geradores ou falar com agentes), e uma thread coletora recebe os resultados.
+# A página inicia, consulta e para os testes pelo identificador, e uma nova
+# execução da página (qualquer interação) não interrompe o teste. São mantidos
+# no máximo `max_runs` testes, então a memória de um servidor que executa
+# testes o dia inteiro não cresce. Cada teste encerrado é gravado em
+# `results_dir` (None para não gravar), para comparações posteriores.
+class TestRunner:
+    def __init__(self, max_runs=MAX_RUNS, results_dir=RESULTS_DIR):
+        self.ctx = mp.get_context("spawn")
+        self.max_runs = max_runs
+        self.results_dir = results_dir
+        self.runs = collections.OrderedDict()
+        self.stops = {}
+        self.lock = threading.Lock()
+
+    # Com `plan["records"]` verdadeiro, as requisições são gravadas em RECORDS_DIR/<id>
+    def start(self, plan, num_workers=1, agents=None):
+        run_id = uuid.uuid4().hex
+        if plan.get("records"):
+            plan = {**plan, "records": os.path.join(RECORDS_DIR, run_id)}
+        run = TestRun(run_id, plan, num_workers, agents)
+        messages = self.ctx.Queue()
+        stop = self.ctx.Event()
+        process = self.ctx.Process(target=_run_main, args=(plan, num_workers, agents, messages, stop))
+        process.start()
+        with self.lock:
+            self.runs[run.id] = run
+            self.stops[run.id] = stop
+            evicted = self._evict()
+        for old in evicted:
+            if old.records_path:
+                shutil.rmtree(old.records_path, ignore_errors=True)
+        threading.Thread(target=self._collect, args=(run, process, messages), daemon=True).start()
+        return run.id
+
+    # Remove os testes encerrados mais antigos além de `max_runs` (os em andamento ficam)
+    def _evict(self):
+        evicted = []
+        for run_id, run in list(self.runs.items()):
+            if len(self.runs) <= self.max_runs:
+                break
+            if not run.running:
+                evicted.append(self.runs.pop(run_id))
+        return evicted
+
+    def get(self, run_id):
+        with self.lock:
+            return self.runs.get(run_id)
+
+    def stop(self, run_id):
+        with self.lock:
+            run = self.runs.get(run_id)
+            stop = self.stops.get(run_id)
+        if run is not None and run.status == "running":
+            run.status = "stopping"
+            stop.set()
+
+    # Interrompe o teste quando uma regra de parada é violada
+    def _check_stop_rules(self, run):
+        breach = run.rules.stop_breach
+        if breach is None or run.stop_reason is not None or run.status != "running":
+            return
+        rule, violation = breach
+        run.stop_reason = "{} (valor de {} no segundo {})".format(
+            describe_rule(rule), format_value(rule["metric"], violation["value"]), violation["second"] - run.first_second)
+        self.stop(run.id)
+
+    def _collect(self, run, process, messages):
+        series = LiveSeries()
+        last_flush = time.monotonic()
+        status = None
+        while status is None:
+            try:
+                message = messages.get(timeout=COLLECT_INTERVAL)
+            except queue.Empty:
+                message = None
+                if not process.is_alive():
+                    status = "failed"
+                    run.error = "O processo do teste foi encerrado inesperadamente"
+
+            if message is None:
+                pass
+            elif message[0] == "group":
+                run.results.add(message[1])
+                run.group_times.append(time.time() - run.started_at)
+            elif message[0] == "second":
+                series.add(message[1], message[2])
+            elif message[0] == "done":
+                run.rates = message[1]
+                status = "stopped" if run.status == "stopping" else "finished"
+            else:
+                run.error = message[1]
+                status = "failed"
+
+            if status is not None or time.monotonic() - last_flush >= COLLECT_INTERVAL:
+                closed = series.pop_closed(final=status is not None)
+                for second, group in closed:
+                    run.series.add(second, group)
+                    # No fim do teste, o último segundo está incompleto
+                    run.rules.observe(second, group, partial=status is not None and second == closed[-1][0])
+                self._check_stop_rules(run)
+                last_flush = time.monotonic()
+
+        process.join()
+        run.finished_at = time.time()
+        if self.results_dir is not None:
+            try:
+                run.artifact_path = save_artifact(run, self.results_dir, status)
+            except OSError as error:
+                run.artifact_error = str(error)
+        run.status = status
+        with self.lock:
+            self.stops.pop(run.id, None)
+
+_runner = None
+_runner_lock = threading.Lock()
+
+# Serviço único do processo (o servidor do Streamlit), compartilhado pelas páginas
+def get_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = TestRunner()
+        return _runner
@@ -0,0 +1,210 @@
+import re
+import json
+import time
+import uuid
+import random
+import bisect
+import itertools
+import urllib.parse
+
+from .feeds import open_feed
+
+# Cenário: mistura de requisições sorteadas por peso a cada disparo, no lugar
+# de um GET sempre na mesma URL. Definição (JSON ou YAML; ver `load_scenario`):
+#   {
+#     "variables": {"token": "abc"},                      valores fixos, opcional
+#     "headers": {"Authorization": "Bearer ${token}"},    cabeçalhos de todas as requisições, opcional
+#     "requests": [
+#       {"name": "listar", "weight": 8, "path": "/items?page=${counter}"},
+#       {"name": "criar", "weight": 2, "method": "POST", "path": "/items",
+#        "headers": {"X-Request-Id": "${uuid}"}, "json": {"nome": "item ${counter}"}}
+#     ]
+#   }
+# O caminho é somado à URL do teste (a menos que seja uma URL completa). O
+# corpo vem de "json" (serializado) ou de "body" (texto). Os modelos ${nome}
+# usam as variáveis fixas, resolvidas uma vez na compilação, as colunas da
+# massa de dados do plano (ver engine.feeds), lida uma linha por requisição que
+# as usa, e as variáveis de cada requisição em DYNAMIC_VARIABLES, calculadas
+# só quando usadas. Os valores são codificados na URL (codificação percentual)
+# e escapados nas strings do corpo "json"; no corpo "body" e nos cabeçalhos,
+# entram como estão.
+
+# Variáveis calculadas a cada requisição
+#   uuid       identificador aleatório (uuid4, hexadecimal)
+#   counter    número sequencial da requisição no processo gerador
+#   timestamp  instante do disparo em ms (relógio de parede)
+#   random     inteiro aleatório entre 0 e 999999
+DYNAMIC_VARIABLES = ("uuid", "counter", "timestamp", "random")
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+
+def make_request_template(path="/", method="GET", weight=1, headers=None, body=None, json_body=None, name=None):
+    method = method.upper()
+    if method not in METHODS:
+        raise ValueError("Método desconhecido: {}".format(method))
+    if weight <= 0:
+        raise ValueError("O peso de cada requisição deve ser maior que zero")
+    if body is not None and json_body is not None:
+        raise ValueError("Informe o corpo em \"body\" ou em \"json\", não nos dois")
+    return {"name": name or "{} {}".format(method, path), "method": method, "path": path, "weight": weight,
+            "headers": headers or {}, "body": body, "json": json_body}
+
+def make_scenario(requests, variables=None, headers=None):
+    if not requests:
+        raise ValueError("O cenário deve ter ao menos uma requisição")
+    return {"variables": variables or {}, "headers": headers or {}, "requests": list(requests)}
+
+# Lê a definição de um cenário em JSON ou, com o PyYAML instalado, em YAML
+def load_scenario(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("O cenário não é um JSON válido (para YAML, instale o PyYAML)") from None
+        data = yaml.safe_load(text)
+    if not isinstance(data, dict) or not isinstance(data.get("requests"), list):
+        raise ValueError("O cenário deve ter uma lista \"requests\"")
+    requests = []
+    for item in data["requests"]:
+        item = dict(item)
+        if "json" in item:
+            item["json_body"] = item.pop("json")
+        requests.append(make_request_template(**item))
+    return make_scenario(requests, data.get("variables"), data.get("headers"))
+
+def join_url(base_url, path):
+    if re.match(r"^https?://", path):
+        return path
+    return base_url.rstrip("/") + "/" + path.lstrip("/")
+
+# Escapes dos valores inseridos nos modelos: na URL, codificação percentual;
+# no corpo "json", como conteúdo de string JSON (os modelos ${nome} de um
+# corpo "json" só podem estar dentro de strings, já que o corpo é serializado
+# antes da substituição)
+def _escape_url(value):
+    return urllib.parse.quote(value, safe="")
+
+def _escape_json(value):
+    return json.dumps(value, ensure_ascii=False)[1:-1]
+
+# Parte de uma requisição (texto) com modelos: as variáveis fixas são aplicadas
+# na compilação; o que sobra é resolvido a cada requisição. `escape` é aplicado
+# a cada valor inserido (fixo ou de requisição).
+class _Field:
+    __slots__ = ("parts", "names", "escape")
+
+    def __init__(self, text, variables, columns=(), escape=None):
+        self.escape = escape
+        text = _PLACEHOLDER.sub(lambda match: self._escaped(str(variables[match.group(1)])) if match.group(1) in variables else match.group(0), text)
+        self.parts = _PLACEHOLDER.split(text)
+        self.names = set(self.parts[1::2])
+        unknown = self.names.difference(DYNAMIC_VARIABLES, columns)
+        if unknown:
+            raise ValueError("Variáveis não definidas no cenário: {}".format(", ".join(sorted(unknown))))
+
+    def _escaped(self, value):
+        return value if self.escape is None else self.escape(value)
+
+    def render(self, values):
+        parts = self.parts
+        return "".join(part if index % 2 == 0 else self._escaped(values[part]) for index, part in enumerate(parts))
+
+# Requisição compilada: método, URL, cabeçalhos e corpo já prontos quando não
+# dependem de variáveis de requisição
+class _CompiledRequest:
+    __slots__ = ("name", "method", "url", "headers", "content", "fields", "names", "uses_feed")
+
+    def __init__(self, template, base_url, variables, common_headers, columns=()):
+        self.name = template["name"]
+        self.method = template["method"]
+        headers = {**common_headers, **template["headers"]}
+        body = template["body"]
+        body_escape = None
+        if template["json"] is not None:
+            body_escape = _escape_json
+            body = json.dumps(template["json"], ensure_ascii=False)
+            if not any(key.lower() == "content-type" for key in headers):
+                headers["Content-Type"] = "application/json"
+        self.fields = {
+            "url": _Field(join_url(base_url, template["path"]), variables, columns, _escape_url),
+            "headers": {key: _Field(str(value), variables, columns) for key, value in headers.items()},
+            "body": _Field(body, variables, columns, body_escape) if body is not None else None,
+        }
+        self.url = self.fields["url"].parts[0]
+        self.headers = {key: field.parts[0] for key, field in self.fields["headers"].items()} or None
+        self.content = self.fields["body"].parts[0].encode() if body is not None else None
+        fields = [self.fields["url"], self.fields["body"], *self.fields["headers"].values()]
+        self.names = set().union(*(field.names for field in fields if field is not None))
+        self.uses_feed = not self.names.issubset(DYNAMIC_VARIABLES)
+
+    # (método, URL, cabeçalhos, corpo) desta requisição
+    def build(self, values):
+        if not self.names:
+            return self.method, self.url, self.headers, self.content
+        url = self.fields["url"].render(values)
+        headers = {key: field.render(values) for key, field in self.fields["headers"].items()} or None
+        body = self.fields["body"]
+        content = body.render(values).encode() if body is not None else None
+        return self.method, url, headers, content
+
+# Cenário compilado em cada processo gerador. O sorteio usa os pesos
+# acumulados (busca binária sobre um único número aleatório) e as requisições
+# sem variáveis de requisição são devolvidas prontas, sem nenhuma formatação.
+# `feed` é o FeedReader da massa de dados do processo, se houver.
+class Scenario:
+    def __init__(self, definition, base_url, feed=None):
+        self.feed = feed
+        columns = feed.columns if feed is not None else ()
+        self.requests = [_CompiledRequest(template, base_url, definition["variables"], definition["headers"], columns)
+                         for template in definition["requests"]]
+        self.cumulative_weights = list(itertools.accumulate(template["weight"] for template in definition["requests"]))
+        self.total_weight = self.cumulative_weights[-1]
+        self.counter = itertools.count(1)
+
+    def choose(self):
+        if len(self.requests) == 1:
+            return self.requests[0]
+        return self.requests[bisect.bisect_right(self.cumulative_weights, random.random() * self.total_weight)]
+
+    def _values(self, request):
+        names = request.names
+        values = self.feed.next_row() if request.uses_feed else {}
+        if "uuid" in names:
+            values["uuid"] = uuid.uuid4().hex
+        if "counter" in names:
+            values["counter"] = str(next(self.counter))
+        if "timestamp" in names:
+            values["timestamp"] = str(time.time_ns() // 1_000_000)
+        if "random" in names:
+            values["random"] = str(random.randrange(1_000_000))
+        return values
+
+    # Sorteia a próxima requisição: (método, URL, cabeçalhos, corpo)
+    def next_request(self):
+        request = self.choose()
+        return request.build(self._values(request) if request.names else None)
+
+    def close(self):
+        if self.feed is not None:
+            self.feed.close()
+
+# Cenário do plano compilado para a URL do teste no processo `part` de
+# `parts`, ou None sem cenário e sem massa de dados. Com massa de dados e sem
+# cenário, a própria URL do teste é o modelo de um GET.
+def compile_scenario(plan, part=0, parts=1):
+    definition = plan.get("scenario")
+    feed = plan.get("feed")
+    if not definition and not feed:
+        return None
+    if not definition:
+        definition = make_scenario([make_request_template(plan["url"])])
+    reader = open_feed(feed, part, parts) if feed else None
+    try:
+        return Scenario(definition, plan["url"], reader)
+    except Exception:
+        if reader is not None:
+            reader.close()
+        raise
@@ -0,0 +1,87 @@
+import time
+import asyncio
+
+from .client import intended_start_ns
+
+# Margem (ns) em que deixamos de dormir e passamos a ceder o loop até o instante exato
+SPIN_THRESHOLD_NS = 500_000
+# Intervalo (s) com que as esperas verificam o pedido de parada
+STOP_POLL_INTERVAL = 0.1
+
+async def sleep_until(target_ns):
+    delay = target_ns - time.perf_counter_ns()
+    if delay > SPIN_THRESHOLD_NS:
+        await asyncio.sleep((delay - SPIN_THRESHOLD_NS) / 1e9)
+    # O asyncio.sleep tem resolução de ~1 ms; o restante é feito cedendo o loop
+    while time.perf_counter_ns() < target_ns:
+        await asyncio.sleep(0)
+
+# Espera `seconds` segundos, acordando antes se `stop` (threading.Event ou
+# multiprocessing.Event) for acionado
+async def sleep_or_stop(seconds, stop=None):
+    end = time.perf_counter() + seconds
+    while stop is None or not stop.is_set():
+        remaining = end - time.perf_counter()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, STOP_POLL_INTERVAL))
+
+def stop_requested(stop):
+    return stop is not None and stop.is_set()
+
+# Número de requisições e deslocamento (ns) desde o início de cada uma: taxa
+# constante ou, com `profile`, os instantes do perfil de carga
+def open_loop_schedule(rate, duration, profile=None):
+    if profile is not None:
+        return profile.total, profile.offset_ns
+    interval_ns = 1e9 / rate
+    return max(1, round(rate * duration)), lambda i: round(i * interval_ns)
+
+# Dispara `send()` a uma taxa constante (req/s) durante `duration` segundos.
+# Cada requisição tem um instante previsto (início + i / taxa) e é disparada nesse
+# instante, independentemente de as anteriores já terem respondido. Cada
+# resultado é entregue a `on_result` assim que chega, como no executor limitado
+# (ver `run_bounded_open_loop`), e descartado: só as requisições em andamento
+# ficam em memória, por mais longo que seja o teste. Se `stop` for
+# acionado, os disparos param e as requisições em andamento são aguardadas.
+# Com `profile` (LoadProfile), os instantes vêm do perfil de carga, e a taxa e a
+# duração passam a ser as do perfil. Retorna (taxa atingida, maior atraso de
+# disparo em s).
+async def run_open_loop(send, rate, duration, start_ns, on_result, stop=None, profile=None):
+    if profile is not None:
+        rate, duration = profile.mean_rate, profile.duration
+
+    total, offset_ns = open_loop_schedule(rate, duration, profile)
+    in_flight = set()
+    last_dispatch_ns = start_ns
+    max_lag_ns = 0
+    dispatched = 0
+
+    async def dispatch(intended_ns):
+        # Cada tarefa tem o seu contexto, então o instante previsto vale só para esta requisição
+        intended_start_ns.set(intended_ns)
+        try:
+            response, duration = await send()
+        except Exception:
+            # Erros inesperados (URL inválida, etc.) contam como falha, como no executor
+            response, duration = None, None
+        on_result(response, duration, None, intended_ns, time.perf_counter_ns() - intended_ns)
+
+    for i in range(total):
+        if stop_requested(stop):
+            break
+        intended_ns = start_ns + offset_ns(i)
+        await sleep_until(intended_ns)
+        task = asyncio.create_task(dispatch(intended_ns))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        last_dispatch_ns = time.perf_counter_ns()
+        max_lag_ns = max(max_lag_ns, last_dispatch_ns - intended_ns)
+        dispatched += 1
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    if not dispatched:
+        return 0.0, 0.0
+    achieved_rate = dispatched / ((last_dispatch_ns - start_ns + 1e9 / rate) / 1e9)
+    return achieved_rate, max_lag_ns / 1e9
@@ -0,0 +1,139 @@
+import time
+import asyncio
+import threading
+import http.cookiejar
+import concurrent.futures
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .client import ResponseRecord, make_client_options, session_cookies
+
+STREAM_CHUNK = 64 * 1024
+
+# Os cookies ficam no cliente (ou no usuário virtual, ver engine.users), e não
+# nas sessões das threads, que atendem requisições de todos os usuários
+class _NoCookiesPolicy(http.cookiejar.DefaultCookiePolicy):
+    def set_ok(self, cookie, request):
+        return False
+
+# Converte os erros do requests nas exceções do httpx, para que os dois
+# motores tenham as mesmas classes de erro (ver `error_class`, que procura a
+# causa, como a falha de DNS ou o reset da conexão, no erro encadeado)
+def _translate_error(error):
+    if isinstance(error, requests.ConnectTimeout):
+        return httpx.ConnectTimeout(str(error))
+    if isinstance(error, requests.Timeout):
+        return httpx.ReadTimeout(str(error))
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        if isinstance(error, requests.exceptions.SSLError) or isinstance(reason, NewConnectionError):
+            return httpx.ConnectError(str(error))
+        return httpx.ReadError(str(error))
+    if isinstance(error, (requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)):
+        return httpx.RemoteProtocolError(str(error))
+    return httpx.RequestError(str(error))
+
+# Conexões abertas pelos pools do urllib3 de uma Session (um pool por host)
+def _opened_connections(session):
+    pools = session.get_adapter("http://").poolmanager.pools
+    return sum(pools[key].num_connections for key in pools.keys())
+
+# Motor síncrono: cada requisição é feita com `requests` por uma das
+# `max_connections` threads de um pool criado uma vez por cliente e reutilizado
+# por todos os grupos do teste. Cada thread tem a sua Session, que mantém as
+# conexões abertas (keep-alive) entre as requisições da thread. O cliente tem
+# a mesma interface do LoadTestClient para `req_get_async` e os executores: o
+# sorteio do cenário, os cookies, o monitor e o registro das requisições
+# continuam no laço de eventos, e só o envio e a leitura da resposta vão para
+# as threads. Permite testar com clientes e plugins que só existem em versão
+# síncrona sem uma thread nova por requisição.
+# Diferenças em relação ao motor assíncrono: sem HTTP/2 e sem as fases de cada
+# requisição; o tempo até o primeiro byte e a duração contam a espera por uma
+# thread livre, como a espera por uma conexão livre no pool do httpx.
+class ThreadedClient:
+    def __init__(self, options=None):
+        options = {**make_client_options(), **(options or {})}
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=options["max_connections"], thread_name_prefix="load-test")
+        self.keep_alive = options["keep_alive"]
+        self.timeout = (options["connect_timeout"], options["timeout"])
+        self.stream_bodies = options["stream_bodies"]
+        self.success_statuses = options["success_statuses"]
+        self.cookies = httpx.Cookies()
+        self.opened_connections = 0
+        self.monitor = None
+        self.recorder = None
+        self.scenario = None
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for session in self._sessions:
+            session.close()
+        if self.scenario is not None:
+            self.scenario.close()
+
+    # Session da thread atual, criada na primeira requisição da thread
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.cookies.set_policy(_NoCookiesPolicy())
+            # Uma thread faz uma requisição por vez: basta uma conexão por host
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=1, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if not self.keep_alive:
+                session.headers["Connection"] = "close"
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    # Executa na thread: retorna (registro, fim em ns, cookies recebidos)
+    def _fetch(self, start_ns, method, url, headers, content, cookies):
+        session = self._session()
+        opened = _opened_connections(session)
+        try:
+            response = session.request(method, url, headers=headers, data=content, cookies=cookies, timeout=self.timeout,
+                                       stream=True, allow_redirects=False)
+            ttfb = (time.perf_counter_ns() - start_ns) / 1e9
+            with response:
+                if self.stream_bodies:
+                    num_bytes = sum(len(chunk) for chunk in response.raw.stream(STREAM_CHUNK, decode_content=False))
+                else:
+                    num_bytes = len(response.content)
+        except requests.RequestException as e:
+            raise _translate_error(e) from e
+        end_ns = time.perf_counter_ns()
+        record = ResponseRecord(response.status_code, "HTTP/1.1", response.headers.get("content-type"), ttfb, num_bytes,
+                                _opened_connections(session) > opened)
+        return record, end_ns, response.cookies
+
+    # Requisição numa thread do pool; as exceções são as do httpx. Retorna
+    # (ResponseRecord, duração em s).
+    async def fetch_in_thread(self, method, url, headers=None, content=None):
+        jar = session_cookies.get()
+        jar = self.cookies if jar is None else jar
+        cookies = None
+        if jar:
+            cookies = requests.cookies.RequestsCookieJar()
+            for cookie in jar.jar:
+                cookies.set_cookie(cookie)
+        start_ns = time.perf_counter_ns()
+        record, end_ns, received = await asyncio.get_running_loop().run_in_executor(
+            self.pool, self._fetch, start_ns, method, url, headers, content, cookies)
+        for cookie in received:
+            jar.jar.set_cookie(cookie)
+        if record.new_connection:
+            self.opened_connections += 1
+        return record, (end_ns - start_ns) / 1e9
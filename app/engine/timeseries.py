@@ -0,0 +1,125 @@
+import collections
+
+from .client import ERROR_CLASSES, TIMEOUT_CLASSES
+from .histogram import LatencyHistogram
+
+# Resoluções da série temporal, da mais fina à mais grossa: (segundos por
+# balde, baldes guardados). Com os valores padrão, os últimos 10 minutos ficam
+# segundo a segundo, a hora anterior em baldes de 10 s e as 24 horas
+# anteriores em baldes de 1 min: no máximo 2400 baldes, qualquer que seja a
+# duração do teste.
+DEFAULT_TIERS = ((1, 600), (10, 360), (60, 1440))
+
+# Requisições, resultados e histograma de latências de um intervalo de tempo
+# (`span` segundos a partir de `start`, em segundos do relógio de parede). O
+# histograma fica no formato binário compacto (só os baldes não vazios), lido
+# apenas quando o balde é juntado aos vizinhos numa resolução mais grossa.
+class TimeBucket:
+    __slots__ = ("start", "span", "requests", "successes", "server_errors", "error_counts", "histogram", "mean", "p99")
+
+    def __init__(self, start, span, requests, successes, server_errors, error_counts, histogram):
+        self.start = start
+        self.span = span
+        self.requests = requests
+        self.successes = successes
+        self.server_errors = server_errors
+        self.error_counts = error_counts
+        self.histogram = histogram.to_bytes()
+        summary = histogram.summary((99,))
+        self.mean = summary["mean"]
+        self.p99 = summary["p99"]
+
+    @classmethod
+    def from_group(cls, second, group):
+        return cls(second, 1, group.total_requests, group.success_count, group.server_errors, list(group.error_counts), group.histogram)
+
+    # Um balde com o intervalo de `buckets` (consecutivos), do início do
+    # primeiro ao fim do último, incluindo os segundos sem requisições entre eles
+    @classmethod
+    def merged(cls, buckets):
+        histogram = LatencyHistogram()
+        error_counts = [0] * len(ERROR_CLASSES)
+        for bucket in buckets:
+            histogram.merge(LatencyHistogram.from_bytes(bucket.histogram))
+            error_counts = [total + count for total, count in zip(error_counts, bucket.error_counts)]
+        start = buckets[0].start
+        return cls(start, buckets[-1].start + buckets[-1].span - start, sum(bucket.requests for bucket in buckets),
+                   sum(bucket.successes for bucket in buckets), sum(bucket.server_errors for bucket in buckets), error_counts, histogram)
+
+    # Ponto da série exibida, no formato de `summarize_second` mais a duração
+    # do balde; as contagens são do balde inteiro, não por segundo
+    def point(self):
+        return {
+            "second": self.start,
+            "span": self.span,
+            "requests": self.requests,
+            "successes": self.successes,
+            "server_errors": self.server_errors,
+            "timeouts": sum(self.error_counts[index] for index in TIMEOUT_CLASSES),
+            "mean": self.mean,
+            "p99": self.p99,
+        }
+
+# Série temporal de um teste com memória limitada: cada segundo encerrado
+# entra na resolução mais fina, e, quando uma resolução passa do número de
+# baldes, o período mais antigo da resolução seguinte (ex.: 10 segundos) sai
+# dela e é juntado num só balde da seguinte. Da resolução mais grossa, os
+# baldes mais antigos são descartados. As resoluções nunca se sobrepõem: a
+# série completa é a mais grossa, seguida das mais finas.
+class TimeSeries:
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [(span, capacity, collections.deque()) for span, capacity in tiers]
+        self.first_second = None
+        self.total_requests = 0
+        # Requisições dos baldes descartados da resolução mais grossa
+        self.dropped_requests = 0
+        self._points = None
+
+    def __len__(self):
+        return sum(len(buckets) for _, _, buckets in self.tiers)
+
+    # Segundos em ordem crescente (ver LiveSeries.pop_closed)
+    def add(self, second, group):
+        if self.first_second is None:
+            self.first_second = second
+        self.total_requests += group.total_requests
+        self._push(0, TimeBucket.from_group(second, group))
+        self._points = None
+
+    def _push(self, level, bucket):
+        _, capacity, buckets = self.tiers[level]
+        buckets.append(bucket)
+        while len(buckets) > capacity:
+            if level + 1 == len(self.tiers):
+                self.dropped_requests += buckets.popleft().requests
+                continue
+            span = self.tiers[level + 1][0]
+            period_end = (buckets[0].start // span + 1) * span
+            period = []
+            while buckets and buckets[0].start < period_end:
+                period.append(buckets.popleft())
+            self._push(level + 1, TimeBucket.merged(period))
+
+    def buckets(self):
+        for _, _, buckets in reversed(self.tiers):
+            yield from buckets
+
+    # Pontos da série, do mais antigo ao mais recente (ver `TimeBucket.point`)
+    def points(self):
+        if self._points is None:
+            self._points = [bucket.point() for bucket in self.buckets()]
+        return self._points
+
+    # Requisições, sucessos e histograma dos últimos `seconds` segundos até o
+    # último segundo da série, pelos baldes mais finos que cobrem o intervalo
+    def rolling(self, seconds):
+        buckets = list(self.buckets())
+        if not buckets:
+            return None
+        end = buckets[-1].start + buckets[-1].span
+        window = [bucket for bucket in buckets if bucket.start >= end - seconds]
+        if not window:
+            window = buckets[-1:]
+        merged = TimeBucket.merged(window)
+        return {"seconds": end - merged.start, "requests": merged.requests, "successes": merged.successes,
+                "server_errors": merged.server_errors, "mean": merged.mean, "p99": merged.p99}
@@ -0,0 +1,147 @@
+import math
+import time
+import random
+import asyncio
+import httpx
+
+from .client import req_get_async, session_cookies
+from .groups import GroupResult, WindowedGroups
+from .profiles import make_profile, make_stage, profile_duration, profile_value_at
+from .scheduler import stop_requested
+
+# Intervalo (s) com que o controlador ajusta o número de usuários, verifica o
+# pedido de parada e mede a concorrência
+CONTROL_INTERVAL = 0.1
+
+# Modelo fechado: cada usuário virtual repete requisição → tempo de pensar →
+# requisição, então a vazão depende do tempo de resposta (lei de Little:
+# usuários = vazão × (tempo de resposta + tempo de pensar)).
+# Parâmetros, guardados no plano (ver `make_plan`):
+#   profile     número de usuários ao longo do teste, nos mesmos estágios do
+#               perfil de carga (ver engine.profiles), com usuários no lugar da
+#               taxa: rampa de subida, platô, descida...
+#   think_time  distribuição do tempo de pensar (ver `make_think_time`)
+#   sessions    cada usuário tem os seus cookies (sessão própria); sem
+#               sessões, os cookies são os do cliente, compartilhados
+def make_users(profile, think_time=None, sessions=True):
+    return {"profile": profile, "think_time": think_time or make_think_time(), "sessions": sessions}
+
+def ramp_users(users, ramp_up, hold, ramp_down=0):
+    stages = [make_stage(ramp_up, users), make_stage(hold, users)]
+    if ramp_down:
+        stages.append(make_stage(ramp_down, 0))
+    return make_profile(0, stages)
+
+# Distribuições do tempo de pensar (s):
+#   constant     sempre `mean`
+#   uniform      uniforme entre mean - spread e mean + spread
+#   exponential  exponencial com média `mean` (chegadas sem memória)
+#   normal       normal com média `mean` e desvio padrão `spread`, sem valores negativos
+THINK_DISTRIBUTIONS = ("constant", "uniform", "exponential", "normal")
+
+def make_think_time(distribution="constant", mean=1.0, spread=0.0):
+    if distribution not in THINK_DISTRIBUTIONS:
+        raise ValueError("Distribuição desconhecida: {}".format(distribution))
+    if mean < 0 or spread < 0:
+        raise ValueError("O tempo de pensar não pode ser negativo")
+    return {"distribution": distribution, "mean": mean, "spread": spread}
+
+# Função sem argumentos que sorteia um tempo de pensar
+def think_time_sampler(think_time):
+    distribution, mean, spread = think_time["distribution"], think_time["mean"], think_time["spread"]
+    if distribution == "uniform":
+        low = max(0.0, mean - spread)
+        return lambda: random.uniform(low, mean + spread)
+    if distribution == "exponential":
+        return (lambda: random.expovariate(1 / mean)) if mean > 0 else (lambda: 0.0)
+    if distribution == "normal":
+        return lambda: max(0.0, random.gauss(mean, spread))
+    return lambda: mean
+
+# Usuários virtuais de um processo: os de índice part, part + parts, ... do
+# total previsto pelo perfil, de modo que a união dos processos (ou agentes)
+# é o perfil inteiro. Cada usuário é uma tarefa do loop de eventos com, no
+# máximo, um jar de cookies próprio, então dezenas de milhares cabem em um processo.
+# Os resultados vão para grupos de `window` segundos (pelo início da
+# requisição), cada um com a média de usuários ativos na janela (`users`);
+# as janelas antigas são juntadas em grupos maiores (ver WindowedGroups).
+class VirtualUsers:
+    def __init__(self, client, url, users, window, start_ns, stop=None, part=0, parts=1):
+        self.client = client
+        self.url = url
+        self.profile = users["profile"]
+        self.duration = profile_duration(self.profile)
+        self.sessions = users["sessions"]
+        self.think = think_time_sampler(users["think_time"])
+        self.window_ns = window * 1e9
+        self.start_ns = start_ns
+        self.end_ns = start_ns + round(self.duration * 1e9)
+        self.stop = stop
+        self.part = part
+        self.parts = parts
+        self.windows = WindowedGroups(lambda: GroupResult(users=0.0))
+        # Usuários (deste processo) que devem estar ativos agora
+        self.target = 0
+        self.running = True
+        self.tasks = []
+        # Usuários no tempo de pensar, que podem ser cancelados na parada
+        self.thinking = set()
+
+    def _group(self, at_ns):
+        return self.windows.group_at(max(0, int((at_ns - self.start_ns) // self.window_ns)))
+
+    # Usuários deste processo entre os `total` do perfil
+    def _share(self, total):
+        return max(0, math.ceil((total - self.part) / self.parts))
+
+    async def _user(self, index):
+        if self.sessions:
+            session_cookies.set(httpx.Cookies())
+        task = asyncio.current_task()
+        while self.running and index < self.target:
+            start_ns = time.perf_counter_ns()
+            if start_ns >= self.end_ns:
+                break
+            response, duration = await req_get_async(self.client, self.url)
+            self._group(start_ns).add_result(response, duration)
+            if not (self.running and index < self.target):
+                break
+            self.thinking.add(task)
+            try:
+                await asyncio.sleep(self.think())
+            finally:
+                self.thinking.discard(task)
+
+    async def run(self):
+        recorder = getattr(self.client, "recorder", None)
+        if recorder is not None:
+            recorder.set_windows(self.start_ns, self.window_ns / 1e9)
+        await asyncio.sleep(max(0, self.start_ns - time.perf_counter_ns()) / 1e9)
+        last_ns = self.start_ns
+        while True:
+            now_ns = time.perf_counter_ns()
+            elapsed = (now_ns - self.start_ns) / 1e9
+            active = sum(1 for task in self.tasks if not task.done())
+            # Concorrência medida: usuários ativos × tempo, somados na janela do intervalo
+            self._group(last_ns).users += active * (now_ns - last_ns) / self.window_ns
+            last_ns = now_ns
+            if elapsed >= self.duration or stop_requested(self.stop):
+                break
+            self.target = self._share(math.floor(profile_value_at(self.profile, elapsed) + 1e-9))
+            # Usuários que saíram (descida do perfil) são recriados quando o número volta a subir
+            for index, task in enumerate(self.tasks[:self.target]):
+                if task.done():
+                    self.tasks[index] = asyncio.create_task(self._user(index))
+            while len(self.tasks) < self.target:
+                self.tasks.append(asyncio.create_task(self._user(len(self.tasks))))
+            await asyncio.sleep(CONTROL_INTERVAL)
+
+        # Fim: quem está pensando é cancelado; as requisições em andamento são aguardadas
+        self.running = False
+        for task in list(self.thinking):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        return self.windows.groups
+
+async def run_virtual_users(client, url, users, window, start_ns=None, stop=None, part=0, parts=1):
+    return await VirtualUsers(client, url, users, window, start_ns or time.perf_counter_ns(), stop, part, parts).run()
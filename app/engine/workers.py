@@ -0,0 +1,324 @@
+import time
+import queue
+import asyncio
+import traceback
+import functools
+import multiprocessing as mp
+from threading import BrokenBarrierError
+
+from .client import make_client
+from .scenario import compile_scenario
+from .profiles import LoadProfile, plan_profile, profile_duration
+from .users import run_virtual_users
+from .executor import DEFAULT_MAX_IN_FLIGHT, bounded_executor
+from .groups import GroupResult, merge_window_lists, run_burst_group, run_open_loop_group, run_windowed_open_loop
+from .live import live_monitor
+from .records import request_recorder
+from .scheduler import sleep_until, stop_requested
+
+# Antecedência com que o coordenador marca o início de cada grupo, para que
+# todos os processos comecem no mesmo instante
+START_LEAD_NS = 50_000_000
+# Tempo máximo para os processos ficarem prontos (importações, criação do cliente)
+STARTUP_TIMEOUT = 60
+
+# Plano de um teste, compartilhado por páginas, processos e agentes:
+#   url, num_requests (primeiro grupo), increment (0 no teste de carga),
+#   qtty_of_groups (None = até o coordenador parar), delay_in_seconds e
+#   window (None = rajada; em segundos = malha aberta), client_options
+#   (opções do cliente HTTP, ver `make_client_options`), max_in_flight
+#   (limite de requisições em andamento por processo, padrão
+#   DEFAULT_MAX_IN_FLIGHT; None = sem limite),
+#   live (publicar agregados por segundo durante o teste),
+#   rate e duration (malha aberta contínua em vez de grupos, separada em
+#   janelas de `window` segundos), min_success_rate (encerra quando a taxa
+#   de sucesso de um grupo fica abaixo dela; teste de estresse) e records
+#   (pasta onde cada processo grava uma linha por requisição; ver engine.records).
+#   Com capacity (ver `make_capacity`), o tamanho de cada grupo vem da busca da
+#   maior taxa sustentável, com grupos em malha aberta de `window` segundos.
+#   rules são os critérios de parada e aprovação (ver `make_rule`), avaliados
+#   pelo executor de testes sobre a série por segundo. Com scenario (ver
+#   `make_scenario`), cada requisição é sorteada do cenário, com os caminhos
+#   relativos à url. feed (ver `make_feed`) é a massa de dados cujas colunas
+#   são usadas nos modelos do cenário ou, sem cenário, na própria url.
+#   Com profile (ver `make_profile`), a malha aberta contínua segue o perfil de
+#   carga, e rate e duration passam a ser a taxa média e a duração do perfil.
+#   Com users (ver `make_users`), o teste é de usuários virtuais (modelo
+#   fechado), em grupos de `window` segundos, e duration é a do perfil de usuários.
+def make_plan(url, num_requests=0, increment=0, qtty_of_groups=None, delay_in_seconds=0, window=None, client_options=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, live=False,
+              rate=None, duration=None, min_success_rate=None, records=None, capacity=None, rules=None, scenario=None, feed=None, profile=None, users=None):
+    if profile:
+        rate, duration = LoadProfile(profile).mean_rate, profile_duration(profile)
+    if users:
+        duration = profile_duration(users["profile"])
+    return {
+        "url": url,
+        "num_requests": num_requests,
+        "increment": increment,
+        "qtty_of_groups": qtty_of_groups,
+        "delay_in_seconds": delay_in_seconds,
+        "window": window,
+        "client_options": client_options,
+        "max_in_flight": max_in_flight,
+        "live": live,
+        "rate": rate,
+        "duration": duration,
+        "min_success_rate": min_success_rate,
+        "records": records,
+        "capacity": capacity,
+        "rules": rules or [],
+        "scenario": scenario,
+        "feed": feed,
+        "profile": profile,
+        "users": users,
+    }
+
+def group_size(plan, index):
+    return plan["num_requests"] + index * plan["increment"]
+
+# Tamanhos dos grupos de um plano sem busca de capacidade: `next_size(índice)`
+# devolve o tamanho do grupo ou None quando não há mais grupos
+def planned_sizes(plan):
+    def next_size(index):
+        if plan["qtty_of_groups"] is not None and index >= plan["qtty_of_groups"]:
+            return None
+        return group_size(plan, index)
+    return next_size
+
+# Parte do grupo que cabe a cada processo
+def split_share(num_requests, worker_id, num_workers):
+    return num_requests // num_workers + (1 if worker_id < num_requests % num_workers else 0)
+
+# Executa no processo a parte que lhe cabe de um grupo. No modo de malha aberta,
+# os instantes de cada processo são defasados para que a união dos envios fique
+# uniformemente distribuída na janela. Quando `stop` é acionado, o grupo é
+# interrompido no próximo disparo e volta com as requisições já concluídas.
+async def run_group_share(client, plan, index, worker_id, num_workers, start_ns, executor=None, num_requests=None, stop=None):
+    if num_requests is None:
+        num_requests = group_size(plan, index)
+    share = split_share(num_requests, worker_id, num_workers)
+    if client.recorder is not None:
+        client.recorder.group = index
+    if not share:
+        return GroupResult()
+    if plan["window"]:
+        phase_ns = round(worker_id * plan["window"] / num_requests * 1e9)
+        return await run_open_loop_group(client, plan["url"], share, plan["window"], start_ns + phase_ns, executor, stop)
+    await sleep_until(start_ns)
+    return await run_burst_group(client, plan["url"], share, executor, stop)
+
+# Agregados por segundo do processo, enviados ao coordenador pela fila de mensagens
+def _second_publisher(worker_id, plan, messages):
+    if not plan.get("live"):
+        return None
+    return lambda second, group: messages.put(("second", worker_id, second, group))
+
+# Espera os outros processos na barreira numa thread, sem bloquear o loop de
+# eventos: o monitor ao vivo e as conexões abertas continuam sendo atendidos
+async def _wait_barrier(barrier):
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+
+async def _group_worker_loop(worker_id, num_workers, plan, messages, barrier, stop, start_at, num_requests):
+    async with make_client(plan.get("client_options"), compile_scenario(plan, worker_id, num_workers)) as client, \
+            live_monitor(client, _second_publisher(worker_id, plan, messages)), \
+            request_recorder(client, plan.get("records"), worker_id), \
+            bounded_executor(client, plan.get("max_in_flight")) as executor:
+        index = 0
+        while True:
+            await _wait_barrier(barrier)
+            if stop.is_set():
+                return
+            group = await run_group_share(client, plan, index, worker_id, num_workers, start_at.value, executor, num_requests.value, stop)
+            messages.put(("group", worker_id, index, group))
+            index += 1
+
+async def _open_loop_worker_loop(worker_id, num_workers, plan, messages, barrier, stop, start_at, num_requests):
+    async with make_client(plan.get("client_options"), compile_scenario(plan, worker_id, num_workers)) as client, \
+            live_monitor(client, _second_publisher(worker_id, plan, messages)), \
+            request_recorder(client, plan.get("records"), worker_id), \
+            bounded_executor(client, plan.get("max_in_flight")) as executor:
+        await _wait_barrier(barrier)
+        rate = plan["rate"]
+        # Com perfil de carga, a fatia do perfil já intercala os instantes dos processos
+        profile = plan_profile(plan, worker_id, num_workers)
+        groups, intended_rate, achieved_rate, max_dispatch_lag = await run_windowed_open_loop(
+            client, plan["url"], rate / num_workers, plan["duration"], plan["window"],
+            start_at.value + (0 if profile else round(worker_id / rate * 1e9)), executor, stop, profile)
+    for index, group in enumerate(groups):
+        messages.put(("group", worker_id, index, group))
+    messages.put(("done", worker_id, intended_rate, achieved_rate, max_dispatch_lag))
+
+async def _users_worker_loop(worker_id, num_workers, plan, messages, barrier, stop, start_at, num_requests):
+    async with make_client(plan.get("client_options"), compile_scenario(plan, worker_id, num_workers)) as client, \
+            live_monitor(client, _second_publisher(worker_id, plan, messages)), \
+            request_recorder(client, plan.get("records"), worker_id):
+        await _wait_barrier(barrier)
+        groups = await run_virtual_users(client, plan["url"], plan["users"], plan["window"], start_at.value, stop, worker_id, num_workers)
+    for index, group in enumerate(groups):
+        messages.put(("group", worker_id, index, group))
+    messages.put(("done", worker_id))
+
+def _worker_main(loop_function, worker_id, num_workers, plan, messages, barrier, stop, start_at, num_requests):
+    try:
+        asyncio.run(loop_function(worker_id, num_workers, plan, messages, barrier, stop, start_at, num_requests))
+    except BrokenBarrierError:
+        pass
+    except Exception:
+        messages.put(("error", worker_id, traceback.format_exc()))
+        barrier.abort()
+
+def _mark_start(start_at):
+    start_at.value = time.perf_counter_ns() + START_LEAD_NS
+
+# Conjunto de processos geradores, cada um com seu próprio loop de eventos e httpx.AsyncClient.
+# Os agregados por segundo vão para `on_second`; acionar `stop` (threading.Event)
+# interrompe o grupo em andamento no próximo disparo e encerra os processos.
+class WorkerPool:
+    def __init__(self, loop_function, plan, num_workers, on_second=None, stop=None):
+        ctx = mp.get_context("spawn")
+        self.num_workers = num_workers
+        self.on_second = on_second
+        self.external_stop = stop
+        self.messages = ctx.Queue()
+        self.stop = ctx.Event()
+        self.start_at = ctx.Value("q", 0)
+        # Tamanho do próximo grupo, definido pelo coordenador antes de liberar os processos
+        self.num_requests = ctx.Value("q", 0)
+        # O instante de início é marcado quando todos chegam à barreira, e não
+        # antes: na primeira vez, os processos ainda podem estar inicializando
+        self.barrier = ctx.Barrier(num_workers + 1, action=functools.partial(_mark_start, self.start_at))
+        self.processes = [
+            ctx.Process(target=_worker_main, daemon=True,
+                        args=(loop_function, worker_id, num_workers, plan, self.messages, self.barrier, self.stop, self.start_at, self.num_requests))
+            for worker_id in range(num_workers)
+        ]
+
+    def __enter__(self):
+        for process in self.processes:
+            process.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is not None:
+            self.stop.set()
+            self.barrier.abort()
+        # Um processo só termina depois de entregar o que pôs na fila, então as
+        # últimas mensagens (agregados por segundo) são lidas enquanto os processos encerram
+        deadline = time.monotonic() + 5
+        while any(process.is_alive() for process in self.processes) and time.monotonic() < deadline:
+            try:
+                message = self.messages.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if message[0] == "second" and self.on_second is not None:
+                self.on_second(message[2], message[3])
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    # Libera todos os processos para começarem no mesmo instante
+    def release(self):
+        try:
+            self.barrier.wait(timeout=STARTUP_TIMEOUT)
+        except BrokenBarrierError:
+            self._raise_worker_error()
+            raise RuntimeError("Os processos geradores não ficaram prontos a tempo")
+
+    def receive(self):
+        while True:
+            if stop_requested(self.external_stop):
+                self.stop.set()
+            try:
+                message = self.messages.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self.processes):
+                    raise RuntimeError("Os processos geradores foram encerrados inesperadamente")
+                continue
+            if message[0] == "error":
+                raise RuntimeError("Erro no processo gerador {}:\n{}".format(message[1], message[2]))
+            if message[0] == "second":
+                if self.on_second is not None:
+                    self.on_second(message[2], message[3])
+                continue
+            return message
+
+    def _raise_worker_error(self):
+        try:
+            message = self.messages.get_nowait()
+        except queue.Empty:
+            return
+        if message[0] == "error":
+            raise RuntimeError("Erro no processo gerador {}:\n{}".format(message[1], message[2]))
+
+# Teste em grupos distribuído entre `num_workers` processos. A cada grupo, os
+# resumos de todos os processos são somados e entregues a `on_group`; se ele
+# retornar False, o teste é encerrado (usado pela condição de parada do teste
+# de estresse), assim como quando `stop` é acionado. `next_size(índice)` dá o
+# tamanho de cada grupo (por padrão, o do plano; ver `planned_sizes`).
+def run_group_pool(plan, num_workers, on_group, on_second=None, stop=None, next_size=None):
+    next_size = next_size or planned_sizes(plan)
+    with WorkerPool(_group_worker_loop, plan, num_workers, on_second, stop) as pool:
+        index = 0
+        while True:
+            num_requests = next_size(index)
+            if num_requests is None:
+                pool.stop.set()
+            else:
+                pool.num_requests.value = num_requests
+            if stop_requested(stop):
+                pool.stop.set()
+            pool.release()
+            if pool.stop.is_set():
+                break
+
+            group = GroupResult()
+            for _ in range(num_workers):
+                group.merge(pool.receive()[3])
+            index += 1
+
+            if on_group(group) is False:
+                pool.stop.set()
+            elif plan["delay_in_seconds"] and stop is not None:
+                stop.wait(plan["delay_in_seconds"])
+            elif plan["delay_in_seconds"]:
+                time.sleep(plan["delay_in_seconds"])
+
+# Teste em malha aberta contínuo distribuído entre processos: cada processo
+# dispara a uma fração da taxa alvo, com os instantes intercalados.
+# Retorna os grupos (janelas) somados e as taxas pretendida e atingida.
+# Os grupos de cada processo chegam em ordem e são juntados por janela no fim
+# (ver `merge_window_lists`).
+def run_open_loop_pool(url, rate, duration, window, num_workers, client_options=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, on_second=None, stop=None, records=None, scenario=None, feed=None, profile=None):
+    plan = {"url": url, "rate": rate, "duration": duration, "window": window, "client_options": client_options,
+            "max_in_flight": max_in_flight, "live": on_second is not None, "records": records, "scenario": scenario, "feed": feed, "profile": profile}
+    lists = [[] for _ in range(num_workers)]
+    intended_rate = achieved_rate = max_dispatch_lag = 0
+    with WorkerPool(_open_loop_worker_loop, plan, num_workers, on_second, stop) as pool:
+        pool.release()
+        done = 0
+        while done < num_workers:
+            message = pool.receive()
+            if message[0] == "done":
+                done += 1
+                intended_rate += message[2]
+                achieved_rate += message[3]
+                max_dispatch_lag = max(max_dispatch_lag, message[4])
+                continue
+            lists[message[1]].append(message[3])
+    return merge_window_lists(lists), intended_rate, achieved_rate, max_dispatch_lag
+
+# Usuários virtuais distribuídos entre processos: cada processo executa uma
+# fatia dos usuários do perfil. Retorna os grupos (janelas) somados.
+def run_users_pool(plan, num_workers, on_second=None, stop=None):
+    lists = [[] for _ in range(num_workers)]
+    with WorkerPool(_users_worker_loop, plan, num_workers, on_second, stop) as pool:
+        pool.release()
+        done = 0
+        while done < num_workers:
+            message = pool.receive()
+            if message[0] == "done":
+                done += 1
+                continue
+            lists[message[1]].append(message[3])
+    return merge_window_lists(lists)
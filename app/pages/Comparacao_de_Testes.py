@@ -0,0 +1,159 @@
+import os
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from engine.artifacts import RESULTS_DIR, RunArtifact, list_artifacts
+from engine.analysis import second_series, mean_throughput
+from engine.compare import DEFAULT_ALPHA, DEFAULT_MIN_CHANGE, DEFAULT_MAX_ERROR_INCREASE, compare_runs, has_regression, plan_differences
+
+# Percentis exibidos na curva de latência de cada teste
+CURVE_PERCENTILES = (10, 25, 50, 75, 90, 95, 99, 99.9, 99.99)
+
+# Arquivos de resultado lidos uma vez por sessão (o conteúdo de um arquivo não muda)
+@st.cache_data(max_entries=50)
+def load_artifact_bytes(path, modified):
+    with open(path, "rb") as file:
+        return file.read()
+
+def load_artifact(path):
+    return RunArtifact.from_bytes(load_artifact_bytes(path, os.path.getmtime(path)), path)
+
+def artifact_label(path):
+    try:
+        return load_artifact(path).label
+    except (OSError, ValueError):
+        return path
+
+# Uma linha por teste: estado, volume e percentis do teste inteiro
+def show_summary_table(runs):
+    rows = []
+    for name, run in runs:
+        analysis = run.results.analysis()
+        summary = analysis.summary
+        total = analysis.total_requests
+        rows.append({
+            "Teste": name,
+            "Estado": run.status,
+            "Critérios": {True: "Aprovado", False: "Reprovado", None: "—"}[run.passed],
+            "Requisições": total,
+            "Sucesso (%)": 100 * analysis.success_rate if total else None,
+            "Vazão (req/s)": mean_throughput(run.seconds),
+            "Média (s)": summary["mean"],
+            "p50 (s)": summary["p50"],
+            "p90 (s)": summary["p90"],
+            "p99 (s)": summary["p99"],
+            "p99.9 (s)": summary["p99.9"],
+            "Máximo (s)": summary["max"],
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def plot_latency_curves(runs):
+    fig = go.Figure()
+    labels = ["p{:g}".format(p) for p in CURVE_PERCENTILES]
+    for name, run in runs:
+        values = run.results.merged_histogram().percentiles(CURVE_PERCENTILES)
+        fig.add_trace(go.Scatter(x=labels, y=[values[p] / 1e9 for p in CURVE_PERCENTILES], mode='lines+markers', name=name))
+    fig.update_layout(xaxis_title="Percentil", yaxis_title="Tempo de resposta (s)", yaxis_type="log",
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.4, xanchor="center", x=0.5))
+    st.plotly_chart(fig)
+
+def plot_throughput_series(runs):
+    fig = go.Figure()
+    for name, run in runs:
+        series = second_series(run.seconds)
+        fig.add_trace(go.Scatter(x=series["second"], y=series["requests"], mode='lines', name=name))
+    fig.update_layout(xaxis_title="Tempo (s)", yaxis_title="Requisições por segundo",
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.4, xanchor="center", x=0.5))
+    st.plotly_chart(fig)
+
+def format_value(metric, value):
+    if value is None:
+        return "—"
+    if metric == "error_rate":
+        return "{:.2f}%".format(value * 100)
+    if metric in ("throughput", "capacity"):
+        return "{:.1f}".format(value)
+    return "{:.1f} ms".format(value * 1000)
+
+def show_comparisons(comparisons):
+    rows = []
+    for comparison in comparisons:
+        metric = comparison["metric"]
+        change = "{:+.2f} p.p.".format(comparison["change"] * 100) if metric == "error_rate" else "{:+.1%}".format(comparison["change"])
+        interval = comparison["interval"]
+        rows.append({
+            "Métrica": comparison["label"],
+            "Referência": format_value(metric, comparison["baseline"]),
+            "Candidato": format_value(metric, comparison["candidate"]),
+            "Variação": change,
+            "IC da variação": "[{:+.1%}, {:+.1%}]".format(*interval) if interval else "—",
+            "p-valor": "{:.3g}".format(comparison["p_value"]) if comparison["p_value"] is not None else "—",
+            "Regressão": "Sim" if comparison["regression"] else "Não",
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+# Interface da página
+def run_comparison_page():
+    st.set_page_config(page_title="Comparação de Testes", page_icon="⚖️", layout="centered")
+
+    st.title("Comparação de Testes")
+    st.write("Cada teste encerrado é gravado como um arquivo de resultado (plano, histogramas de cada grupo e série por segundo) em `{}`. Escolha um teste de referência e os testes a comparar com ele, ou envie arquivos gravados em outra máquina (ex.: pelo CI, com `python -m engine.cli`).".format(RESULTS_DIR))
+
+    paths = list_artifacts()
+    selected = st.multiselect("Testes gravados:", paths, format_func=artifact_label, default=paths[:2][::-1])
+    uploads = st.file_uploader("Arquivos de resultado:", type=["gz"], accept_multiple_files=True)
+
+    runs = []
+    for path in selected:
+        try:
+            runs.append((artifact_label(path), load_artifact(path)))
+        except (OSError, ValueError) as error:
+            st.error("Não foi possível ler {}: {}".format(path, error))
+    for upload in uploads or []:
+        try:
+            run = RunArtifact.from_bytes(upload.getvalue(), upload.name)
+            runs.append(("{} ({})".format(run.label, upload.name), run))
+        except (OSError, ValueError) as error:
+            st.error("Não foi possível ler {}: {}".format(upload.name, error))
+    runs.sort(key=lambda item: item[1].started_at)
+    if len(runs) < 2:
+        st.info("Escolha ao menos dois testes.")
+        return
+
+    baseline_index = st.selectbox("Teste de referência:", range(len(runs)), format_func=lambda index: runs[index][0], help="Os demais testes são comparados com este, e uma piora em relação a ele é apontada como regressão.")
+    with st.expander("Critérios de regressão"):
+        alpha = st.number_input("Nível de significância:", min_value=0.001, max_value=0.5, value=DEFAULT_ALPHA, step=0.01, format="%.3f",
+                                help="Uma piora só é apontada quando a chance de ela ser apenas variação aleatória é menor que este valor.")
+        min_change = st.number_input("Piora relativa mínima (%):", min_value=0.0, value=DEFAULT_MIN_CHANGE * 100,
+                                     help="Diferenças menores que esta, mesmo que significativas, não são regressões. Evita apontar variações irrelevantes em testes com muitas requisições.") / 100
+        max_error_increase = st.number_input("Aumento máximo das falhas (pontos percentuais):", min_value=0.0, value=DEFAULT_MAX_ERROR_INCREASE * 100) / 100
+
+    st.markdown("### Resumo dos testes")
+    show_summary_table(runs)
+
+    st.markdown("### Percentis do tempo de resposta")
+    st.write("Curva de percentis de cada teste, em escala logarítmica: uma curva acima da outra indica um teste mais lento, e a distância entre elas na cauda (p99 e acima) mostra onde a piora se concentra.")
+    plot_latency_curves(runs)
+
+    st.markdown("### Vazão ao longo do teste")
+    plot_throughput_series(runs)
+
+    st.markdown("### Regressões em relação à referência")
+    st.write("A distribuição do tempo de resposta é comparada pelo teste de Mann-Whitney sobre os histogramas inteiros; os percentis, por intervalos de confiança bootstrap da variação; a vazão, pelo teste de Mann-Whitney sobre as requisições por segundo; e as falhas, pelo teste de duas proporções.")
+    baseline = runs[baseline_index][1]
+    for index, (name, run) in enumerate(runs):
+        if index == baseline_index:
+            continue
+        st.markdown("#### {}".format(name))
+        differences = plan_differences(baseline.plan, run.plan)
+        if differences:
+            st.warning("Os planos dos testes diferem em: {}. A comparação pode refletir a mudança de carga, e não do servidor.".format(", ".join(differences)))
+        comparisons = compare_runs(baseline, run, alpha, min_change, max_error_increase, seed=0)
+        if has_regression(comparisons):
+            st.error("Regressão em: {}.".format(", ".join(comparison["label"] for comparison in comparisons if comparison["regression"])))
+        else:
+            st.success("Nenhuma regressão significativa.")
+        show_comparisons(comparisons)
+
+# Inicializar a página
+run_comparison_page()
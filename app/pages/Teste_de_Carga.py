@@ -1,103 +1,45 @@
-import time
-import httpx
-import asyncio
+import os
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-
-# Armazenar os resultados
-group_durations = []
-success_counts_per_group = []
-group_means = []
-group_std_devs = []
-
-# Mensagens sobre a url
-def performance(response_time):
-    if response_time < 0.5:
-        return st.success('Latência Baixa: Tempo de resposta menor que 0.5 s (Tempo médio de resposta: {:.2f} s)'.format(response_time))
-    elif 0.5 <= response_time < 1:
-        return st.warning('Latência Moderada: Tempo de resposta entre 0.5 s e 1 s (Tempo médio de resposta: {:.2f} s)'.format(response_time))
-    else:
-        return st.error('Latência Alta: Tempo de resposta maior que 1 s (Tempo médio de resposta: {:.2f} s)'.format(response_time))
-
-def consistency(std_dev):
-    if std_dev <= 0.1:
-        return st.success('Estável: Os tempos de resposta as requisições são regulares (Desvio padrão médio: {:.2f})'.format(std_dev))
-    else:
-        return st.error('Instável: Os tempos de resposta as requisições são irregulares (Desvio padrão médio: {:.2f})'.format(std_dev))
-
-def analyze_success_rates(success_counts_per_group, num_requests):
-    success_rates = [success_count / num_requests for success_count in success_counts_per_group]
-
-    all_above_80 = all(rate >= 0.8 for rate in success_rates)
-    some_below_80_and_above_50 = any(0.8 > rate >= 0.5 for rate in success_rates)
-    all_below_80_and_above_50 = all(0.8 > rate >= 0.5 for rate in success_rates)
-    some_below_50 = any(rate < 0.5 for rate in success_rates)
-    all_below_50 = all(rate < 0.5 for rate in success_rates)
-
-    if all_above_80:
-        st.success("Todos os grupos apresentam taxa de sucesso entre 80% e 100%.")
-    elif all_below_50:
-        st.error("Todos os grupos apresentam taxas de sucesso abaixo de 50%.")
-    elif some_below_50:
-        st.error("Alguns grupos apresentam taxas de sucesso abaixo de 50%.")
-    elif all_below_80_and_above_50:
-        st.warning("Todos os grupos apresentam taxas de sucesso entre 50% e 80%.")
-    elif some_below_80_and_above_50:
-        st.warning("Alguns grupos apresentam taxas de sucesso entre 50% e 80%.")
-
-    return success_rates
-
-# Realizar as requisições
-async def req_get_async(client, url):
-    try:
-        start = time.time()
-        response = await client.get(url)
-        end = time.time()
-        duration = end - start
-        return response, duration
-    except httpx.RequestError:
-        return None, None
-
-async def do_load_test(url, num_requests):
-    async with httpx.AsyncClient() as client:
-        tasks = [req_get_async(client, url) for _ in range(num_requests)]
-        return await asyncio.gather(*tasks)
-
-async def run_load_test(url, delay_in_seconds, num_requests, qtty_of_groups):
-    for i in range(qtty_of_groups):
-        results = await do_load_test(url, num_requests)
-
-        success_count = sum(1 for response, _ in results if response and response.status_code == 200)
-        success_counts_per_group.append(success_count)
-
-        durations_per_group = [duration for _, duration in results if duration is not None]
-
-        total_time = sum(durations_per_group)
-        group_durations.append(total_time)
-
-        if durations_per_group:
-            group_mean = total_time / len(durations_per_group)
-            group_std_dev = np.std(durations_per_group)
-        else:
-            group_mean = 0
-            group_std_dev = 0
-
-        group_means.append(group_mean)
-        group_std_devs.append(group_std_dev)
-
-        if delay_in_seconds:
-            await asyncio.sleep(delay_in_seconds)
-
-    return group_durations, success_counts_per_group, group_means, group_std_devs
-
-# Exibir os resultados
-def plot_mean_and_std_dev(group_means, group_std_devs):
+from engine.workers import make_plan
+from engine.executor import DEFAULT_MAX_IN_FLIGHT
+from engine.coordinator import parse_agents
+from engine.records import has_records
+from engine.runner import get_runner
+from engine.users import make_users, ramp_users, make_think_time
+from engine.profiles import LoadProfile, profile_points
+from ui import RUN_HISTORY_SIZE, analyze_success_rates, show_transfer_summary, show_queue_delays, show_connection_counts, group_axis, plot_phases_per_group, show_phase_table, show_percentiles, show_outcome_counts, show_request_records, plot_live_series, show_rolling_window, show_run_status, session_runs, remember_run, run_label, rules_form, rule_violation, show_rule_verdicts, scenario_form, feed_form, profile_form, plot_profile, client_options_form
+
+# Intervalo (s) de atualização do painel durante o teste
+LIVE_REFRESH_INTERVAL = 0.5
+
+# Critérios iniciais: (métrica, limite na unidade exibida, segundos seguidos, ação)
+DEFAULT_RULES = [
+    ("p99", 1000, 5, "fail"),
+    ("error_rate", 20, 5, "fail"),
+    ("error_rate", 50, 3, "stop"),
+]
+
+# Requisições previstas em cada grupo: fixas nos grupos em rajada, taxa × janela
+# na malha aberta e, no perfil de carga, as previstas pelo perfil em cada
+# janela. Com usuários virtuais, a vazão não é prevista: valem as enviadas.
+def planned_group_sizes(plan, results):
+    qtty_of_groups = len(results)
+    if plan.get("users"):
+        return results.total_requests
+    if plan.get("profile"):
+        sizes = LoadProfile(plan["profile"]).window_sizes(plan["window"])
+        return [sum(sizes[first:first + windows]) for first, windows in zip(results.window_starts, results.windows)]
+    if plan["rate"]:
+        return [round(plan["rate"] * plan["window"]) * windows for windows in results.windows]
+    return [plan["num_requests"]] * qtty_of_groups
+
+def plot_mean_and_std_dev(group_means, group_std_devs, axis):
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
-        x=list(range(1, len(group_means) + 1)),
+        x=axis["x"],
         y=group_means,
         error_y=dict(color='lightblue', type='data', array=group_std_devs),
         mode='lines+markers',
@@ -106,17 +48,36 @@ def plot_mean_and_std_dev(group_means, group_std_devs):
     ))
 
     fig.update_layout(
-        xaxis_title="Número do Grupo",
+        xaxis_title=axis["title"],
         yaxis_title="Tempo (s)",
     )
 
     st.plotly_chart(fig)
 
-def plot_total_time_per_group(group_durations):
+def plot_percentiles_per_group(analysis, axis):
+    fig = go.Figure()
+
+    for key, color in [("p50", "lightblue"), ("p90", "blue"), ("p99", "orange"), ("p99.9", "red")]:
+        fig.add_trace(go.Scatter(
+            x=axis["x"],
+            y=analysis.group_column(key),
+            mode='lines+markers',
+            name=key,
+            marker=dict(color=color, size=5),
+        ))
+
+    fig.update_layout(
+        xaxis_title=axis["title"],
+        yaxis_title="Tempo (s)",
+    )
+
+    st.plotly_chart(fig)
+
+def plot_total_time_per_group(group_durations, axis):
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
-        x=list(range(1, len(group_durations) + 1)),
+        x=axis["x"],
         y=group_durations,
         mode='lines+markers',
         name="Tempo Total por Grupo",
@@ -124,33 +85,35 @@ def plot_total_time_per_group(group_durations):
     ))
 
     fig.update_layout(
-        xaxis_title="Número do Grupo",
+        xaxis_title=axis["title"],
         yaxis_title="Tempo Total (s)",
     )
 
     st.plotly_chart(fig)
 
-def plot_success_counts_per_group(success_counts_per_group, qtty_of_groups, num_requests):
+def plot_success_counts_per_group(success_counts_per_group, planned_sizes, axis):
     fig = go.Figure()
+    # No eixo de tempo, a largura das barras fica a cargo do plotly (pelo espaçamento entre os grupos)
+    width = None if axis["time"] else 0.2
 
     fig.add_trace(go.Bar(
-        x=list(range(1, qtty_of_groups + 1)),
-        y=[num_requests] * qtty_of_groups,
+        x=axis["x"],
+        y=planned_sizes,
         name="Requisições Solicitadas",
         marker=dict(color='blue'),
-        width=0.2 
+        width=width
     ))
 
     fig.add_trace(go.Bar(
-        x=list(range(1, qtty_of_groups + 1)),
+        x=axis["x"],
         y=success_counts_per_group,
         name="Requisições Bem-Sucedidas",
         marker=dict(color='lightblue'),
-        width=0.2
+        width=width
     ))
 
     fig.update_layout(
-        xaxis_title="Número do Grupo",
+        xaxis_title=axis["title"],
         yaxis_title="Quantidade de Requisições",
         barmode='overlay',
         legend=dict(
@@ -164,18 +127,91 @@ def plot_success_counts_per_group(success_counts_per_group, qtty_of_groups, num_
 
     st.plotly_chart(fig)
 
-def show_results_table(group_means, group_std_devs, group_durations, success_counts_per_group, num_requests):
+def show_results_table(results, planned_sizes, group_times=None):
+    analysis = results.analysis()
     data = {
-        'Grupo': list(range(1, len(group_means) + 1)),
-        'Média (s)': group_means,
-        'Desvio Padrão (s)': group_std_devs,
-        'Tempo Gasto (s)': group_durations,
-        'Requisições Bem-Sucedidas': success_counts_per_group,
-        'Requisições Solicitadas': num_requests
+        'Grupo': list(range(1, len(results) + 1)),
+        'Média (s)': analysis.means,
+        'Desvio Padrão (s)': analysis.std_devs,
+        'p50 (s)': analysis.group_column("p50"),
+        'p90 (s)': analysis.group_column("p90"),
+        'p99 (s)': analysis.group_column("p99"),
+        'p99.9 (s)': analysis.group_column("p99.9"),
+        'Máximo (s)': analysis.maxima,
+        'Tempo Gasto (s)': analysis.durations,
+        'Requisições Bem-Sucedidas': analysis.successes,
+        'Requisições Solicitadas': planned_sizes,
+        'Conexões Abertas': results.new_connections,
+        'Conexões Reutilizadas': results.reused_connections,
+        'Espera Média na Fila (s)': [histogram.mean() / 1e9 for histogram in results.queue_histograms],
+        'Primeiro Byte Médio (s)': [histogram.mean() / 1e9 for histogram in results.ttfb_histograms],
+        'Bytes Recebidos': results.bytes_received,
     }
+    if any(users is not None for users in results.users):
+        data['Usuários (média)'] = results.users
+    if group_times is not None and len(group_times) == len(results):
+        data['Concluído em (s)'] = group_times
     df = pd.DataFrame(data)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
+# Reexecutado sozinho a cada LIVE_REFRESH_INTERVAL enquanto o teste roda; ao
+# fim do teste, a página inteira é refeita.
+@st.fragment(run_every=LIVE_REFRESH_INTERVAL)
+def show_live_run(run_id):
+    run = get_runner().get(run_id)
+    if run is None or not run.running:
+        st.rerun()
+    show_run_status(run)
+    for rule, breach in run.rules.verdicts():
+        if breach is not None:
+            st.warning("Critério violado: {}".format(rule_violation(run, rule, breach)))
+    show_rolling_window(run.series)
+    plot_live_series(run.seconds)
+    if run.results:
+        show_results_table(run.results, planned_group_sizes(run.plan, run.results), run.group_times)
+
+# Usuários virtuais (ver engine.users): rampa do número de usuários, tempo de
+# pensar e sessões, com a prévia do número de usuários ao longo do teste
+THINK_LABELS = {"constant": "Constante", "uniform": "Uniforme", "exponential": "Exponencial", "normal": "Normal"}
+
+def users_form():
+    col1, col2, col3, col4 = st.columns(4)
+    num_users = col1.number_input("Usuários:", min_value=1, value=50)
+    ramp_up = col2.number_input("Subida (s):", min_value=0.0, value=10.0, key="users_ramp_up")
+    hold = col3.number_input("Platô (s):", min_value=1.0, value=60.0, key="users_hold")
+    ramp_down = col4.number_input("Descida (s):", min_value=0.0, value=0.0, key="users_ramp_down")
+    col1, col2, col3 = st.columns(3)
+    distribution = col1.selectbox("Tempo de pensar:", list(THINK_LABELS), format_func=THINK_LABELS.get, help="Pausa de cada usuário entre a resposta e a próxima requisição. Uniforme: entre média − variação e média + variação. Exponencial: pausas sem memória, com a média informada. Normal: a variação é o desvio padrão.")
+    mean = col2.number_input("Média (s):", min_value=0.0, value=1.0)
+    spread = col3.number_input("Variação (s):", min_value=0.0, value=0.0, disabled=distribution in ("constant", "exponential"))
+    sessions = st.checkbox("Sessão por usuário (cookies próprios)", value=True, help="Cada usuário guarda os cookies que recebe, como um navegador. Sem sessões, os cookies ficam no cliente e são compartilhados por todos os usuários.")
+    profile = ramp_users(num_users, ramp_up, hold, ramp_down)
+    points = profile_points(profile)
+    fig = go.Figure(go.Scatter(x=[t for t, _ in points], y=[users for _, users in points], mode="lines+markers", name="Usuários"))
+    fig.update_layout(xaxis_title="Tempo (s)", yaxis_title="Usuários ativos", height=300, margin=dict(t=20))
+    st.plotly_chart(fig, key="users_preview")
+    return make_users(profile, make_think_time(distribution, mean, spread), sessions)
+
+# Vazão × concorrência no modelo fechado: cada grupo é um ponto, comparado à
+# lei de Little, vazão = usuários / (tempo de resposta + tempo de pensar)
+def plot_throughput_vs_users(plan, results):
+    window = plan["window"]
+    think_mean = plan["users"]["think_time"]["mean"]
+    analysis = results.analysis()
+    points = [(users, total / window, mean) for users, total, mean in zip(results.users, analysis.requests, analysis.means) if users]
+    if not points:
+        return
+    response_time = sum(total * mean for _, total, mean in points) / max(1, sum(total for _, total, _ in points))
+    max_users = max(users for users, _, _ in points)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[users for users, _, _ in points], y=[throughput for _, throughput, _ in points], mode="markers", name="Grupos"))
+    if response_time + think_mean > 0:
+        fig.add_trace(go.Scatter(x=[0, max_users], y=[0, max_users / (response_time + think_mean)], mode="lines", line=dict(dash="dash"),
+                                 name="Lei de Little (R = {:.3f} s, Z = {:.3f} s)".format(response_time, think_mean)))
+    fig.update_layout(xaxis_title="Usuários ativos (média no grupo)", yaxis_title="Vazão (req/s)",
+                      legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+    st.plotly_chart(fig)
+
 # Interface da página 
 def run_load_test_page():
     st.set_page_config(page_title="Teste de Carga", page_icon="🔃", layout="centered")
@@ -183,39 +219,155 @@ def run_load_test_page():
     st.title("Teste de Carga")
     
     url = st.text_input("Informe a URL para o teste:", "")
-    num_requests = st.number_input("Número de requisições por grupo:", min_value=1)
-    qtty_of_groups = st.number_input("Quantidade de grupos:", min_value=1)
-    delay_in_seconds = st.number_input("Delay entre grupos (segundos):", min_value=1)
-
-    start_button = st.button("Iniciar Teste de Carga", disabled=not url)
+    mode = st.radio("Modo de disparo:", ["Grupos em rajada", "Taxa constante (malha aberta)", "Perfil de carga", "Usuários virtuais"], horizontal=True, help="No perfil de carga, a taxa varia ao longo do teste (rampa, platô, pico, longa duração ou estágios personalizados), em malha aberta, com cada requisição disparada no seu instante previsto. Com usuários virtuais (modelo fechado), cada usuário repete requisição e tempo de pensar, e a vazão depende do tempo de resposta do servidor.")
+
+    profile = users = None
+    if mode == "Grupos em rajada":
+        num_requests = st.number_input("Número de requisições por grupo:", min_value=1)
+        qtty_of_groups = st.number_input("Quantidade de grupos:", min_value=1)
+        delay_in_seconds = st.number_input("Delay entre grupos (segundos):", min_value=0.0, value=1.0, step=0.001, format="%.3f")
+    elif mode == "Taxa constante (malha aberta)":
+        rate = st.number_input("Taxa alvo (requisições por segundo):", min_value=0.1, value=10.0)
+        duration = st.number_input("Duração do teste (segundos):", min_value=1, value=10)
+        window = st.number_input("Janela de cada grupo (segundos):", min_value=1, value=1)
+    elif mode == "Perfil de carga":
+        profile = profile_form()
+        window = st.number_input("Janela de cada grupo (segundos):", min_value=1, value=1)
+    else:
+        users = users_form()
+        window = st.number_input("Janela de cada grupo (segundos):", min_value=1, value=1)
+    num_workers = st.number_input("Processos geradores:", min_value=1, value=1, help="Acima de alguns milhares de requisições por segundo, a CPU do gerador se torna o gargalo. Com mais de um processo, as requisições são divididas entre processos, cada um com seu próprio loop de eventos e cliente HTTP. Use no máximo um processo por núcleo de CPU ({} nesta máquina).".format(os.cpu_count()))
+    max_in_flight = st.number_input("Máximo de requisições em andamento (0 = sem limite):", min_value=0, value=DEFAULT_MAX_IN_FLIGHT, help="Com um limite, as requisições passam por uma fila e um número fixo de trabalhadores as envia, mantendo a memória do gerador estável. O tempo de espera na fila é medido separadamente do tempo de resposta.") or None
+    records = st.checkbox("Registrar cada requisição", value=False, help="Grava uma linha por requisição (grupo, instantes previsto e real, tempo de resposta, status, bytes e classe de erro) em arquivos Parquet, em blocos, mantendo a memória constante mesmo com milhões de requisições. Não disponível na execução distribuída.")
+    rules = rules_form(DEFAULT_RULES)
+    scenario = scenario_form()
+    feed = feed_form()
+    client_options = client_options_form()
+    with st.expander("Execução distribuída"):
+        agents = parse_agents(st.text_area("Agentes (host:porta, separados por vírgula):", "", help="Cada máquina geradora deve executar `python -m engine.agent --host 0.0.0.0` a partir da pasta `app`, com o mesmo token secreto da variável `LOAD_TEST_AGENT_TOKEN` deste servidor. As requisições são divididas entre os agentes, que começam no mesmo instante e devolvem apenas os resumos de cada grupo."))
+
+    # O teste roda no executor de testes, fora da execução da página: interações
+    # com a página não o interrompem. A sessão guarda os identificadores dos
+    # últimos testes, e cada teste tem os seus próprios resultados.
+    runner = get_runner()
+    runs = session_runs("load_test_history")
+    latest = runs[-1] if runs else None
+    running = latest is not None and latest.running
+
+    col1, col2 = st.columns(2)
+    start_button = col1.button("Iniciar Teste de Carga", disabled=not url or running or client_options is None or scenario is False or feed is False or (mode == "Perfil de carga" and profile is None))
+    col2.button("Parar teste", disabled=not running, on_click=runner.stop, args=(latest.id if latest is not None else None,),
+                help="Encerra o teste em andamento: os disparos param, as requisições em andamento são aguardadas e os resultados parciais são mantidos.")
 
     if start_button:
-        with st.spinner("Executando o teste de carga..."):
-            group_durations, success_counts_per_group, group_means, group_std_devs = asyncio.run(run_load_test(url, delay_in_seconds, num_requests, qtty_of_groups))
-            
-            st.markdown("### Resultados do Teste de Carga")          
-
-            response_time_geral = np.mean(group_means)
-            std_dev_geral = np.mean(group_std_devs)
-            performance(response_time_geral)
-            consistency(std_dev_geral)
-            analyze_success_rates(success_counts_per_group, num_requests)
-
-            st.markdown("### Tempo médio de resposta com desvio padrão por grupo")	
-            st.write("Este gráfico mostra o tempo médio de resposta e a variação (desvio padrão) em cada grupo.")
-            plot_mean_and_std_dev(group_means, group_std_devs)
-
-            st.markdown("### Tempo gasto por grupo")
-            st.write("O gráfico exibe o tempo total gasto pelo servidor para processar todas as requisições de cada grupo, refletindo o esforço do servidor.")
-            plot_total_time_per_group(group_durations)
-            
-            st.markdown("### Requisições solicitadas e bem-sucedidas por grupo")
-            st.write("Este gráfico compara o número de requisições solicitadas com as bem-sucedidas em cada grupo, destacando a taxa de sucesso do servidor.")
-            plot_success_counts_per_group(success_counts_per_group, qtty_of_groups, num_requests)
-
-            st.markdown("### Tabela de resultados do Teste de Carga")
-            st.write("A tabela resume os resultados por grupo, incluindo tempos médios, variação, tempo total, requisições solicitadas e requisições bem-sucedidas, para avaliar o desempenho do servidor.")
-            show_results_table(group_means, group_std_devs, group_durations, success_counts_per_group, num_requests)
+        if mode == "Grupos em rajada":
+            plan = make_plan(url, num_requests, qtty_of_groups=qtty_of_groups, delay_in_seconds=delay_in_seconds, client_options=client_options, max_in_flight=max_in_flight, records=records, rules=rules, scenario=scenario, feed=feed)
+        elif users is not None:
+            plan = make_plan(url, window=window, users=users, client_options=client_options, max_in_flight=max_in_flight, records=records, rules=rules, scenario=scenario, feed=feed)
+        elif profile is not None:
+            plan = make_plan(url, window=window, profile=profile, client_options=client_options, max_in_flight=max_in_flight, records=records, rules=rules, scenario=scenario, feed=feed)
+        else:
+            plan = make_plan(url, rate=rate, duration=duration, window=window, client_options=client_options, max_in_flight=max_in_flight, records=records, rules=rules, scenario=scenario, feed=feed)
+        remember_run("load_test_history", runner.start(plan, num_workers, agents))
+        st.rerun()
+
+    if not runs:
+        return
+    run = latest
+    if len(runs) > 1:
+        run = runner.get(st.selectbox("Teste exibido:", [run.id for run in reversed(runs)], format_func=lambda run_id: run_label(runner.get(run_id)),
+                                      help="Os últimos {} testes da sessão ficam disponíveis.".format(RUN_HISTORY_SIZE)))
+
+    st.markdown("### Acompanhamento do teste")
+    if run.running:
+        show_live_run(run.id)
+        return
+    show_run_status(run)
+    plot_live_series(run.seconds)
+    if run.status == "failed":
+        st.error("O teste foi encerrado por um erro:")
+        st.code(run.error)
+        return
+    if run.stop_reason:
+        st.warning("Teste interrompido pelo critério {}. Resultados parciais até a parada:".format(run.stop_reason))
+    elif run.status == "stopped":
+        st.warning("Teste interrompido. Resultados parciais até a parada:")
+    if not run.groups:
+        st.info("Nenhum grupo foi concluído.")
+        return
+    show_load_test_results(run)
+
+# Resultados de um teste encerrado, com os parâmetros do plano com que foi iniciado
+def show_load_test_results(run):
+    plan = run.plan
+    results = run.results
+    analysis = results.analysis()
+    planned_sizes = planned_group_sizes(plan, results)
+    client_options = plan["client_options"]
+    max_in_flight = plan["max_in_flight"]
+
+    st.markdown("### Resultados do Teste de Carga")          
+    by_time = st.radio("Eixo horizontal dos gráficos por grupo:", ["Número do grupo", "Tempo do teste"], horizontal=True,
+                       help="Em testes longos (ex.: de resistência), os gráficos por grupo podem ser vistos em função do tempo desde o início do teste, pelo instante em que cada grupo foi concluído.") == "Tempo do teste"
+    axis = group_axis(run, by_time)
+
+    if plan["rate"]:
+        col1, col2, col3 = st.columns(3)
+        intended_rate, achieved_rate, max_dispatch_lag = run.rates
+        col1.metric("Taxa pretendida (req/s)", "{:.2f}".format(intended_rate))
+        col2.metric("Taxa atingida (req/s)", "{:.2f}".format(achieved_rate))
+        col3.metric("Atraso máximo de disparo (ms)", "{:.2f}".format(max_dispatch_lag * 1000) if max_dispatch_lag is not None else "—")
+    if plan.get("profile"):
+        st.markdown("#### Perfil de carga")
+        plot_profile(plan["profile"], "profile_results")
+    if plan.get("users"):
+        st.markdown("#### Vazão × concorrência (lei de Little)")
+        plot_throughput_vs_users(plan, results)
+
+    show_rule_verdicts(run)
+    analyze_success_rates(analysis, planned_sizes)
+    show_outcome_counts(analysis, client_options["success_statuses"], axis)
+    show_connection_counts(results)
+
+    st.markdown("### Percentis do tempo de resposta")
+    st.write("Percentis calculados sobre todas as requisições do teste. No modo de taxa constante, o tempo é medido a partir do instante previsto de envio, incluindo a espera causada por respostas lentas.")
+    show_percentiles(analysis.histogram)
+    if client_options["stream_bodies"]:
+        st.write("Tempo até o primeiro byte (recebimento dos cabeçalhos) e volume de dados recebidos.")
+        show_transfer_summary(results)
+    if max_in_flight:
+        st.write("Tempo que as requisições aguardaram na fila do executor antes de serem enviadas (não incluído no tempo de resposta, exceto no modo de taxa constante, em que o tempo é medido desde o instante previsto).")
+        show_queue_delays(results)
+
+    st.markdown("### Tempo médio de resposta com desvio padrão por grupo")	
+    st.write("Este gráfico mostra o tempo médio de resposta e a variação (desvio padrão) em cada grupo.")
+    plot_mean_and_std_dev(analysis.means, analysis.std_devs, axis)
+
+    st.markdown("### Percentis do tempo de resposta por grupo")
+    st.write("Este gráfico mostra a cauda da distribuição dos tempos de resposta (p50, p90, p99 e p99.9) em cada grupo.")
+    plot_percentiles_per_group(analysis, axis)
+
+    st.markdown("### Fases das requisições por grupo")
+    st.write("Tempo médio de cada fase por requisição: resolução de DNS, conexão TCP e negociação TLS (apenas quando uma conexão nova é aberta, diluídas entre todas as requisições do grupo), envio da requisição, espera pelo servidor até o primeiro byte e transferência do corpo. Um aumento nas fases de conexão indica troca excessiva de conexões; um aumento na espera do servidor indica lentidão no próprio servidor.")
+    plot_phases_per_group(results, axis)
+    show_phase_table(results)
+
+    st.markdown("### Tempo gasto por grupo")
+    st.write("O gráfico exibe o tempo total gasto pelo servidor para processar todas as requisições de cada grupo, refletindo o esforço do servidor.")
+    plot_total_time_per_group(analysis.durations, axis)
+    
+    st.markdown("### Requisições solicitadas e bem-sucedidas por grupo")
+    st.write("Este gráfico compara o número de requisições solicitadas com as bem-sucedidas em cada grupo, destacando a taxa de sucesso do servidor.")
+    plot_success_counts_per_group(analysis.successes, planned_sizes, axis)
+
+    if has_records(run.records_path):
+        st.markdown("### Requisições individuais")
+        st.write("Cada requisição gravada no registro do teste: quantidade por código de status e por classe de erro, tempo de resposta de cada requisição ao longo do teste (amostra de até 20 mil pontos) e resumo por grupo com percentis exatos.")
+        show_request_records(run.records_path, client_options["success_statuses"])
+
+    st.markdown("### Tabela de resultados do Teste de Carga")
+    st.write("A tabela resume os resultados por grupo, incluindo tempos médios, variação, tempo total, requisições solicitadas e requisições bem-sucedidas, para avaliar o desempenho do servidor.")
+    show_results_table(results, planned_sizes, run.group_times)
 
 # Inicializar a página
 run_load_test_page()
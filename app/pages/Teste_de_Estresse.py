@@ -1,156 +1,85 @@
-import time
-import httpx
-import asyncio
+import os
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-
-# Armazenar os resultados
-group_durations = []
-success_counts_per_group = []
-total_requests_per_group = []
-individual_durations = []
-response_rates = []
-group_means = []
-group_std_devs = []
-first_failure_group = None
-failure_messages = []
-
-# Mensagens sobre a url
-def performance(response_time):
-    if response_time < 0.5:
-        return st.success('Latência Baixa: Tempo de resposta menor que 0.5 s (Tempo médio de resposta: {:.2f} s)'.format(response_time))
-    elif 0.5 <= response_time < 1:
-        return st.warning('Latência Moderada: Tempo de resposta entre 0.5 s e 1 s (Tempo médio de resposta: {:.2f} s)'.format(response_time))
-    else:
-        return st.error('Latência Alta: Tempo de resposta maior que 1 s (Tempo médio de resposta: {:.2f} s)'.format(response_time))
-
-def analyze_success_rates(success_counts_per_group, total_requests_per_group):
-    success_rates = [success_count / total_requests for success_count, total_requests in zip(success_counts_per_group, total_requests_per_group)]
-
-    all_above_80 = all(rate >= 0.8 for rate in success_rates)
-    some_below_80_and_above_50 = any(0.8 > rate >= 0.5 for rate in success_rates)
-    all_below_80_and_above_50 = all(0.8 > rate >= 0.5 for rate in success_rates)
-    some_below_50 = any(rate < 0.5 for rate in success_rates)
-    all_below_50 = all(rate < 0.5 for rate in success_rates)
-
-    if all_above_80:
-        st.success("Todos os grupos apresentam taxa de sucesso entre 80% e 100%.")
-    elif all_below_50:
-        st.error("Todos os grupos apresentam taxas de sucesso abaixo de 50%.")
-    elif some_below_50:
-        st.error("Alguns grupos apresentam taxas de sucesso abaixo de 50%.")
-    elif all_below_80_and_above_50:
-        st.warning("Todos os grupos apresentam taxas de sucesso entre 50% e 80%.")
-    elif some_below_80_and_above_50:
-        st.warning("Alguns grupos apresentam taxas de sucesso entre 50% e 80%.")
-
-    return success_rates
-
-# Realizar as requisições
-async def req_get_async(client, url):
-    try:
-        start = time.time()
-        response = await client.get(url)
-        end = time.time()
-        duration = end - start
-        return response, duration
-    except httpx.RequestError:
-        return None, None
-
-async def do_stress_test(url, num_requests):
-    async with httpx.AsyncClient() as client:
-        tasks = [req_get_async(client, url) for _ in range(num_requests)]
-        return await asyncio.gather(*tasks)
-
-async def run_stress_test(url, initial_num_requests, increment, delay_in_seconds):
-    
-    global first_failure_group, failure_messages
-    num_requests = initial_num_requests
-    group_number = 1
-
-    while True:
-        results = await do_stress_test(url, num_requests)
-
-        success_count = sum(1 for response, _ in results if response and response.status_code == 200)
-
-        durations_per_group = [duration for _, duration in results if duration is not None]
-
-        total_time = sum(durations_per_group)
-        total_requests = len(results)
-
-        success_rate = success_count / total_requests if total_requests > 0 else 0
-        response_rates.append(success_rate)
-
-        success_counts_per_group.append(success_count)
-        total_requests_per_group.append(total_requests)
-        individual_durations.extend(durations_per_group)
-        group_durations.append(total_time)
-
-        if durations_per_group:
-            group_mean = total_time / len(durations_per_group)
-            group_std_dev = np.std(durations_per_group)
-        else:
-            group_mean = 0
-            group_std_dev = 0
-
-        group_means.append(group_mean)
-        group_std_devs.append(group_std_dev)
-
-        if first_failure_group is None and success_rate < 1.0:
-            first_failure_group = group_number
-            failure_messages.append(f"Grupo {group_number}: A taxa de sucesso de resposta neste grupo ficou abaixo de 100% pela primeira vez ({success_rate*100:.2f}%)")
-
-        if success_rate < 0.50:
-            failure_messages.append(f"Grupo {group_number}: A taxa de sucesso de resposta neste grupo ficou abaixo de 50% ({success_rate*100:.2f}%)")
-            break
-
-        num_requests += increment
-        group_number += 1
-
-        if delay_in_seconds:
-            await asyncio.sleep(delay_in_seconds)
-
-def plot_total_time_per_group():
+from engine.workers import make_plan
+from engine.executor import DEFAULT_MAX_IN_FLIGHT
+from engine.coordinator import parse_agents
+from engine.records import has_records
+from engine.runner import get_runner
+from engine.capacity import CapacitySearch, make_capacity, make_slo
+from ui import RUN_HISTORY_SIZE, analyze_success_rates, show_transfer_summary, show_queue_delays, show_connection_counts, group_axis, plot_phases_per_group, show_phase_table, show_percentiles, show_outcome_counts, show_request_records, plot_live_series, show_rolling_window, show_run_status, session_runs, remember_run, run_label, rules_form, rule_violation, show_rule_verdicts, scenario_form, feed_form, profile_form, plot_profile, client_options_form
+
+# Intervalo (s) de atualização do painel durante o teste
+LIVE_REFRESH_INTERVAL = 0.5
+
+# Critérios iniciais: (métrica, limite na unidade exibida, segundos seguidos, ação)
+DEFAULT_RULES = [
+    ("p99", 1000, 5, "fail"),
+    ("timeout_rate", 50, 3, "stop"),
+]
+
+# Mensagens sobre o primeiro grupo com falhas e o grupo que encerrou o teste
+def failure_messages(analysis, min_success_rate):
+    messages = []
+    group_number = analysis.first_group_below(1.0)
+    if group_number is not None:
+        success_rate = analysis.success_rates[group_number - 1]
+        messages.append(f"Grupo {group_number}: A taxa de sucesso de resposta neste grupo ficou abaixo de 100% pela primeira vez ({success_rate*100:.2f}%)")
+    group_number = analysis.first_group_below(min_success_rate) if min_success_rate is not None else None
+    if group_number is not None:
+        success_rate = analysis.success_rates[group_number - 1]
+        messages.append(f"Grupo {group_number}: A taxa de sucesso de resposta neste grupo ficou abaixo de {min_success_rate*100:.0f}% ({success_rate*100:.2f}%)")
+    return messages
+
+# Marcas do eixo: uma por grupo no eixo de grupos, automáticas no de tempo
+def axis_layout(axis, dtick=None):
+    if axis["time"]:
+        return {}
+    return dict(tickmode='linear', dtick=dtick) if dtick else dict(tickmode='linear')
+
+def plot_total_time_per_group(results, axis):
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=list(range(1, len(group_durations) + 1)),
-        y=group_durations,
+        x=axis["x"],
+        y=results.analysis().durations,
         mode='lines+markers',
         name='Tempo Gasto (s)',
         marker=dict(color='lightblue', size=10)
     ))
 
     fig.update_layout(
-        xaxis_title="Grupo",
+        xaxis_title=axis["title"],
         yaxis_title="Tempo Gasto (s)",
-        xaxis=dict(tickmode='linear', dtick=1)
+        xaxis=axis_layout(axis, dtick=1)
     )
 
     st.plotly_chart(fig)
 
-def plot_success_counts_per_group():
+def plot_success_counts_per_group(results, axis):
+    analysis = results.analysis()
     fig = go.Figure()
+    # No eixo de tempo, a largura das barras fica a cargo do plotly (pelo espaçamento entre os grupos)
+    width = None if axis["time"] else 0.2
 
     fig.add_trace(go.Bar(
-        x=list(range(1, len(total_requests_per_group) + 1)),
-        y=total_requests_per_group,
+        x=axis["x"],
+        y=analysis.requests,
         name='Total de Requisições',
         marker=dict(color='blue'),
-        width=0.2  
+        width=width
     ))
 
     fig.add_trace(go.Bar(
-        x=list(range(1, len(success_counts_per_group) + 1)),
-        y=success_counts_per_group,
+        x=axis["x"],
+        y=analysis.successes,
         name='Requisições Bem-Sucedidas',
         marker=dict(color='lightblue'),
-        width=0.2  
+        width=width
     ))
 
     fig.update_layout(
-        xaxis_title="Grupo",
+        xaxis_title=axis["title"],
         yaxis_title="Quantidade de Requisições",
         barmode='overlay',
         legend=dict(
@@ -164,35 +93,132 @@ def plot_success_counts_per_group():
 
     st.plotly_chart(fig)
 
-def plot_success_rate():
+def plot_percentiles_per_group(results, axis):
+    analysis = results.analysis()
+    fig = go.Figure()
+
+    for key, color in [("p50", "lightblue"), ("p90", "blue"), ("p99", "orange"), ("p99.9", "red")]:
+        fig.add_trace(go.Scatter(
+            x=axis["x"],
+            y=analysis.group_column(key),
+            mode='lines+markers',
+            name=key,
+            marker=dict(color=color, size=8)
+        ))
+
+    fig.update_layout(
+        xaxis_title=axis["title"],
+        yaxis_title="Tempo (s)",
+        xaxis=axis_layout(axis)
+    )
+
+    st.plotly_chart(fig)
+
+def plot_success_rate(results, axis):
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=list(range(1, len(response_rates) + 1)),
-        y=response_rates,
+        x=axis["x"],
+        y=results.analysis().success_rates,
         mode='lines+markers',
         name='Taxa de Sucesso',
         marker=dict(color='lightblue', size=8)
     ))
 
     fig.update_layout(
-        xaxis_title="Grupo",
+        xaxis_title=axis["title"],
         yaxis_title="Taxa de Sucesso",
-        xaxis=dict(tickmode='linear')
+        xaxis=axis_layout(axis)
     )
 
     st.plotly_chart(fig)
 
-def show_results_table():
+def show_results_table(results, group_times=None):
+    analysis = results.analysis()
     data = {
-        "Grupo": list(range(1, len(group_durations) + 1)),
-        "Tempo Gasto (s)": group_durations,
-        "Requisições Bem-Sucedidas": success_counts_per_group,
-        "Requisições Solicitadas": total_requests_per_group,
-        "Taxa de Sucesso": response_rates
+        "Grupo": list(range(1, len(results) + 1)),
+        "Tempo Gasto (s)": analysis.durations,
+        "p50 (s)": analysis.group_column("p50"),
+        "p99 (s)": analysis.group_column("p99"),
+        "p99.9 (s)": analysis.group_column("p99.9"),
+        "Máximo (s)": analysis.maxima,
+        "Requisições Bem-Sucedidas": analysis.successes,
+        "Requisições Solicitadas": analysis.requests,
+        "Taxa de Sucesso": analysis.success_rates,
+        "Conexões Abertas": results.new_connections,
+        "Conexões Reutilizadas": results.reused_connections,
+        "Espera Média na Fila (s)": [histogram.mean() / 1e9 for histogram in results.queue_histograms],
+        "Primeiro Byte Médio (s)": [histogram.mean() / 1e9 for histogram in results.ttfb_histograms],
+        "Bytes Recebidos": results.bytes_received,
     }
+    if results.achieved_rates:
+        data["Taxa Pretendida (req/s)"] = results.intended_rates
+        data["Taxa Atingida (req/s)"] = results.achieved_rates
+    if group_times is not None and len(group_times) == len(results):
+        data["Concluído em (s)"] = group_times
     df = pd.DataFrame(data)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
+# Resultado da busca de capacidade: a busca é refeita a partir dos grupos (níveis) medidos
+def show_capacity_results(plan, results):
+    search = CapacitySearch.from_plan(plan).replay(results.groups)
+    good, bad = search.band
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Maior taxa sustentável (req/s)", "{:.1f}".format(good) if good is not None else "—")
+    if good is not None and bad is not None:
+        col2.metric("Faixa do limite (req/s)", "{:.0f} – {:.0f}".format(good, bad))
+    elif good is not None:
+        col2.metric("Faixa do limite (req/s)", "acima de {:.0f}".format(good))
+    else:
+        col2.metric("Faixa do limite (req/s)", "abaixo de {:.0f}".format(bad))
+    col3.metric("Níveis testados", len(search.levels))
+
+    if good is None:
+        st.error("Nenhum nível atendeu aos objetivos.")
+    elif bad is None:
+        st.warning("Nenhum nível violou os objetivos: a capacidade está acima da maior taxa testada.")
+    elif not search.finished:
+        st.warning("A busca foi interrompida antes de atingir a precisão pedida.")
+
+    rates = [rate for rate, _, _ in search.levels]
+    p99s = [group.histogram.percentile(99) / 1e9 for _, group, _ in search.levels]
+    passed = [not violations for _, _, violations in search.levels]
+    fig = go.Figure()
+    for name, wanted, color in [("Aprovado", True, 'lightblue'), ("Reprovado", False, 'red')]:
+        fig.add_trace(go.Scatter(
+            x=[rate for rate, ok in zip(rates, passed) if ok == wanted],
+            y=[p99 for p99, ok in zip(p99s, passed) if ok == wanted],
+            mode='markers',
+            name=name,
+            marker=dict(color=color, size=10),
+        ))
+    fig.update_layout(xaxis_title="Taxa do nível (req/s)", yaxis_title="p99 do tempo de resposta (s)")
+    st.plotly_chart(fig)
+
+    st.dataframe(pd.DataFrame({
+        "Nível": list(range(1, len(rates) + 1)),
+        "Taxa Pretendida (req/s)": rates,
+        "Taxa Atingida (req/s)": [group.achieved_rate for _, group, _ in search.levels],
+        "p99 (s)": p99s,
+        "Falhas (%)": [(1 - group.success_rate) * 100 for _, group, _ in search.levels],
+        "Resultado": ["Aprovado" if not violations else "Reprovado: " + "; ".join(violations) for _, _, violations in search.levels],
+    }), use_container_width=True, hide_index=True)
+
+# Reexecutado sozinho a cada LIVE_REFRESH_INTERVAL enquanto o teste roda; ao
+# fim do teste, a página inteira é refeita.
+@st.fragment(run_every=LIVE_REFRESH_INTERVAL)
+def show_live_run(run_id):
+    run = get_runner().get(run_id)
+    if run is None or not run.running:
+        st.rerun()
+    show_run_status(run)
+    for rule, breach in run.rules.verdicts():
+        if breach is not None:
+            st.warning("Critério violado: {}".format(rule_violation(run, rule, breach)))
+    show_rolling_window(run.series)
+    plot_live_series(run.seconds)
+    if run.results:
+        show_results_table(run.results, run.group_times)
+
 # Interface da página 
 def run_stress_test_page():
     st.set_page_config(page_title="Teste de Estresse", page_icon="🚩", layout="centered")
@@ -200,40 +226,166 @@ def run_stress_test_page():
     st.title("Teste de Estresse")
 
     url = st.text_input("Informe a URL para o teste:", "")
-    initial_num_requests = st.number_input("Número inicial de requisições:", min_value=1)
-    increment = st.number_input("Incremento de requisições:", min_value=1)
-    delay_in_seconds = st.number_input("Delay entre grupos (segundos):", min_value=1)
-
-    start_button = st.button("Iniciar Teste de Estresse", disabled=not url)
-
-    if start_button:
-        with st.spinner("Executando o teste de estresse..."):
-            asyncio.run(run_stress_test(url, initial_num_requests, increment, delay_in_seconds))
-
-        st.markdown("### Resultados do Teste de Estresse")          
-        for message in failure_messages:
-            st.info(message)
-        
-        response_time_geral = np.mean(group_means)
-        performance(response_time_geral)
-        analyze_success_rates(success_counts_per_group, total_requests_per_group)
-
-
-        st.markdown("### Tempo gasto por grupo")
-        st.write("O gráfico exibe o tempo total gasto pelo servidor para processar todas as requisições de cada grupo, refletindo o esforço do servidor.")
-        plot_total_time_per_group()
+    strategy = st.radio("Estratégia:", ["Incremento linear", "Busca de capacidade", "Perfil de carga"], horizontal=True, help="No incremento linear, cada grupo tem `incremento` requisições a mais que o anterior, até a taxa de sucesso de um grupo ficar abaixo da mínima ou um critério de parada ser violado. Na busca de capacidade, a taxa dobra a cada nível até um nível violar os objetivos e, depois, uma busca binária entre o último nível aprovado e o primeiro reprovado encontra a maior taxa sustentável em poucos níveis. No perfil de carga, a taxa segue uma rampa, um pico ou estágios definidos, em malha aberta, até o fim do perfil ou até um critério de parada ser violado.")
+    capacity = None
+    profile = None
+    min_success_rate = None
+    if strategy == "Incremento linear":
+        initial_num_requests = st.number_input("Número inicial de requisições:", min_value=1)
+        increment = st.number_input("Incremento de requisições:", min_value=1)
+        min_success_rate = st.number_input("Taxa de sucesso mínima por grupo (%):", min_value=0.0, max_value=100.0, value=50.0, help="O teste termina no primeiro grupo com taxa de sucesso abaixo deste valor.") / 100
+        delay_in_seconds = st.number_input("Delay entre grupos (segundos):", min_value=0.0, value=1.0, step=0.001, format="%.3f")
+        mode = st.radio("Modo de disparo:", ["Grupos em rajada", "Taxa constante (malha aberta)"], horizontal=True)
+        window = None
+        if mode != "Grupos em rajada":
+            window = st.number_input("Janela de cada grupo (segundos):", min_value=1, value=1, help="As requisições de cada grupo são distribuídas uniformemente ao longo da janela.")
+    elif strategy == "Perfil de carga":
+        initial_num_requests = increment = delay_in_seconds = 0
+        profile = profile_form()
+        window = st.number_input("Janela de cada grupo (segundos):", min_value=1, value=1)
+    else:
+        initial_num_requests = increment = 0
+        start_rate = st.number_input("Taxa inicial (requisições por segundo):", min_value=1.0, value=10.0)
+        factor = st.number_input("Fator de subida entre níveis:", min_value=1.1, value=2.0)
+        max_rate = st.number_input("Taxa máxima (requisições por segundo, 0 = sem limite):", min_value=0.0, value=0.0) or None
+        window = st.number_input("Duração de cada nível (segundos):", min_value=1, value=5, help="Cada nível é um grupo em malha aberta com a taxa do nível distribuída uniformemente ao longo da duração.")
+        delay_in_seconds = st.number_input("Delay entre níveis (segundos):", min_value=0, value=1)
+        precision = st.number_input("Precisão da busca (%):", min_value=1.0, max_value=50.0, value=5.0, help="A busca termina quando a distância entre o último nível aprovado e o primeiro reprovado fica abaixo desta fração da taxa reprovada.")
+        max_levels = st.number_input("Máximo de níveis:", min_value=2, value=20)
+        st.markdown("**Objetivos de cada nível**")
+        max_p99 = st.number_input("p99 máximo do tempo de resposta (ms, 0 = não avaliar):", min_value=0, value=500)
+        max_error_rate = st.number_input("Falhas máximas (%):", min_value=0.0, max_value=100.0, value=1.0)
+        min_throughput = st.number_input("Taxa atingida mínima (% da pretendida):", min_value=0.0, max_value=100.0, value=95.0, help="Quando o gerador não consegue disparar na taxa do nível, o nível é reprovado: o limite encontrado seria o do gerador, e não o do servidor.")
+        capacity = make_capacity(start_rate, factor, max_rate, precision / 100, max_levels,
+                                 make_slo(max_p99 / 1000 or None, max_error_rate / 100, min_throughput / 100))
+    num_workers = st.number_input("Processos geradores:", min_value=1, value=1, help="Acima de alguns milhares de requisições por segundo, a CPU do gerador se torna o gargalo. Com mais de um processo, cada grupo é dividido entre processos, cada um com seu próprio loop de eventos e cliente HTTP. Use no máximo um processo por núcleo de CPU ({} nesta máquina).".format(os.cpu_count()))
+    max_in_flight = st.number_input("Máximo de requisições em andamento (0 = sem limite):", min_value=0, value=DEFAULT_MAX_IN_FLIGHT, help="Com um limite, as requisições passam por uma fila e um número fixo de trabalhadores as envia, mantendo a memória do gerador estável mesmo com grupos grandes. O tempo de espera na fila é medido separadamente do tempo de resposta.") or None
+    records = st.checkbox("Registrar cada requisição", value=False, help="Grava uma linha por requisição (grupo, instantes previsto e real, tempo de resposta, status, bytes e classe de erro) em arquivos Parquet, em blocos, mantendo a memória constante mesmo com milhões de requisições. Não disponível na execução distribuída.")
+    rules = []
+    if capacity is None:
+        rules = rules_form(DEFAULT_RULES)
+    scenario = scenario_form()
+    feed = feed_form()
+    client_options = client_options_form()
+    agents = None
+    with st.expander("Execução distribuída"):
+        if capacity is not None:
+            st.caption("A busca de capacidade é executada neste computador (no próprio processo ou em processos geradores).")
+        else:
+            agents = parse_agents(st.text_area("Agentes (host:porta, separados por vírgula):", "", help="Cada máquina geradora deve executar `python -m engine.agent --host 0.0.0.0` a partir da pasta `app`, com o mesmo token secreto da variável `LOAD_TEST_AGENT_TOKEN` deste servidor. Cada grupo é dividido entre os agentes, que começam no mesmo instante e devolvem apenas os resumos de cada grupo."))
 
-        st.markdown("### Requisições solicitadas e bem-sucedidas por grupo")
-        st.write("Este gráfico compara o número de requisições solicitadas com as bem-sucedidas em cada grupo, destacando a taxa de sucesso do servidor.")
-        plot_success_counts_per_group()
+    # O teste roda no executor de testes, fora da execução da página: interações
+    # com a página não o interrompem. A sessão guarda os identificadores dos
+    # últimos testes, e cada teste tem os seus próprios resultados.
+    runner = get_runner()
+    runs = session_runs("stress_test_history")
+    latest = runs[-1] if runs else None
+    running = latest is not None and latest.running
 
-        st.markdown("### Taxa de sucesso por grupo")
-        st.write("O gráfico exibe a taxa de sucesso de resposta as requisições em cada grupo.")
-        plot_success_rate()
+    col1, col2 = st.columns(2)
+    start_button = col1.button("Iniciar Teste de Estresse", disabled=not url or running or client_options is None or scenario is False or feed is False or (strategy == "Perfil de carga" and profile is None))
+    col2.button("Parar teste", disabled=not running, on_click=runner.stop, args=(latest.id if latest is not None else None,),
+                help="Encerra o teste em andamento: os disparos param, as requisições em andamento são aguardadas e os resultados parciais são mantidos.")
 
-        st.markdown("### Tabela de resultados do Teste de Estresse")
-        st.write("A tabela resume os resultados por grupo, incluindo tempo total, taxa de sucesso, requisições solicitadas e requisições bem-sucedidas, para avaliar o desempenho do servidor.")
-        show_results_table()
+    if start_button:
+        plan = make_plan(url, initial_num_requests, increment=increment, delay_in_seconds=delay_in_seconds, window=window,
+                         client_options=client_options, max_in_flight=max_in_flight, min_success_rate=min_success_rate, records=records, capacity=capacity, rules=rules, scenario=scenario, feed=feed,
+                         profile=profile)
+        remember_run("stress_test_history", runner.start(plan, num_workers, agents))
+        st.rerun()
+
+    if not runs:
+        return
+    run = latest
+    if len(runs) > 1:
+        run = runner.get(st.selectbox("Teste exibido:", [run.id for run in reversed(runs)], format_func=lambda run_id: run_label(runner.get(run_id)),
+                                      help="Os últimos {} testes da sessão ficam disponíveis.".format(RUN_HISTORY_SIZE)))
+
+    st.markdown("### Acompanhamento do teste")
+    if run.running:
+        show_live_run(run.id)
+        return
+    show_run_status(run)
+    plot_live_series(run.seconds)
+    if run.status == "failed":
+        st.error("O teste foi encerrado por um erro:")
+        st.code(run.error)
+        return
+    if run.stop_reason:
+        st.warning("Teste interrompido pelo critério {}. Resultados parciais até a parada:".format(run.stop_reason))
+    elif run.status == "stopped":
+        st.warning("Teste interrompido. Resultados parciais até a parada:")
+    if not run.groups:
+        st.info("Nenhum grupo foi concluído.")
+        return
+    show_stress_test_results(run)
+
+# Resultados de um teste encerrado, com os parâmetros do plano com que foi iniciado
+def show_stress_test_results(run):
+    results = run.results
+    client_options = run.plan["client_options"]
+    max_in_flight = run.plan["max_in_flight"]
+
+    st.markdown("### Resultados do Teste de Estresse")          
+    by_time = st.radio("Eixo horizontal dos gráficos por grupo:", ["Número do grupo", "Tempo do teste"], horizontal=True,
+                       help="Em testes longos (ex.: de resistência), os gráficos por grupo podem ser vistos em função do tempo desde o início do teste, pelo instante em que cada grupo foi concluído.") == "Tempo do teste"
+    axis = group_axis(run, by_time)
+    if run.plan["capacity"]:
+        st.markdown("#### Busca de capacidade")
+        st.write("Cada nível foi executado em malha aberta na taxa indicada e julgado pelos objetivos. A maior taxa sustentável é a do último nível aprovado; o limite real do servidor está entre ela e a taxa do primeiro nível reprovado.")
+        show_capacity_results(run.plan, results)
+    if run.plan.get("profile"):
+        st.markdown("#### Perfil de carga")
+        plot_profile(run.plan["profile"], "profile_results")
+    analysis = results.analysis()
+    for message in failure_messages(analysis, run.plan["min_success_rate"]):
+        st.info(message)
+    
+    show_rule_verdicts(run)
+    analyze_success_rates(analysis)
+    show_outcome_counts(analysis, client_options["success_statuses"], axis)
+    show_connection_counts(results)
+
+
+    st.markdown("### Percentis do tempo de resposta")
+    st.write("Percentis calculados sobre todas as requisições do teste. No modo de taxa constante, o tempo é medido a partir do instante previsto de envio, incluindo a espera causada por respostas lentas.")
+    show_percentiles(analysis.histogram)
+    if client_options["stream_bodies"]:
+        st.write("Tempo até o primeiro byte (recebimento dos cabeçalhos) e volume de dados recebidos.")
+        show_transfer_summary(results)
+    if max_in_flight:
+        st.write("Tempo que as requisições aguardaram na fila do executor antes de serem enviadas (não incluído no tempo de resposta, exceto no modo de taxa constante, em que o tempo é medido desde o instante previsto).")
+        show_queue_delays(results)
+
+    st.markdown("### Percentis do tempo de resposta por grupo")
+    st.write("Este gráfico mostra como a cauda da distribuição dos tempos de resposta (p50, p90, p99 e p99.9) evolui à medida que a carga aumenta.")
+    plot_percentiles_per_group(results, axis)
+
+    st.markdown("### Fases das requisições por grupo")
+    st.write("Tempo médio de cada fase por requisição: resolução de DNS, conexão TCP e negociação TLS (apenas quando uma conexão nova é aberta, diluídas entre todas as requisições do grupo), envio da requisição, espera pelo servidor até o primeiro byte e transferência do corpo. Um aumento nas fases de conexão indica troca excessiva de conexões; um aumento na espera do servidor indica lentidão no próprio servidor.")
+    plot_phases_per_group(results, axis)
+    show_phase_table(results)
+
+    st.markdown("### Tempo gasto por grupo")
+    st.write("O gráfico exibe o tempo total gasto pelo servidor para processar todas as requisições de cada grupo, refletindo o esforço do servidor.")
+    plot_total_time_per_group(results, axis)
+
+    st.markdown("### Requisições solicitadas e bem-sucedidas por grupo")
+    st.write("Este gráfico compara o número de requisições solicitadas com as bem-sucedidas em cada grupo, destacando a taxa de sucesso do servidor.")
+    plot_success_counts_per_group(results, axis)
+
+    st.markdown("### Taxa de sucesso por grupo")
+    st.write("O gráfico exibe a taxa de sucesso de resposta as requisições em cada grupo.")
+    plot_success_rate(results, axis)
+
+    if has_records(run.records_path):
+        st.markdown("### Requisições individuais")
+        st.write("Cada requisição gravada no registro do teste: quantidade por código de status e por classe de erro, tempo de resposta de cada requisição ao longo do teste (amostra de até 20 mil pontos) e resumo por grupo com percentis exatos.")
+        show_request_records(run.records_path, client_options["success_statuses"])
+
+    st.markdown("### Tabela de resultados do Teste de Estresse")
+    st.write("A tabela resume os resultados por grupo, incluindo tempo total, taxa de sucesso, requisições solicitadas e requisições bem-sucedidas, para avaliar o desempenho do servidor.")
+    show_results_table(results, run.group_times)
 
 if __name__ == "__main__":
     run_stress_test_page()
@@ -0,0 +1,407 @@
+# Formulários, gráficos e painéis usados pelas páginas de teste de carga e de
+# estresse
+import os
+import time
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from engine.client import PHASES, ENGINES, ERROR_LABELS, DEFAULT_SUCCESS_STATUSES, make_client_options, parse_status_ranges, format_status_ranges
+from engine.histogram import merge_histograms
+from engine.records import read_records, status_counts, summarize_groups, sample_timeline, success_mask
+from engine.runner import get_runner
+from engine.analysis import second_series
+from engine.scenario import load_scenario
+from engine.feeds import make_feed
+from engine.profiles import LoadProfile, make_stage, make_profile, ramp_profile, spike_profile, soak_profile, profile_points
+from engine.rules import RULE_METRICS, RULE_ACTIONS, make_rule, describe_rule, format_value
+
+# Testes anteriores da sessão que podem ser exibidos novamente
+RUN_HISTORY_SIZE = 5
+# Segundos do resumo recente exibido durante o teste
+ROLLING_WINDOW = 60
+
+# Janelas sem requisições previstas (pausas de um perfil de carga) ficam de
+# fora; sem `planned_sizes`, valem as requisições enviadas em cada grupo
+def analyze_success_rates(analysis, planned_sizes=None):
+    # Uma única contagem por faixa (abaixo de 50%, entre 50% e 80%, a partir de 80%)
+    below_50, below_80, above_80 = analysis.success_bands(planned_sizes)
+    total = below_50 + below_80 + above_80
+
+    if above_80 == total:
+        st.success("Todos os grupos apresentam taxa de sucesso entre 80% e 100%.")
+    elif below_50 == total:
+        st.error("Todos os grupos apresentam taxas de sucesso abaixo de 50%.")
+    elif below_50:
+        st.error("Alguns grupos apresentam taxas de sucesso abaixo de 50%.")
+    elif below_80 == total:
+        st.warning("Todos os grupos apresentam taxas de sucesso entre 50% e 80%.")
+    elif below_80:
+        st.warning("Alguns grupos apresentam taxas de sucesso entre 50% e 80%.")
+
+def show_transfer_summary(results):
+    summary = merge_histograms(results.ttfb_histograms).summary()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Primeiro byte p50 (s)", "{:.3f}".format(summary["p50"]))
+    col2.metric("Primeiro byte p99 (s)", "{:.3f}".format(summary["p99"]))
+    col3.metric("Dados recebidos (MB)", "{:.2f}".format(sum(results.bytes_received) / 1e6))
+
+def show_queue_delays(results):
+    summary = merge_histograms(results.queue_histograms).summary()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Espera média na fila (s)", "{:.3f}".format(summary["mean"]))
+    col2.metric("Espera p99 na fila (s)", "{:.3f}".format(summary["p99"]))
+    col3.metric("Espera máxima na fila (s)", "{:.3f}".format(summary["max"]))
+
+def show_connection_counts(results):
+    col1, col2 = st.columns(2)
+    col1.metric("Conexões abertas", sum(results.new_connections))
+    col2.metric("Conexões reutilizadas", sum(results.reused_connections))
+
+# Eixo horizontal dos gráficos por grupo: o número do grupo (a primeira janela,
+# quando as janelas antigas de um teste contínuo foram juntadas) ou, com
+# `by_time`, o instante (s desde o início do teste) em que cada grupo foi concluído
+def group_axis(run, by_time=False):
+    if by_time and run.group_times is not None and len(run.group_times) == len(run.groups):
+        return {"x": list(run.group_times), "title": "Tempo do teste (s)", "time": True}
+    return {"x": [first + 1 for first in run.results.window_starts], "title": "Grupo", "time": False}
+
+PHASE_LABELS = {
+    "dns": "DNS",
+    "connect": "Conexão TCP",
+    "tls": "TLS",
+    "write": "Envio da requisição",
+    "ttfb": "Espera do servidor",
+    "transfer": "Transferência do corpo",
+}
+
+def plot_phases_per_group(results, axis):
+    fig = go.Figure()
+
+    for phase in PHASES:
+        fig.add_trace(go.Bar(
+            x=axis["x"],
+            y=[means[phase] for means in results.phase_means],
+            name=PHASE_LABELS[phase],
+        ))
+
+    fig.update_layout(
+        barmode='stack',
+        xaxis_title=axis["title"],
+        yaxis_title="Tempo médio por requisição (s)",
+    )
+
+    st.plotly_chart(fig)
+
+def show_phase_table(results):
+    rows = []
+    for phase in PHASES:
+        histogram = merge_histograms([histograms[phase] for histograms in results.phase_histograms])
+        summary = histogram.summary()
+        rows.append({
+            "Fase": PHASE_LABELS[phase],
+            "Ocorrências": summary["count"],
+            "Média (s)": summary["mean"],
+            "p50 (s)": summary["p50"],
+            "p99 (s)": summary["p99"],
+            "Máximo (s)": summary["max"],
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+def show_percentiles(histogram):
+    summary = histogram.summary()
+    cols = st.columns(5)
+    for col, key in zip(cols, ["p50", "p90", "p99", "p99.9", "max"]):
+        col.metric("{} (s)".format(key), "{:.3f}".format(summary[key]))
+
+# Requisições por classe de resultado (cada código de status e cada classe de
+# erro), com p50 e p99 e o primeiro grupo em que a classe apareceu, e a
+# composição de cada grupo: mostra o que falhou primeiro quando a carga subiu
+def show_outcome_counts(analysis, success_statuses, axis):
+    outcomes = analysis.outcomes(success_statuses)
+    if not outcomes:
+        return
+    first_failure = analysis.first_failure(success_statuses)
+    if first_failure is not None:
+        st.write("Primeira falha: **{}**, a partir do grupo {}.".format(first_failure["outcome"], first_failure["first_group"]))
+    st.dataframe(pd.DataFrame({
+        "Resultado": [row["outcome"] for row in outcomes],
+        "Sucesso": ["Sim" if row["success"] else "—" if row["success"] is None else "Não" for row in outcomes],
+        "Requisições": [row["requests"] for row in outcomes],
+        "Proporção (%)": [row["share"] * 100 for row in outcomes],
+        "p50 (s)": [row["p50"] for row in outcomes],
+        "p99 (s)": [row["p99"] for row in outcomes],
+        "Primeiro grupo": [row["first_group"] for row in outcomes],
+    }), use_container_width=True, hide_index=True)
+    st.caption("Sucesso: status {}. Nas requisições sem resposta, p50 e p99 são do tempo até a falha.".format(format_status_ranges(success_statuses)))
+    if len(outcomes) > 1:
+        fig = go.Figure()
+        for row in outcomes:
+            fig.add_trace(go.Bar(x=axis["x"], y=row["per_group"], name=row["outcome"]))
+        fig.update_layout(barmode='stack', xaxis_title=axis["title"], yaxis_title="Requisições")
+        st.plotly_chart(fig)
+
+# Requisições individuais, a partir do registro por requisição do teste
+def show_request_records(records_path, success_statuses):
+    columns = read_records(records_path)
+    statuses, errors = status_counts(columns)
+    col1, col2 = st.columns(2)
+    col1.dataframe(pd.DataFrame({"Status": [status or "Sem resposta" for status in statuses], "Requisições": list(statuses.values())}), hide_index=True)
+    if errors:
+        col2.dataframe(pd.DataFrame({"Erro": [ERROR_LABELS[error] for error in errors], "Requisições": list(errors.values())}), hide_index=True)
+
+    seconds, latencies, status = sample_timeline(columns)
+    success = success_mask(status, success_statuses)
+    fig = go.Figure()
+    for name, mask, color in [("Bem-sucedidas", success, 'lightblue'), ("Falhas", ~success, 'red')]:
+        fig.add_trace(go.Scattergl(x=seconds[mask], y=latencies[mask], mode='markers', name=name, marker=dict(color=color, size=3)))
+    fig.update_layout(xaxis_title="Instante de envio (s)", yaxis_title="Tempo de resposta ou até a falha (s)")
+    st.plotly_chart(fig)
+
+    summary = summarize_groups(columns, success_statuses)
+    st.dataframe(pd.DataFrame({
+        "Grupo": summary["group"] + 1,
+        "Requisições": summary["requests"],
+        "Bem-Sucedidas": summary["successes"],
+        "Erros": summary["errors"],
+        "Média (s)": summary["mean"],
+        "p50 (s)": summary["p50"],
+        "p99 (s)": summary["p99"],
+        "Bytes Recebidos": summary["bytes"],
+    }), use_container_width=True, hide_index=True)
+    st.caption("Arquivos do registro: `{}`".format(records_path))
+
+# Painel de um teste em andamento, montado a partir do que o executor de
+# testes já coletou: a série por segundo vira os gráficos e os grupos
+# concluídos, a tabela de resultados
+def plot_live_series(seconds):
+    series = second_series(seconds)
+    x = series["second"]
+
+    throughput_figure = go.Figure([
+        go.Scatter(x=x, y=series["requests"], mode='lines+markers', name="Requisições/s", marker=dict(color='lightblue', size=5)),
+        go.Scatter(x=x, y=series["successes"], mode='lines+markers', name="Bem-sucedidas/s", marker=dict(color='green', size=5)),
+    ])
+    throughput_figure.update_layout(xaxis_title="Tempo (s)", yaxis_title="Requisições por segundo")
+    st.plotly_chart(throughput_figure)
+
+    latency_figure = go.Figure([
+        go.Scatter(x=x, y=series["mean"], mode='lines+markers', name="Média", marker=dict(color='lightblue', size=5)),
+        go.Scatter(x=x, y=series["p99"], mode='lines+markers', name="p99", marker=dict(color='orange', size=5)),
+    ])
+    latency_figure.update_layout(xaxis_title="Tempo (s)", yaxis_title="Tempo de resposta (s)")
+    st.plotly_chart(latency_figure)
+
+# Vazão, sucesso e p99 do último minuto da série, que em testes longos
+# resumem o estado atual melhor que as médias do teste inteiro
+def show_rolling_window(series, seconds=ROLLING_WINDOW):
+    window = series.rolling(seconds)
+    if window is None:
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Vazão no último minuto (req/s)", "{:.1f}".format(window["requests"] / max(window["seconds"], 1)))
+    col2.metric("Sucesso no último minuto (%)", "{:.2f}".format(100 * window["successes"] / window["requests"]) if window["requests"] else "—")
+    col3.metric("p99 no último minuto (s)", "{:.3f}".format(window["p99"]))
+
+RUN_STATES = {
+    "running": "Em execução",
+    "stopping": "Parando",
+    "finished": "Concluído",
+    "stopped": "Interrompido",
+    "failed": "Falhou",
+}
+
+def show_run_status(run):
+    st.caption("{}: {:.0f} s, {} requisições, {} grupos concluídos".format(
+        RUN_STATES[run.status], run.elapsed, run.total_requests, len(run.groups)))
+    if run.artifact_path:
+        st.caption("Resultados gravados em `{}`, para comparação com outros testes na página Comparação de Testes.".format(run.artifact_path))
+    elif run.artifact_error:
+        st.caption("Não foi possível gravar os resultados: {}".format(run.artifact_error))
+
+# Testes da sessão que o executor ainda mantém, do mais antigo ao mais recente
+def session_runs(key):
+    runner = get_runner()
+    runs = [runner.get(run_id) for run_id in st.session_state.get(key, [])]
+    return [run for run in runs if run is not None]
+
+def remember_run(key, run_id):
+    history = st.session_state.setdefault(key, [])
+    history.append(run_id)
+    del history[:-RUN_HISTORY_SIZE]
+
+def run_label(run):
+    return "{} · {}".format(time.strftime("%H:%M:%S", time.localtime(run.started_at)), run.plan["url"])
+
+# Critérios de parada e aprovação, editados como tabela: cada linha é uma
+# regra na unidade exibida (ms ou %), convertida para a unidade do plano
+RULE_LABELS = {metric: "{} ({})".format(label, unit) for metric, (label, unit, _) in RULE_METRICS.items()}
+
+def rules_form(defaults):
+    with st.expander("Critérios de parada e aprovação"):
+        st.caption("Avaliados a cada segundo durante o teste. Uma regra é violada quando o limite é ultrapassado pelo número indicado de segundos seguidos; as regras de parada interrompem o teste em poucos segundos, e as de reprovação só marcam o resultado.")
+        table = st.data_editor(
+            pd.DataFrame([{"Critério": RULE_LABELS[metric], "Limite": threshold, "Segundos seguidos": seconds, "Ação": RULE_ACTIONS[action]}
+                          for metric, threshold, seconds, action in defaults],
+                         columns=["Critério", "Limite", "Segundos seguidos", "Ação"]),
+            num_rows="dynamic", hide_index=True, use_container_width=True,
+            column_config={
+                "Critério": st.column_config.SelectboxColumn(options=list(RULE_LABELS.values()), required=True),
+                "Limite": st.column_config.NumberColumn(min_value=0.0, required=True),
+                "Segundos seguidos": st.column_config.NumberColumn(min_value=1, step=1, default=1, required=True),
+                "Ação": st.column_config.SelectboxColumn(options=list(RULE_ACTIONS.values()), default=RULE_ACTIONS["fail"], required=True),
+            })
+    metrics = {label: metric for metric, label in RULE_LABELS.items()}
+    actions = {label: action for action, label in RULE_ACTIONS.items()}
+    rules = []
+    for row in table.to_dict("records"):
+        if row["Critério"] not in metrics or pd.isna(row["Limite"]):
+            continue
+        metric = metrics[row["Critério"]]
+        seconds = 1 if pd.isna(row["Segundos seguidos"]) else row["Segundos seguidos"]
+        rules.append(make_rule(metric, row["Limite"] * RULE_METRICS[metric][2], seconds, actions.get(row["Ação"], "fail")))
+    return rules
+
+def rule_violation(run, rule, breach):
+    return "{}: {} no segundo {}".format(describe_rule(rule), format_value(rule["metric"], breach["value"]), breach["second"] - run.first_second)
+
+# Resultado de cada critério do teste
+def show_rule_verdicts(run):
+    if run.passed is None:
+        return
+    if run.passed:
+        st.success("Aprovado: nenhum critério foi violado.")
+    else:
+        st.error("Reprovado: {} de {} critérios violados.".format(sum(breach is not None for _, breach in run.rules.verdicts()), len(run.rules.rules)))
+    for rule, breach in run.rules.verdicts():
+        if breach is None:
+            st.write("✅ {}: atendido".format(describe_rule(rule)))
+        else:
+            st.write("❌ {}".format(rule_violation(run, rule, breach)))
+
+# Cenário opcional: mistura de requisições sorteadas por peso (ver engine.scenario).
+# Devolve None sem cenário e False quando a definição é inválida.
+SCENARIO_EXAMPLE = """{
+  "headers": {"Authorization": "Bearer ${token}"},
+  "variables": {"token": "abc"},
+  "requests": [
+    {"name": "listar", "weight": 8, "path": "/items"},
+    {"name": "criar", "weight": 2, "method": "POST", "path": "/items", "json": {"nome": "item ${counter}"}}
+  ]
+}"""
+
+def scenario_form():
+    with st.expander("Cenário (mistura de requisições)"):
+        use_scenario = st.checkbox("Usar um cenário", value=False, help="Sem cenário, todas as requisições são GET na URL do teste. Com um cenário, cada requisição é sorteada pelo peso entre os modelos definidos, com método, caminho (relativo à URL do teste), cabeçalhos e corpo próprios.")
+        if not use_scenario:
+            return None
+        uploaded = st.file_uploader("Arquivo do cenário (JSON ou YAML):", type=["json", "yaml", "yml"])
+        text = uploaded.getvalue().decode() if uploaded is not None else st.text_area("Definição do cenário:", SCENARIO_EXAMPLE, height=240)
+        st.caption("Variáveis: `${nome}` usa os valores de \"variables\"; `${uuid}`, `${counter}`, `${timestamp}` e `${random}` são calculadas a cada requisição.")
+        try:
+            scenario = load_scenario(text)
+        except (ValueError, TypeError) as e:
+            st.error("Cenário inválido: {}".format(e))
+            return False
+        total_weight = sum(template["weight"] for template in scenario["requests"])
+        st.dataframe(pd.DataFrame([{"Requisição": template["name"], "Método": template["method"], "Caminho": template["path"],
+                                    "Proporção (%)": template["weight"] / total_weight * 100} for template in scenario["requests"]]),
+                     hide_index=True, use_container_width=True)
+    return scenario
+
+# Massa de dados opcional (ver engine.feeds): None sem arquivo e False quando o arquivo não existe
+FEED_MODE_LABELS = {"sequential": "Sequencial", "random": "Aleatório", "unique": "Única por processo"}
+
+def feed_form():
+    with st.expander("Massa de dados"):
+        path = st.text_input("Arquivo CSV (com cabeçalho) ou JSONL no gerador:", "", help="Cada requisição usa uma linha do arquivo: as colunas viram variáveis `${coluna}` no cenário ou, sem cenário, na própria URL do teste (ex.: `https://api/items/${id}`). O arquivo é lido sob demanda, sem ser carregado na memória, e pode ter milhões de linhas. Na execução distribuída, o arquivo deve existir no mesmo caminho em cada agente.")
+        mode = st.selectbox("Leitura das linhas:", list(FEED_MODE_LABELS), format_func=FEED_MODE_LABELS.get, help="Sequencial: em ordem, recomeçando ao chegar ao fim. Aleatório: uma linha sorteada a cada requisição. Única por processo: cada processo gerador lê uma faixa própria do arquivo, sem repetir linhas de outro processo.")
+    if not path:
+        return None
+    if not os.path.isfile(path):
+        st.error("Arquivo de dados não encontrado: {}".format(path))
+        return False
+    return make_feed(path, mode)
+
+# Perfil de carga (ver engine.profiles): formato pronto ou estágios definidos
+# pelo usuário, com a prévia da taxa ao longo do teste
+PROFILE_SHAPES = ["Rampa e platô", "Pico", "Longa duração (soak)", "Personalizado"]
+
+def profile_form():
+    shape = st.selectbox("Formato do perfil:", PROFILE_SHAPES)
+    if shape == "Rampa e platô":
+        col1, col2 = st.columns(2)
+        start_rate = col1.number_input("Taxa inicial (req/s):", min_value=0.0, value=0.0)
+        target = col2.number_input("Taxa do platô (req/s):", min_value=0.1, value=100.0)
+        col1, col2, col3 = st.columns(3)
+        ramp_duration = col1.number_input("Subida (s):", min_value=0.0, value=30.0)
+        hold_duration = col2.number_input("Platô (s):", min_value=0.0, value=60.0)
+        ramp_down_duration = col3.number_input("Descida (s):", min_value=0.0, value=0.0)
+        if not ramp_duration and not hold_duration:
+            st.error("Informe a duração da subida ou do platô.")
+            return None
+        profile = ramp_profile(start_rate, target, ramp_duration, hold_duration, ramp_down_duration)
+    elif shape == "Pico":
+        col1, col2 = st.columns(2)
+        base_rate = col1.number_input("Taxa de base (req/s):", min_value=0.1, value=20.0)
+        peak_rate = col2.number_input("Taxa do pico (req/s):", min_value=0.1, value=200.0)
+        col1, col2, col3 = st.columns(3)
+        before = col1.number_input("Antes do pico (s):", min_value=0.0, value=30.0)
+        spike_duration = col2.number_input("Duração do pico (s):", min_value=0.1, value=10.0)
+        after = col3.number_input("Depois do pico (s):", min_value=0.0, value=30.0)
+        profile = spike_profile(base_rate, peak_rate, before, spike_duration, after)
+    elif shape == "Longa duração (soak)":
+        col1, col2, col3 = st.columns(3)
+        rate = col1.number_input("Taxa (req/s):", min_value=0.1, value=50.0)
+        hours = col2.number_input("Duração (horas):", min_value=0.01, value=1.0)
+        ramp_duration = col3.number_input("Subida (s):", min_value=0.0, value=60.0)
+        profile = soak_profile(rate, hours * 3600, ramp_duration)
+    else:
+        start_rate = st.number_input("Taxa inicial (req/s):", min_value=0.0, value=0.0)
+        st.caption("Cada estágio vai linearmente da taxa em que o anterior terminou até a sua taxa final; um estágio com duração 0 muda a taxa de uma vez.")
+        table = st.data_editor(pd.DataFrame({"Duração (s)": [30.0, 60.0, 30.0], "Taxa final (req/s)": [100.0, 100.0, 0.0]}),
+                               num_rows="dynamic", hide_index=True, use_container_width=True,
+                               column_config={"Duração (s)": st.column_config.NumberColumn(min_value=0.0, required=True),
+                                              "Taxa final (req/s)": st.column_config.NumberColumn(min_value=0.0, required=True)})
+        stages = [make_stage(row["Duração (s)"], row["Taxa final (req/s)"]) for row in table.dropna().to_dict("records")]
+        try:
+            profile = make_profile(start_rate, stages)
+            LoadProfile(profile)
+        except ValueError as e:
+            st.error("Perfil inválido: {}".format(e))
+            return None
+    plot_profile(profile, "profile_preview")
+    return profile
+
+def plot_profile(profile, key):
+    points = profile_points(profile)
+    load_profile = LoadProfile(profile)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Duração", "{:.0f} s".format(load_profile.duration))
+    col2.metric("Requisições previstas", "{:,}".format(load_profile.total).replace(",", "."))
+    col3.metric("Taxa máxima (req/s)", "{:g}".format(max(rate for _, rate in points)))
+    fig = go.Figure(go.Scatter(x=[t for t, _ in points], y=[rate for _, rate in points], mode="lines+markers", name="Taxa prevista"))
+    fig.update_layout(xaxis_title="Tempo (s)", yaxis_title="Taxa (req/s)", height=300, margin=dict(t=20))
+    st.plotly_chart(fig, key=key)
+
+ENGINE_LABELS = {"async": "Assíncrono (httpx)", "threads": "Threads (requests)"}
+
+# Opções do cliente HTTP compartilhado por todos os grupos do teste
+def client_options_form():
+    with st.expander("Opções do cliente HTTP"):
+        engine = st.selectbox("Motor das requisições:", ENGINES, format_func=lambda engine: ENGINE_LABELS[engine],
+                              help="O motor assíncrono (httpx) faz todas as requisições num só laço de eventos. O motor de threads (requests) usa um pool fixo de threads, uma por conexão, criado uma vez e reaproveitado durante todo o teste, cada uma com a sua sessão e as suas conexões abertas; serve para comparar com clientes síncronos. Não suporta HTTP/2 nem mede as fases das requisições.")
+        max_connections = st.number_input("Máximo de conexões simultâneas:", min_value=1, value=100, help="Com o motor de threads, é também o número de threads.")
+        keep_alive = st.checkbox("Manter conexões abertas entre requisições (keep-alive)", value=True)
+        http2 = st.checkbox("Usar HTTP/2", value=False)
+        timeout = st.number_input("Tempo limite por requisição (segundos):", min_value=0.1, value=5.0)
+        connect_timeout = st.number_input("Tempo limite de conexão (segundos):", min_value=0.1, value=5.0)
+        stream_bodies = st.checkbox("Descartar o corpo das respostas (streaming)", value=True, help="O corpo de cada resposta é lido em blocos e descartado; apenas status, tempo até o primeiro byte e número de bytes são guardados. Desmarque para manter as respostas completas em memória.")
+        success_text = st.text_input("Status considerados sucesso:", format_status_ranges(DEFAULT_SUCCESS_STATUSES), help="Códigos e faixas separados por vírgula, ex.: 200-299, 304. Os redirecionamentos não são seguidos, então um 3xx é a própria resposta do endereço testado. As demais respostas contam como falha, junto com as requisições sem resposta (tempos limite, conexão recusada ou reiniciada, DNS).")
+        try:
+            success_statuses = parse_status_ranges(success_text)
+        except ValueError as e:
+            st.error(str(e))
+            return None
+    return make_client_options(max_connections=max_connections, keep_alive=keep_alive, max_keepalive_connections=max_connections,
+                               http2=http2, timeout=timeout, connect_timeout=connect_timeout, stream_bodies=stream_bodies, engine=engine,
+                               success_statuses=success_statuses)
@@ -3,12 +3,14 @@ import concurrent.futures
 import time
 import matplotlib.pyplot as plt
 
+from sessions import get_session
+
 url = 'https://pitrol.dev/aouerj/docentes'
 
 def req_get(url):
     try:
         start = time.time()  # Início da contagem de tempo para uma única requisição
-        r = requests.get(url)
+        r = get_session().get(url)
         end = time.time()  # Fim da contagem de tempo
         duration = end - start  # Tempo gasto na requisição
         return r, duration
@@ -30,37 +32,39 @@ total_success = 0  # Contador total de requisições bem-sucedidas
 
 end_time = time.time() + test_duration
 
-while time.time() < end_time:
-    start_time = time.time()  # Início da contagem de tempo para as 10 requisições
+# Pool de threads criado uma vez e reaproveitado por todos os grupos, para que a
+# criação e o encerramento das threads não entrem no tempo medido; as threads
+# são encerradas ao sair do bloco
+with concurrent.futures.ThreadPoolExecutor(max_workers=num_requests) as executor:
+    while time.time() < end_time:
+        start_time = time.time()  # Início da contagem de tempo para as 10 requisições
 
-    # Fazer 10 requisições simultâneas usando ThreadPoolExecutor
-    with concurrent.futures.ThreadPoolExecutor(max_workers=num_requests) as executor:
+        # Fazer 10 requisições simultâneas usando ThreadPoolExecutor
         results = list(executor.map(req_get, [url] * num_requests))
 
-    # Processar os resultados
-    success_count = sum(1 for response, _ in results if response and response.status_code == 200)
-    total_time = time.time() - start_time  # Tempo total gasto para as 10 requisições
-
-    # Atualizar o contador total de requisições bem-sucedidas
-    total_success += success_count
+        # Processar os resultados
+        success_count = sum(1 for response, _ in results if response and response.status_code == 200)
+        total_time = time.time() - start_time  # Tempo total gasto para as 10 requisições
 
-    # Armazenar o tempo de cada requisição individual
-    individual_durations.extend(duration for _, duration in results if duration is not None)
+        # Atualizar o contador total de requisições bem-sucedidas
+        total_success += success_count
 
-    # Armazenar os resultados
-    group_durations.append(total_time)
-    total_success_counts.append(total_success)
+        # Armazenar o tempo de cada requisição individual
+        individual_durations.extend(duration for _, duration in results if duration is not None)
 
-    print(f"{num_requests} requisições:")
-    print(f" - Requisições bem sucedidas: {success_count} (Total acumulado: {total_success})")
-"""
-    print(f" - Tempo total para as requisições: {total_time:.2f}s")
-    print(f"Tempos individuais das requisições: {individual_durations}")
-"""
+        # Armazenar os resultados
+        group_durations.append(total_time)
+        total_success_counts.append(total_success)
 
+        print(f"{num_requests} requisições:")
+        print(f" - Requisições bem sucedidas: {success_count} (Total acumulado: {total_success})")
+        """
+        print(f" - Tempo total para as requisições: {total_time:.2f}s")
+        print(f"Tempos individuais das requisições: {individual_durations}")
+        """
 
-# Aguardar 5 segundos antes de repetir as requisições
-time.sleep(delay)
+        # Aguardar antes de repetir as requisições
+        time.sleep(delay)
 
 # Calcular a média do tempo de todas as requisições
 average_duration = sum(individual_durations) / len(individual_durations) if individual_durations else 0
@@ -0,0 +1,11 @@
+import threading
+import requests
+
+# Uma Session por thread: as conexões abertas são reaproveitadas entre as
+# requisições da mesma thread, em vez de um novo handshake a cada requisição
+local = threading.local()
+
+def get_session():
+    if not hasattr(local, "session"):
+        local.session = requests.Session()
+    return local.session
@@ -0,0 +1,82 @@
+import os
+import sys
+import pickle
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.histogram import LatencyHistogram
+from engine.client import PHASES, ERROR_CLASSES, ResponseRecord, RequestFailure
+from engine.groups import GroupResult
+
+# Configurações para o teste
+num_requests = 5_000  # Requisições simuladas no grupo
+statuses = (200, 201, 404, 429, 503)  # Códigos de status sorteados
+failure_rate = 0.1  # Fração das requisições sem resposta
+seed = 2
+
+def check_histogram(rng):
+    for values in ([], [0], rng.lognormal(np.log(50e6), 1.5, 10_000).astype(np.int64)):
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(int(value))
+        data = histogram.to_bytes()
+        copy = LatencyHistogram.from_bytes(data)
+        assert np.array_equal(copy.dense(), histogram.dense())
+        assert (copy.total_count, copy.sum, copy.sum_sq, copy.min, copy.max) == \
+            (histogram.total_count, histogram.sum, histogram.sum_sq, histogram.min, histogram.max)
+        assert copy.to_bytes() == data
+        # Lido no meio de um buffer maior, a leitura termina exatamente no fim do histograma
+        copy, offset = LatencyHistogram.read_bytes(b"xyz" + data + b"resto", 3)
+        assert offset == 3 + len(data) and copy.to_bytes() == data
+
+# Grupo com respostas de vários códigos de status, fases, fila e falhas de várias classes
+def make_group(rng):
+    group = GroupResult(intended_rate=100.0, achieved_rate=99.5, users=12.5)
+    for _ in range(num_requests):
+        queue_delay_ns = int(rng.integers(0, 10_000_000))
+        if rng.random() < failure_rate:
+            group.add_result(RequestFailure(int(rng.integers(1, len(ERROR_CLASSES)))), float(rng.uniform(0.001, 5)), queue_delay_ns)
+            continue
+        phases = tuple(int(value) for value in rng.integers(1_000, 1_000_000, len(PHASES)))
+        response = ResponseRecord(int(rng.choice(statuses)), "HTTP/1.1", "application/json", float(rng.uniform(0.001, 0.5)),
+                                  int(rng.integers(0, 100_000)), bool(rng.random() < 0.05), phases)
+        response.success = response.status_code < 400
+        group.add_result(response, float(rng.lognormal(np.log(0.05), 1)), queue_delay_ns)
+    return group
+
+def group_fields(group):
+    histograms = [group.histogram, group.queue_histogram, group.ttfb_histogram] + [group.phase_histograms[phase] for phase in PHASES]
+    return {
+        "counts": (group.total_requests, group.success_count, group.new_connections, group.reused_connections,
+                   group.bytes_received, group.server_errors, tuple(group.error_counts)),
+        "rates": (group.intended_rate, group.achieved_rate, group.users),
+        "histograms": [histogram.to_bytes() for histogram in histograms],
+        "status_counts": group.status_counts,
+        "status_histograms": {status: histogram.to_bytes() for status, histogram in group.status_histograms.items()},
+        "error_histograms": {error: histogram.to_bytes() for error, histogram in group.error_histograms.items()},
+    }
+
+def check_group(rng):
+    group = make_group(rng)
+    assert len(group.status_counts) == len(statuses) and group.error_histograms
+    data = group.to_bytes()
+    copy = GroupResult.from_bytes(data)
+    assert group_fields(copy) == group_fields(group)
+    assert copy.to_bytes() == data
+    # Entre processos o grupo vai em binário (ver GroupResult.__reduce__)
+    assert group_fields(pickle.loads(pickle.dumps(group))) == group_fields(group)
+    # Grupo sem taxas nem usuários (rajada) e grupo vazio
+    for other in (GroupResult(), GroupResult.from_results([(RequestFailure(1), 0.5)])):
+        assert group_fields(GroupResult.from_bytes(other.to_bytes())) == group_fields(other)
+    # Somar as cópias é o mesmo que somar os originais
+    merged = GroupResult().merge(group).merge(GroupResult.from_bytes(data))
+    assert merged.total_requests == 2 * group.total_requests
+    assert merged.histogram.total_count == 2 * group.histogram.total_count
+    assert merged.status_counts == {status: 2 * count for status, count in group.status_counts.items()}
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(seed)
+    check_histogram(rng)
+    check_group(rng)
+    print("OK")
@@ -0,0 +1,100 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import ResponseRecord
+from engine.groups import GroupResult
+from engine.capacity import CapacitySearch, check_slo, make_capacity, make_slo
+
+# Configurações para o teste
+capacity = 437  # Maior taxa (req/s) que o servidor simulado atende sem falhas
+window = 1  # Duração (s) de cada nível
+latency = 0.02  # Tempo de resposta (s) abaixo da capacidade
+
+def response(status):
+    return ResponseRecord(status, "HTTP/1.1", "text/plain", None, 0, False)
+
+# Nível medido num servidor que atende até `limit` req/s: acima disso, metade
+# das requisições falha com 503 e as respostas ficam 10 vezes mais lentas
+def simulated_level(rate, limit=capacity, achieved_ratio=1.0):
+    group = GroupResult(intended_rate=rate, achieved_rate=rate * achieved_ratio)
+    overloaded = rate > limit
+    for i in range(max(1, round(rate * window))):
+        group.add_result(response(503 if overloaded and i % 2 == 0 else 200), 10 * latency if overloaded else latency)
+    return group
+
+def run_search(search, limit=capacity):
+    rates = []
+    while (rate := search.next_rate()) is not None:
+        rates.append(rate)
+        search.record(simulated_level(rate, limit))
+    return rates
+
+# Subida geométrica até a primeira reprovação e busca binária até a precisão:
+# o limite real fica entre a maior taxa aprovada e a menor reprovada
+def check_search():
+    search = CapacitySearch(start_rate=10, factor=2, precision=0.05)
+    rates = run_search(search)
+    assert rates[:7] == [10, 20, 40, 80, 160, 320, 640]
+    good, bad = search.band
+    print(f"capacidade {capacity} req/s: encontrada {good:.1f} req/s (limite entre {good:.1f} e {bad:.1f}) em {len(rates)} níveis")
+    assert good == search.max_sustainable_rate
+    assert good <= capacity < bad
+    assert (bad - good) / bad <= 0.05
+    # Cada nível da busca binária fica entre os limites conhecidos até ali
+    assert all(320 < rate < 640 for rate in rates[7:])
+    assert search.finished
+
+# Sem reprovação, a subida para em max_rate e a faixa fica aberta
+def check_max_rate():
+    search = CapacitySearch(start_rate=10, factor=3, max_rate=100)
+    assert run_search(search) == [10, 30, 90, 100]
+    assert search.band == (100, None)
+
+# Reprovado no primeiro nível: a taxa desce até um nível aprovado e então é
+# feita a busca binária; abaixo de 1 req/s, a busca desiste
+def check_descent():
+    search = CapacitySearch(start_rate=200, factor=2, precision=0.1)
+    rates = run_search(search, limit=30)
+    assert rates[:4] == [200, 100, 50, 25]
+    good, bad = search.band
+    assert good <= 30 < bad and (bad - good) / bad <= 0.1
+    search = CapacitySearch(start_rate=4, factor=2)
+    assert run_search(search, limit=0) == [4, 2, 1]
+    assert search.max_sustainable_rate is None
+
+# O número de níveis é limitado por max_levels
+def check_max_levels():
+    search = CapacitySearch(start_rate=10, factor=2, max_levels=5)
+    assert len(run_search(search)) == 5
+
+# Cada objetivo reprova o nível sozinho, com uma mensagem
+def check_slo_rules():
+    slo = make_slo(max_p99=0.1, max_error_rate=0.01, min_throughput_ratio=0.95)
+    assert check_slo(simulated_level(100), slo) == []
+    overloaded = check_slo(simulated_level(capacity + 100), slo)
+    assert len(overloaded) == 2 and overloaded[0].startswith("p99") and "de falhas" in overloaded[1]
+    # Objetivo desligado (None) não é verificado
+    assert check_slo(simulated_level(capacity + 100), make_slo(max_error_rate=None)) == []
+    slow = check_slo(simulated_level(100, achieved_ratio=0.9), slo)
+    assert len(slow) == 1 and "taxa atingida" in slow[0]
+    assert check_slo(GroupResult(intended_rate=10, achieved_rate=0), slo) == ["Nenhuma requisição no nível"]
+
+# A página e a CLI refazem a busca a partir dos grupos guardados
+def check_replay():
+    plan = {"capacity": make_capacity(start_rate=10, factor=2, precision=0.05)}
+    live = CapacitySearch.from_plan(plan)
+    run_search(live)
+    replayed = CapacitySearch.from_plan(plan).replay([group for _, group, _ in live.levels])
+    assert replayed.band == live.band
+    assert [violations for _, _, violations in replayed.levels] == [violations for _, _, violations in live.levels]
+
+if __name__ == "__main__":
+    check_search()
+    check_max_rate()
+    check_descent()
+    check_max_levels()
+    check_slo_rules()
+    check_replay()
+    print("OK")
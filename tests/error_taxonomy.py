@@ -0,0 +1,160 @@
+import os
+import sys
+import base64
+import socket
+import struct
+import asyncio
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import (ERROR_CLASSES, LEGACY_ERROR_CLASSES, PHASES, RequestFailure, ResponseRecord, error_class, format_status_ranges,
+                           is_success, make_client, make_client_options, parse_status_ranges, req_get_async, response_error)
+from engine.groups import ERROR_COUNTS, HEADER, USERS, GroupResult
+from engine.histogram import LatencyHistogram
+from engine.results import RunResults
+from engine.artifacts import RunArtifact
+from engine.mock_server import mock_server
+
+# Configurações para o teste
+timeout = 0.2  # Tempo limite de resposta (s) nas requisições ao servidor simulado
+slow_path = "delay/1"  # Caminho que responde depois do tempo limite
+
+def error_name(error):
+    return ERROR_CLASSES[error_class(error)]
+
+def chained(error, cause):
+    error.__cause__ = cause
+    return error
+
+def response(status):
+    return ResponseRecord(status, "HTTP/1.1", "text/plain", None, 0, False)
+
+def failure(name):
+    return RequestFailure(ERROR_CLASSES.index(name))
+
+# Cada exceção do httpx (ou do requests, traduzida pelo motor de threads) cai
+# na sua classe; a falha de DNS e o reset são achados na causa encadeada
+def check_error_class():
+    assert error_class(None) == 0
+    assert error_name(httpx.ConnectTimeout("")) == "connect_timeout"
+    assert error_name(httpx.ReadTimeout("")) == "read_timeout"
+    assert error_name(httpx.WriteTimeout("")) == "write_timeout"
+    assert error_name(httpx.PoolTimeout("")) == "pool_timeout"
+    assert error_name(httpx.TimeoutException("")) == "read_timeout"
+    assert error_name(chained(httpx.ConnectError(""), socket.gaierror(-2, "Name or service not known"))) == "dns"
+    assert error_name(chained(httpx.ConnectError(""), ConnectionRefusedError())) == "connect"
+    assert error_name(chained(httpx.ReadError(""), ConnectionResetError())) == "reset"
+    # Causa guardada como argumento, como nas exceções do urllib3
+    assert error_name(chained(httpx.ReadError(""), OSError("x", BrokenPipeError()))) == "reset"
+    assert error_name(httpx.ReadError("")) == "network"
+    assert error_name(httpx.RemoteProtocolError("")) == "protocol"
+    assert error_name(httpx.RequestError("")) == "other"
+    # Sem resposta: a classe da falha, ou "other" sem nenhuma; com resposta, 0
+    assert response_error(failure("dns")) == ERROR_CLASSES.index("dns")
+    assert response_error(None) == ERROR_CLASSES.index("other")
+    assert response_error(response(503)) == 0
+
+# Faixas de status de sucesso: texto → faixas → texto, com as inválidas recusadas
+def check_status_ranges():
+    assert parse_status_ranges("200-299, 304;404") == [[200, 299], [304, 304], [404, 404]]
+    assert format_status_ranges(parse_status_ranges(" 200-299 , 304 ")) == "200-299, 304"
+    for text in ("", " , ", "abc", "299-200", "200-700", "99"):
+        try:
+            parse_status_ranges(text)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("faixa inválida aceita: {!r}".format(text))
+    # Sem critério marcado, 2xx e 3xx são sucesso; o critério do cliente prevalece
+    assert is_success(response(302)) and not is_success(response(404))
+    marked = response(404)
+    marked.success = True
+    assert is_success(marked) and not is_success(failure("reset")) and not is_success(None)
+
+# Requisições reais: tempo limite de resposta, conexão recusada e o critério
+# de sucesso do cliente, com os dois motores
+async def check_live(url, engine):
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    closed_url = "http://127.0.0.1:{}/".format(closed.getsockname()[1])
+    closed.close()
+    options = make_client_options(timeout=timeout, connect_timeout=timeout, engine=engine, success_statuses=parse_status_ranges("200-299, 404"))
+    async with make_client(options) as client:
+        group = GroupResult()
+        for target in (url + slow_path, closed_url, url + "status/404", url + "status/503", url):
+            group.add_result(*await req_get_async(client, target))
+    counts = dict(zip(ERROR_CLASSES, group.error_counts))
+    assert counts["read_timeout"] == 1 and counts["connect"] == 1 and counts[""] == 3, (engine, counts)
+    assert group.status_counts == {200: 1, 404: 1, 503: 1}
+    assert group.success_count == 2 and group.server_errors == 1 and group.timeouts == 1
+    # O tempo até a falha fica no histograma da classe, fora do histograma de latências
+    assert group.histogram.total_count == 3
+    read_timeout = group.error_histograms[ERROR_CLASSES.index("read_timeout")]
+    assert read_timeout.total_count == 1 and read_timeout.max >= timeout * 1e9
+
+# Contagens por status e por classe de erro: somadas entre grupos, preservadas
+# no formato binário, e listadas em ordem de aparição, com a primeira falha
+def check_groups():
+    first = GroupResult.from_results([(response(200), 0.01)] * 8 + [(response(503), 0.2), (failure("pool_timeout"), 5.0)])
+    second = GroupResult.from_results([(response(200), 0.01)] * 5 + [(failure("reset"), 0.05)] * 3 + [(response(429), 0.02)] * 2)
+    merged = GroupResult()
+    merged.merge(first)
+    merged.merge(second)
+    copy = GroupResult.from_bytes(merged.to_bytes())
+    for group in (merged, copy):
+        assert group.status_counts == {200: 13, 503: 1, 429: 2}
+        assert [group.error_counts[ERROR_CLASSES.index(name)] for name in ("pool_timeout", "reset")] == [1, 3]
+        assert group.timeouts == 1 and group.server_errors == 1 and group.success_count == 13
+        assert group.status_histograms[429].total_count == 2 and group.error_histograms[ERROR_CLASSES.index("reset")].total_count == 3
+    analysis = RunResults([first, second]).analysis()
+    outcomes = analysis.outcomes()
+    assert [row["outcome"] for row in outcomes[:3]] == ["HTTP 200", "HTTP 503", "Tempo limite do pool de conexões"]
+    assert {row["outcome"]: row["first_group"] for row in outcomes[3:]} == {"Conexão reiniciada pelo servidor": 2, "HTTP 429": 2}
+    assert analysis.first_failure()["outcome"] == "HTTP 503"
+    assert analysis.first_failure(parse_status_ranges("200-599"))["outcome"] == "Tempo limite do pool de conexões"
+
+# Grupo no formato da versão 1: seis classes de erro, sem as respostas por
+# status nem os histogramas por classe
+def legacy_bytes(group, legacy_counts):
+    data = group.to_bytes()
+    offset = HEADER.size + ERROR_COUNTS.size
+    end = offset + USERS.size
+    for _ in range(3 + len(PHASES)):
+        _, end = LatencyHistogram.read_bytes(data, end)
+    counts = struct.pack("<" + "q" * (1 + len(LEGACY_ERROR_CLASSES)), group.server_errors, *legacy_counts)
+    return data[:HEADER.size] + counts + data[offset:end]
+
+# Arquivos da versão 1: o tempo limite único vira tempo limite de resposta, e
+# as respostas sem status registrado aparecem numa linha própria
+def check_legacy():
+    group = GroupResult.from_results([(response(200), 0.01)] * 6 + [(response(500), 0.3)])
+    group.total_requests += 4
+    legacy = legacy_bytes(group, [7, 2, 1, 0, 0, 1])
+    old = GroupResult.from_bytes(legacy, LEGACY_ERROR_CLASSES)
+    assert dict(zip(ERROR_CLASSES, old.error_counts)) == {**dict.fromkeys(ERROR_CLASSES, 0), "": 7, "read_timeout": 2, "connect": 1, "other": 1}
+    assert old.status_counts == {} and old.error_histograms == {} and old.windows == 1
+    assert old.timeouts == 2 and old.histogram.total_count == 7
+    data = {"version": 1, "id": "antigo", "started_at": 0, "finished_at": 1, "status": "done", "error": None, "stop_reason": None,
+            "passed": True, "plan": {"url": "http://api.local/"}, "rates": [], "rules": [], "seconds": [{"second": 0, "requests": 11}],
+            "groups": [base64.b64encode(legacy).decode("ascii")]}
+    artifact = RunArtifact(data)
+    assert artifact.results.groups[0].error_counts == old.error_counts
+    outcomes = {row["outcome"]: row["requests"] for row in artifact.results.analysis().outcomes()}
+    assert outcomes == {"Respostas (status não registrado)": 7, "Tempo limite de resposta": 2, "Conexão recusada ou inalcançável": 1, "Outro erro": 1}
+    try:
+        RunArtifact({**data, "version": 99})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("versão desconhecida aceita")
+
+if __name__ == "__main__":
+    check_error_class()
+    check_status_ranges()
+    with mock_server() as url:
+        for engine in ("async", "threads"):
+            asyncio.run(check_live(url, engine))
+    check_groups()
+    check_legacy()
+    print("OK")
@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.histogram import BUCKET_COUNT, SUB_BUCKET_HALF, LatencyHistogram, bucket_index, merge_histograms
+from engine.analysis import histogram_percentiles
+
+# Configurações para o teste
+num_samples = 200_000  # Amostras por distribuição
+num_groups = 20  # Histogramas comparados nos percentis vetorizados
+percentiles = (1, 10, 50, 90, 99, 99.9, 100)
+seed = 1
+
+# Erro máximo de um balde: os valores dentro de um balde diferem em até 1 / SUB_BUCKET_HALF
+max_relative_error = 1 / SUB_BUCKET_HALF
+
+# Tempos de resposta simulados (ns): lognormal, bimodal e uniforme, de microssegundos a segundos
+def sample_distributions(rng):
+    return {
+        "lognormal": rng.lognormal(np.log(20e6), 1.0, num_samples),
+        "bimodal": np.concatenate([rng.normal(2e6, 2e5, num_samples // 2), rng.normal(800e6, 50e6, num_samples // 2)]),
+        "uniforme": rng.uniform(1e3, 5e9, num_samples),
+    }
+
+def make_histogram(values):
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(int(value))
+    return histogram
+
+# Percentis do histograma contra o numpy (posto mais próximo, o mesmo critério do histograma)
+def check_percentiles(rng):
+    for name, values in sample_distributions(rng).items():
+        values = np.maximum(values, 0).astype(np.int64)
+        histogram = make_histogram(values)
+        for percentile in percentiles:
+            expected = np.percentile(values, percentile, method="inverted_cdf")
+            value = histogram.percentile(percentile)
+            error = abs(value - expected) / expected
+            print(f"{name:10} p{percentile:<5g} numpy {expected / 1e6:12.4f} ms  histograma {value / 1e6:12.4f} ms  erro {100 * error:.3f}%")
+            assert value >= expected, f"{name} p{percentile}: o histograma deve devolver o limite superior do balde"
+            assert error <= max_relative_error, f"{name} p{percentile}: erro {error:.5f} acima do erro do balde"
+        assert histogram.total_count == len(values)
+        assert histogram.sum == int(values.sum())
+        assert histogram.max == int(values.max())
+
+# Percentis vetorizados de vários grupos iguais aos calculados um histograma por vez,
+# e a junção dos grupos igual ao histograma de todas as amostras
+def check_groups(rng):
+    groups = [rng.lognormal(np.log(rng.uniform(1e6, 1e9)), 0.5, rng.integers(0, 2_000)).astype(np.int64) for _ in range(num_groups)]
+    histograms = [make_histogram(values) for values in groups]
+    matrix = histogram_percentiles(histograms, percentiles)
+    for histogram, row in zip(histograms, matrix):
+        assert list(row) == [histogram.percentile(percentile) for percentile in percentiles]
+    merged = merge_histograms(histograms)
+    everything = make_histogram(np.concatenate(groups))
+    assert np.array_equal(merged.dense(), everything.dense())
+    assert (merged.total_count, merged.sum, merged.sum_sq, merged.min, merged.max) == \
+        (everything.total_count, everything.sum, everything.sum_sq, everything.min, everything.max)
+
+# Só a faixa entre o menor e o maior balde usado é alocada, em qualquer ordem de registro
+def check_allocation(rng):
+    assert len(LatencyHistogram().counts) == 0
+    values = rng.uniform(10e6, 20e6, 1_000).astype(np.int64)
+    histogram = make_histogram(values)
+    used = bucket_index(int(values.max())) - bucket_index(int(values.min())) + 1
+    assert used <= len(histogram.counts) <= used + SUB_BUCKET_HALF < BUCKET_COUNT // 10
+    assert np.array_equal(histogram.dense(), make_histogram(np.sort(values)[::-1]).dense())
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(seed)
+    check_percentiles(rng)
+    check_groups(rng)
+    check_allocation(rng)
+    print("OK")
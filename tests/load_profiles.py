@@ -0,0 +1,80 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.profiles import (LoadProfile, make_profile, make_stage, plan_profile, profile_duration, profile_points,
+                             profile_value_at, ramp_profile, soak_profile, spike_profile)
+from engine.workers import make_plan
+
+# Configurações para o teste
+base_rate = 10  # Taxa (req/s) fora do pico
+peak_rate = 100  # Taxa (req/s) no pico
+num_parts = 3  # Processos geradores que dividem o perfil
+
+def expect_error(function, *arguments):
+    try:
+        function(*arguments)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("perfil inválido aceito: {}".format(arguments))
+
+# Estágios negativos, perfis sem duração e perfis sem nenhuma requisição são recusados
+def check_validation():
+    expect_error(make_stage, -1, 10)
+    expect_error(make_stage, 10, -1)
+    expect_error(make_profile, 10, [make_stage(0, 100)])
+    expect_error(make_profile, 10, [])
+    expect_error(LoadProfile, make_profile(0, [make_stage(10, 0)]))
+
+# Pico: degraus (estágios de duração 0) mudam a taxa de uma vez, sem
+# requisições próprias; no instante do degrau já vale a taxa nova
+def check_spike():
+    profile = spike_profile(base_rate, peak_rate, 10, 5, 10)
+    assert profile_duration(profile) == 25
+    assert profile_points(profile) == [(0, 10), (10, 10), (10, 100), (15, 100), (15, 10), (25, 10)]
+    assert [profile_value_at(profile, t) for t in (0, 9.9, 10, 14.9, 15, 25, 30)] == [10, 10, 100, 100, 10, 10, 10]
+    whole = LoadProfile(profile)
+    assert whole.total == 10 * base_rate + 5 * peak_rate + 10 * base_rate == 700
+    assert whole.window_sizes(5) == [50, 50, 500, 50, 50]
+    # Janelas que não dividem a duração: a última é parcial, e nenhuma requisição fica de fora
+    assert whole.window_sizes(10) == [100, 550, 50]
+
+# Rampa de subida, patamar e descida: a taxa e a contagem prevista seguem a
+# reta de cada estágio
+def check_ramp():
+    profile = ramp_profile(0, 50, 4, hold_duration=2, ramp_down_duration=4)
+    assert profile_points(profile) == [(0, 0), (4, 50), (6, 50), (10, 0)]
+    assert profile_value_at(profile, 2) == 25 and profile_value_at(profile, 8) == 25
+    whole = LoadProfile(profile)
+    assert whole.total == 300 and abs(whole.mean_rate - 30) < 1e-9
+    assert [whole.count_at(t) for t in (0, 2, 4, 6, 8, 10, 20)] == [0, 25, 100, 200, 275, 300, 300]
+    assert sum(whole.window_sizes(1)) == whole.total
+    assert ramp_profile(5, 50, 4)["stages"] == [make_stage(4, 50)]
+
+# Soak: taxa constante longa, com ou sem rampa inicial desde zero
+def check_soak():
+    assert soak_profile(20, 3600) == make_profile(20, [make_stage(3600, 20)])
+    profile = soak_profile(20, 3600, ramp_duration=60)
+    assert profile_points(profile) == [(0, 0), (60, 20), (3660, 20)]
+    assert LoadProfile(profile).total == 60 * 20 / 2 + 3600 * 20
+
+# Fatias dos processos: juntas têm todas as requisições, com no máximo uma de
+# diferença entre elas; o plano sem perfil não tem fatia
+def check_shares():
+    profile = spike_profile(base_rate, peak_rate, 10, 5, 10)
+    plan = make_plan("http://api.local/", profile=profile)
+    shares = [plan_profile(plan, part, num_parts) for part in range(num_parts)]
+    assert sum(share.total for share in shares) == 700
+    assert max(share.total for share in shares) - min(share.total for share in shares) <= 1
+    assert shares[1].share(0, 1).total == 700
+    assert plan_profile(make_plan("http://api.local/")) is None
+
+if __name__ == "__main__":
+    check_validation()
+    check_spike()
+    check_ramp()
+    check_soak()
+    check_shares()
+    print("OK")
@@ -0,0 +1,62 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.histogram import LatencyHistogram
+from engine.groups import GroupResult
+from engine.analysis import RunAnalysis, merge_moments
+
+# Configurações para o teste
+num_groups = 50  # Subconjuntos juntados
+seed = 3
+
+# merge_moments contra a média e a variância calculadas diretamente sobre todas as amostras
+def check_merge_moments(rng):
+    parts = [rng.normal(rng.uniform(0, 100), rng.uniform(0.1, 10), rng.integers(0, 5_000)) for _ in range(num_groups)]
+    counts = [len(part) for part in parts]
+    means = [part.mean() if len(part) else 0.0 for part in parts]
+    variances = [part.var() if len(part) else 0.0 for part in parts]
+    total, mean, variance = merge_moments(counts, means, variances)
+    everything = np.concatenate(parts)
+    print(f"merge_moments: n {total}  média {mean:.9f} (direta {everything.mean():.9f})  variância {variance:.9f} (direta {everything.var():.9f})")
+    assert total == len(everything)
+    assert np.isclose(mean, everything.mean(), rtol=1e-12)
+    assert np.isclose(variance, everything.var(), rtol=1e-9)
+    assert merge_moments([], [], []) == (0, 0.0, 0.0)
+    assert merge_moments([0, 0], [0.0, 0.0], [0.0, 0.0]) == (0, 0.0, 0.0)
+
+def make_group(values_ns):
+    histogram = LatencyHistogram()
+    for value in values_ns:
+        histogram.record(int(value))
+    return GroupResult(total_requests=histogram.total_count, success_count=histogram.total_count, histogram=histogram)
+
+# Desvio pequeno frente à média: 100 mil amostras em 30 s ± 100 ns têm desvio de
+# 1e-7 s, que a fórmula Σx²/n - média² em float64 perderia por completo
+def check_small_spread(rng):
+    values = 30_000_000_000 + rng.choice([-100, 100], 100_000)
+    analysis = RunAnalysis([make_group(values[:60_000]), make_group(values[60_000:]), make_group([])])
+    expected = values.std() / 1e9
+    print(f"30 s ± 100 ns: desvio {analysis.std_dev:.6e} s (direto {expected:.6e} s), por grupo {analysis.std_devs}")
+    assert np.isclose(analysis.std_dev, expected, rtol=1e-6)
+    assert np.isclose(analysis.std_devs[0], values[:60_000].std() / 1e9, rtol=1e-6)
+    assert analysis.std_devs[2] == 0 and analysis.means[2] == 0
+
+# Médias e desvios de grupos comuns iguais aos do numpy, e os do teste inteiro iguais aos de todas as amostras
+def check_run(rng):
+    groups = [rng.lognormal(np.log(rng.uniform(1e6, 1e9)), 0.8, rng.integers(1, 3_000)).astype(np.int64) for _ in range(num_groups)]
+    analysis = RunAnalysis([make_group(values) for values in groups])
+    assert np.allclose(analysis.means, [values.mean() / 1e9 for values in groups], rtol=1e-12)
+    assert np.allclose(analysis.std_devs, [values.std() / 1e9 for values in groups], rtol=1e-9)
+    everything = np.concatenate(groups)
+    assert np.isclose(analysis.mean, everything.mean() / 1e9, rtol=1e-12)
+    assert np.isclose(analysis.std_dev, everything.std() / 1e9, rtol=1e-9)
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(seed)
+    check_merge_moments(rng)
+    check_small_spread(rng)
+    check_run(rng)
+    print("OK")
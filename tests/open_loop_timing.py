@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.scheduler import open_loop_schedule, run_open_loop
+from engine.profiles import LoadProfile, make_stage, make_profile, ramp_profile
+
+# Configurações para o teste
+rate = 200  # Taxa (req/s) da execução medida
+duration = 2  # Duração (s) da execução medida
+service_time = 0.05  # Tempo de resposta simulado (s), maior que o intervalo entre disparos
+max_lag = 0.02  # Maior atraso de disparo aceito (s)
+
+# Taxa constante: rate × duration requisições, uma a cada 1 / rate segundos
+def check_constant_schedule():
+    total, offset_ns = open_loop_schedule(100, 3)
+    assert total == 300
+    assert [offset_ns(i) for i in range(4)] == [0, 10_000_000, 20_000_000, 30_000_000]
+    assert offset_ns(total - 1) == 2_990_000_000
+    # Taxas que não dividem o segundo: sem erro acumulado ao longo do teste
+    total, offset_ns = open_loop_schedule(3, 1000)
+    assert total == 3000 and offset_ns(2999) == round(2999 * 1e9 / 3)
+    assert open_loop_schedule(0.1, 1)[0] == 1
+
+# Perfil de carga: instantes crescentes dentro do perfil, a contagem prevista
+# em cada instante, e as fatias dos processos formam juntas o perfil inteiro
+def check_profile_schedule():
+    profile = make_profile(10, [make_stage(10, 100), make_stage(5, 100), make_stage(0, 20), make_stage(5, 0)])
+    whole = LoadProfile(profile)
+    total, offset_ns = open_loop_schedule(None, None, whole)
+    offsets = [offset_ns(i) for i in range(total)]
+    assert total == 10 * (10 + 100) / 2 + 5 * 100 + 5 * 20 / 2 == 1100
+    assert offsets == sorted(offsets) and offsets[0] == 0 and offsets[-1] < whole.duration * 1e9
+    for i in (1, 100, 549, 550, 1049, 1050, total - 1):
+        assert abs(whole.count_at(offsets[i] / 1e9) - i) < 1e-6, i
+    parts = 3
+    shares = [LoadProfile(profile, part, parts) for part in range(parts)]
+    assert sum(share.total for share in shares) == total
+    merged = sorted(share.offset_ns(j) for share in shares for j in range(share.total))
+    assert merged == offsets
+    # Rampa a partir de zero: a primeira requisição sai no início
+    ramp = LoadProfile(ramp_profile(0, 50, 4))
+    assert ramp.total == 100 and ramp.offset_ns(0) == 0 and ramp.offset_ns(99) < 4e9
+
+# Execução real com um envio simulado mais lento que o intervalo: os disparos
+# seguem o agendamento (malha aberta), e a latência é medida desde o instante previsto
+async def check_run():
+    results = []
+
+    async def send():
+        start = time.perf_counter_ns()
+        await asyncio.sleep(service_time)
+        return "ok", (time.perf_counter_ns() - start) / 1e9
+
+    def on_result(response, duration, queue_delay_ns, intended_ns, corrected_ns):
+        results.append((intended_ns, duration, corrected_ns))
+
+    start_ns = time.perf_counter_ns()
+    achieved_rate, max_dispatch_lag = await run_open_loop(send, rate, duration, start_ns, on_result)
+    elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+    print(f"taxa pretendida {rate} req/s, atingida {achieved_rate:.2f} req/s, maior atraso {1000 * max_dispatch_lag:.2f} ms, {elapsed:.3f} s")
+    assert len(results) == rate * duration
+    assert sorted(intended for intended, _, _ in results) == [start_ns + round(i * 1e9 / rate) for i in range(rate * duration)]
+    assert abs(achieved_rate - rate) / rate < 0.02
+    assert max_dispatch_lag < max_lag
+    assert all(corrected_ns / 1e9 >= duration >= service_time for _, duration, corrected_ns in results)
+    # Sem malha fechada: o teste dura o agendamento mais um tempo de resposta, e não rate × duration × service_time
+    assert elapsed < duration + service_time + max_lag + 0.1
+
+# Com `stop`, os disparos param e as requisições em andamento são aguardadas
+async def check_stop():
+    stop = threading.Event()
+    count = 0
+
+    async def send():
+        nonlocal count
+        count += 1
+        if count == 50:
+            stop.set()
+        await asyncio.sleep(service_time)
+        return "ok", service_time
+
+    results = []
+    await run_open_loop(send, rate, duration, time.perf_counter_ns(), lambda *result: results.append(result), stop)
+    assert 50 <= len(results) < rate * duration and len(results) == count
+
+if __name__ == "__main__":
+    check_constant_schedule()
+    check_profile_schedule()
+    asyncio.run(check_run())
+    asyncio.run(check_stop())
+    print("OK")
@@ -0,0 +1,95 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import ERROR_CLASSES, RequestFailure, ResponseRecord
+from engine.groups import GroupResult
+from engine.rules import RuleEngine, describe_rule, format_value, make_rule
+
+# Configurações para o teste
+first_second = 1_700_000_000  # Segundos do relógio de parede, como na série ao vivo
+requests_per_second = 100
+fast = 0.01  # Tempo de resposta (s) dentro dos limites
+slow = 0.8  # Tempo de resposta (s) acima do limite de p99 das regras
+
+def response(status=200):
+    return ResponseRecord(status, "HTTP/1.1", "text/plain", None, 0, False)
+
+# Segundo com `requests` requisições, das quais `server_errors` respondem 503
+# e `timeouts` estouram o tempo limite de resposta
+def second_group(latency=fast, requests=requests_per_second, server_errors=0, timeouts=0):
+    group = GroupResult()
+    for i in range(requests):
+        if i < timeouts:
+            group.add_result(RequestFailure(ERROR_CLASSES.index("read_timeout")), 5.0)
+        else:
+            group.add_result(response(503 if i < timeouts + server_errors else 200), latency)
+    return group
+
+def observe_all(engine, groups, start=first_second):
+    return [engine.observe(start + offset, group) for offset, group in enumerate(groups)]
+
+# Regras inválidas são recusadas e as descrições usam a unidade exibida
+def check_rules():
+    for arguments in (("p50", 1), ("p99", 1, 1, "abort")):
+        try:
+            make_rule(*arguments)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("regra inválida aceita: {}".format(arguments))
+    assert make_rule("p99", 0.5, 0)["seconds"] == 1
+    assert describe_rule(make_rule("p99", 0.5, 3)) == "p99 do tempo de resposta acima de 500 ms por 3 s seguidos"
+    assert describe_rule(make_rule("error_rate", 0.05)) == "Requisições sem sucesso acima de 5 % por 1 s seguido"
+    assert format_value("p99", 0.8) == "800 ms" and format_value("timeout_rate", 0.125) == "12.5 %"
+
+# A regra só é violada depois de `seconds` segundos seguidos acima do limite:
+# um segundo dentro do limite, ou sem requisições, recomeça a contagem
+def check_streaks():
+    engine = RuleEngine([make_rule("p99", 0.5, 3)])
+    assert observe_all(engine, [second_group(slow), second_group(slow), second_group(), second_group(slow), second_group(slow)]) == [[]] * 5
+    # Segundo sem requisições concluídas (ausente da série): a sequência também recomeça
+    assert engine.observe(first_second + 6, second_group(slow)) == []
+    assert engine.observe(first_second + 7, GroupResult()) == []
+    assert observe_all(engine, [second_group(slow)] * 3, first_second + 8) == [[], [], [0]]
+    # A violação é informada uma única vez, com o segundo e o valor que a completaram
+    assert engine.observe(first_second + 11, second_group(slow)) == []
+    breach = engine.verdicts()[0][1]
+    assert breach["second"] == first_second + 10 and abs(breach["value"] - slow) / slow < 0.01
+    assert not engine.passed
+
+# Regras de parada e de reprovação: só as de parada aparecem em `stop_breach`,
+# e o veredito guarda cada regra com a sua violação
+def check_actions():
+    rules = [make_rule("error_rate", 0.05), make_rule("server_error_rate", 0.2, 2, "stop"), make_rule("timeout_rate", 0.1, 1, "stop")]
+    engine = RuleEngine(rules)
+    assert engine.passed and engine.stop_breach is None
+    assert engine.observe(first_second, second_group(server_errors=10)) == [0]
+    assert engine.stop_breach is None and not engine.passed
+    # Timeouts contam como falha, mas não como resposta 5xx
+    assert engine.observe(first_second + 1, second_group(server_errors=5, timeouts=15)) == [2]
+    assert engine.stop_breach == (rules[2], {"second": first_second + 1, "value": 0.15})
+    assert [breach is not None for _, breach in engine.verdicts()] == [True, False, True]
+    assert observe_all(engine, [second_group(server_errors=30)] * 2, first_second + 2) == [[], [1]]
+    # A primeira regra de parada da lista é a informada
+    assert engine.stop_breach[0] is rules[1]
+
+# Queda da vazão: comparada ao maior segundo anterior, sem contar o primeiro
+# segundo (parcial) nem o último, quando marcado como incompleto
+def check_throughput_drop():
+    engine = RuleEngine([make_rule("throughput_drop", 0.5, 2, "stop")])
+    counts = [10, 100, 120, 80, 50, 30]
+    assert observe_all(engine, [second_group(requests=count) for count in counts]) == [[], [], [], [], [], [0]]
+    assert engine.stop_breach[1] == {"second": first_second + 5, "value": 0.75}
+    engine = RuleEngine([make_rule("throughput_drop", 0.5)])
+    observe_all(engine, [second_group(requests=count) for count in (5, 100, 100)])
+    assert engine.observe(first_second + 3, second_group(requests=1), partial=True) == []
+    assert engine.passed and engine.peak_requests == 100
+
+if __name__ == "__main__":
+    check_rules()
+    check_streaks()
+    check_actions()
+    check_throughput_drop()
+    print("OK")
@@ -0,0 +1,135 @@
+import os
+import sys
+import types
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import ResponseRecord
+from engine.groups import GroupResult
+from engine.histogram import LatencyHistogram
+from engine.results import RunResults
+from engine.capacity import make_capacity
+from engine.compare import bootstrap_percentile_change, compare_runs, has_regression, mann_whitney, mann_whitney_counts, plan_differences
+
+# Configurações para o teste
+median = 0.05  # Mediana (s) dos tempos de resposta da referência
+sigma = 0.4  # Dispersão (lognormal) dos tempos de resposta
+num_requests = 20_000  # Requisições de cada teste
+num_seconds = 20  # Segundos de cada teste
+slowdown = 1.2  # Piora do candidato lento (20%, acima da mínima de 5%)
+seed = 1
+
+def response(status=200):
+    return ResponseRecord(status, "HTTP/1.1", "text/plain", None, 0, False)
+
+def histogram_of(latencies):
+    histogram = LatencyHistogram()
+    for latency in latencies:
+        histogram.record_seconds(latency)
+    return histogram
+
+# Teste sintético: um grupo com as latências dadas (as `errors` primeiras
+# respondem 503) e a série por segundo com `rate` requisições por segundo
+def synthetic_run(latencies, errors=0, rates=None, plan=None, groups=None):
+    group = GroupResult()
+    for i, latency in enumerate(latencies):
+        group.add_result(response(503 if i < errors else 200), latency)
+    rates = rates if rates is not None else [len(latencies) / num_seconds] * num_seconds
+    seconds = [{"second": second, "span": 1, "requests": rate} for second, rate in enumerate(rates)]
+    return types.SimpleNamespace(results=RunResults(groups or [group]), seconds=seconds, plan=plan or {"url": "http://api.local/"})
+
+# Mann-Whitney: a estatística U é a contagem direta dos pares, e o p-valor
+# unilateral aponta o lado certo
+def check_mann_whitney(rng):
+    baseline, candidate = rng.integers(0, 20, 200), rng.integers(3, 23, 150)
+    probability, p_greater, p_less = mann_whitney(baseline, candidate)
+    pairs = sum((b > a) + 0.5 * (b == a) for a in baseline for b in candidate)
+    assert abs(probability - pairs / (len(baseline) * len(candidate))) < 1e-12
+    assert p_greater < 0.01 < 0.99 < p_less and abs(p_greater + p_less - 1) < 1e-12
+    # Amostras iguais: metade dos pares, sem significância
+    probability, p_greater, _ = mann_whitney(baseline, baseline)
+    assert probability == 0.5 and p_greater == 0.5
+    # Contagens dos baldes dão o mesmo que os valores
+    values = np.union1d(baseline, candidate)
+    counts = lambda sample: [int(np.sum(sample == value)) for value in values]
+    assert np.allclose(mann_whitney_counts(counts(baseline), counts(candidate)), mann_whitney(baseline, candidate))
+    # Amostra vazia ou todos os valores empatados: nada a concluir
+    assert mann_whitney_counts([0, 0], [1, 2]) == (None, 1.0, 1.0)
+    assert mann_whitney_counts([5], [3]) == (0.5, 1.0, 1.0)
+
+# Bootstrap dos percentis: sem diferença, o intervalo contém zero; com o
+# candidato mais lento, a variação estimada é a piora e o intervalo fica acima de zero
+def check_bootstrap(rng):
+    base = histogram_of(rng.lognormal(np.log(median), sigma, num_requests))
+    same = histogram_of(rng.lognormal(np.log(median), sigma, num_requests))
+    slow = histogram_of(slowdown * rng.lognormal(np.log(median), sigma, num_requests))
+    for percentile in (50, 99):
+        change, (low, high) = bootstrap_percentile_change(base, same, percentile, seed=seed)
+        assert low <= 0 <= high and low <= change <= high
+        change, (low, high) = bootstrap_percentile_change(base, slow, percentile, seed=seed)
+        assert abs(change - (slowdown - 1)) < 0.05 and 0 < low <= change <= high
+    # A mesma semente repete o intervalo
+    assert bootstrap_percentile_change(base, slow, 90, seed=seed) == bootstrap_percentile_change(base, slow, 90, seed=seed)
+
+# Testes completos: sem diferença, nenhuma regressão; mais lento, mais erros,
+# menos vazão ou menos capacidade são apontados cada um na sua métrica
+def check_compare_runs(rng):
+    latencies = lambda factor=1.0: factor * rng.lognormal(np.log(median), sigma, num_requests)
+    baseline = synthetic_run(latencies())
+    comparisons = compare_runs(baseline, synthetic_run(latencies()), seed=seed)
+    assert [comparison["metric"] for comparison in comparisons] == ["latency", "p50", "p90", "p99", "throughput", "error_rate"]
+    assert not has_regression(comparisons)
+
+    slower = {comparison["metric"]: comparison for comparison in compare_runs(baseline, synthetic_run(latencies(slowdown)), seed=seed)}
+    assert all(slower[metric]["regression"] for metric in ("latency", "p50", "p90", "p99"))
+    assert slower["latency"]["probability"] > 0.5 and slower["latency"]["p_value"] < 1e-6
+    assert not slower["throughput"]["regression"] and not slower["error_rate"]["regression"]
+
+    # Piora significativa, mas menor que a mínima: não é regressão
+    slightly = {comparison["metric"]: comparison for comparison in compare_runs(baseline, synthetic_run(latencies(1.02)), seed=seed)}
+    assert slightly["latency"]["p_value"] < 0.05 and not slightly["latency"]["regression"]
+
+    errors = {comparison["metric"]: comparison for comparison in compare_runs(baseline, synthetic_run(latencies(), errors=200), seed=seed)}
+    assert errors["error_rate"]["regression"] and abs(errors["error_rate"]["change"] - 0.01) < 1e-12
+    # Aumento abaixo do máximo aceito (0,5 ponto percentual)
+    assert not has_regression([comparison for comparison in compare_runs(baseline, synthetic_run(latencies(), errors=50), seed=seed)
+                               if comparison["metric"] == "error_rate"])
+
+    rates = (num_requests / num_seconds) * (0.8 + 0.01 * rng.standard_normal(num_seconds))
+    throughput = {comparison["metric"]: comparison for comparison in compare_runs(baseline, synthetic_run(latencies(), rates=rates), seed=seed)}
+    assert throughput["throughput"]["regression"] and abs(throughput["throughput"]["change"] + 0.2) < 0.02
+    # Séries curtas demais: a vazão não é comparada
+    short = compare_runs(synthetic_run(latencies(), rates=[100] * 4), synthetic_run(latencies(), rates=[50] * 4), seed=seed)
+    assert "throughput" not in {comparison["metric"] for comparison in short}
+
+# Capacidade: a busca é refeita nos grupos de cada teste, e a maior taxa
+# sustentável menor é regressão
+def check_capacity():
+    def capacity_run(limit):
+        groups = []
+        for rate in (10, 20, 40, 80, 160):
+            group = GroupResult(intended_rate=rate, achieved_rate=rate)
+            for i in range(rate):
+                group.add_result(response(503 if rate > limit else 200), median)
+            groups.append(group)
+        return synthetic_run([], plan={"capacity": make_capacity(max_levels=5)}, groups=groups)
+    comparison = compare_runs(capacity_run(100), capacity_run(50))[-1]
+    assert comparison["metric"] == "capacity" and (comparison["baseline"], comparison["candidate"]) == (80, 40)
+    assert comparison["regression"] and comparison["change"] == -0.5
+    assert not has_regression(compare_runs(capacity_run(50), capacity_run(100)))
+
+# Diferenças de plano, sem os parâmetros que não mudam a carga
+def check_plan_differences():
+    baseline = {"url": "http://api.local/", "rate": 100, "records": True, "live": False}
+    assert plan_differences(baseline, {**baseline, "records": False, "live": True}) == []
+    assert plan_differences(baseline, {"url": "http://api.local/", "rate": 200, "duration": 60}) == ["duration", "rate"]
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(seed)
+    check_mann_whitney(rng)
+    check_bootstrap(rng)
+    check_compare_runs(rng)
+    check_capacity()
+    check_plan_differences()
+    print("OK")
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import collections
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.feeds import FeedReader, make_feed
+from engine.scenario import Scenario, compile_scenario, make_request_template, make_scenario
+from engine.workers import make_plan
+
+# Configurações para o teste
+base_url = "http://api.local/v1"
+num_rows = 23  # Linhas da massa de dados (não divisível pelo número de processos)
+num_parts = 4  # Processos geradores (ou agentes) que dividem a massa
+tricky = 'a b&c=d/é"\\\n'  # Valor com caracteres especiais para a URL, o JSON e os cabeçalhos
+seed = 1
+
+def write_file(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+    return path
+
+def write_csv(directory):
+    return write_file(directory, "massa.csv", "id,nome\n" + "".join("{},nome {}\n".format(i, i) for i in range(num_rows)))
+
+# Valores inseridos nos modelos: codificação percentual na URL, escape de string
+# no corpo "json" (o corpo continua um JSON válido), e como estão nos cabeçalhos
+def check_escaping(directory):
+    path = write_file(directory, "valores.jsonl", json.dumps({"valor": tricky, "numero": 7, "lista": [1, "x"]}) + "\n")
+    definition = make_scenario([make_request_template(
+        "/busca?q=${valor}&fixo=${fixo}", "POST", headers={"X-Valor": "${valor}"},
+        json_body={"texto": "${valor}", "numero": "${numero}", "lista": "${lista}", "fixo": "${fixo}"})], variables={"fixo": "x/y z"})
+    scenario = Scenario(definition, base_url, FeedReader(path, "sequential", "jsonl"))
+    method, url, headers, content = scenario.next_request()
+    assert method == "POST"
+    assert url == base_url + "/busca?q=" + urllib.parse.quote(tricky, safe="") + "&fixo=x%2Fy%20z"
+    assert urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)["q"] == [tricky]
+    assert headers == {"X-Valor": tricky, "Content-Type": "application/json"}
+    # Colunas que não são texto no JSONL chegam como o seu JSON
+    assert json.loads(content) == {"texto": tricky, "numero": "7", "lista": '[1, "x"]', "fixo": "x/y z"}
+    scenario.close()
+    # Corpo "body" (texto) sem escape, e variável desconhecida recusada na compilação
+    definition = make_scenario([make_request_template("/", "PUT", body="valor=${random}")])
+    _, _, _, content = Scenario(definition, base_url).next_request()
+    assert content.decode().startswith("valor=") and content.decode()[6:].isdigit()
+    try:
+        Scenario(make_scenario([make_request_template("/${nao_existe}")]), base_url)
+    except ValueError as error:
+        assert "nao_existe" in str(error)
+    else:
+        raise AssertionError("variável desconhecida aceita")
+
+# Sem cenário, a própria URL do plano é o modelo do GET; caminhos relativos
+# são somados à URL do teste e URLs completas ficam como estão
+def check_plan_url(directory):
+    plan = make_plan(base_url + "/itens/${id}", feed=make_feed(write_csv(directory)))
+    scenario = compile_scenario(plan)
+    assert [scenario.next_request()[1] for _ in range(3)] == [base_url + "/itens/{}".format(i) for i in range(3)]
+    scenario.close()
+    assert compile_scenario(make_plan(base_url)) is None
+    definition = make_scenario([make_request_template("https://outro.local/x")])
+    assert Scenario(definition, base_url).next_request()[1] == "https://outro.local/x"
+
+def read_ids(reader, count):
+    return [int(reader.next_row()["id"]) for _ in range(count)]
+
+# Sequencial: em ordem, recomeçando no fim; com vários processos, cada um lê
+# as linhas part, part + parts, ... e juntos usam cada linha uma vez por volta
+def check_sequential(directory):
+    path = write_csv(directory)
+    reader = FeedReader(path, "sequential")
+    assert reader.columns == ["id", "nome"]
+    assert read_ids(reader, num_rows + 2) == list(range(num_rows)) + [0, 1]
+    readers = [FeedReader(path, "sequential", part=part, parts=num_parts) for part in range(num_parts)]
+    shares = [len(range(part, num_rows, num_parts)) for part in range(num_parts)]
+    first_pass = [read_ids(reader, share) for reader, share in zip(readers, shares)]
+    assert sorted(sum(first_pass, [])) == list(range(num_rows))
+    assert first_pass[1] == list(range(1, num_rows, num_parts))
+    # Na volta seguinte, cada processo repete a sua parte
+    assert read_ids(readers[1], shares[1]) == first_pass[1]
+    # Arquivo com menos linhas que processos: todos leem o arquivo inteiro
+    small = write_file(directory, "pequena.csv", "id\n5\n")
+    assert read_ids(FeedReader(small, "sequential", part=3, parts=num_parts), 2) == [5, 5]
+
+# Única: faixas de linhas disjuntas por processo, que juntas cobrem o arquivo
+def check_unique(directory):
+    path = write_csv(directory)
+    seen = []
+    for part in range(num_parts):
+        reader = FeedReader(path, "unique", part=part, parts=num_parts)
+        ids = read_ids(reader, num_rows)
+        own = ids[:ids.index(ids[0], 1)] if ids.count(ids[0]) > 1 else ids
+        assert ids == (own * num_rows)[:num_rows], "a faixa recomeça do próprio início"
+        seen.extend(own)
+    assert sorted(seen) == list(range(num_rows))
+
+# Aleatória: só linhas do arquivo, todas sorteadas em algum momento; linhas em
+# branco são ignoradas em todos os modos
+def check_random(directory):
+    random.seed(seed)
+    path = write_file(directory, "brancos.csv", "id\n\n" + "".join("{}\n\n".format(i) for i in range(num_rows)))
+    counts = collections.Counter(read_ids(FeedReader(path, "random"), 50 * num_rows))
+    assert set(counts) == set(range(num_rows))
+    assert read_ids(FeedReader(path, "sequential"), num_rows) == list(range(num_rows))
+    empty = write_file(directory, "vazia.csv", "")
+    try:
+        FeedReader(empty)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("arquivo vazio aceito")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        check_escaping(directory)
+        check_plan_url(directory)
+        check_sequential(directory)
+        check_unique(directory)
+        check_random(directory)
+    print("OK")
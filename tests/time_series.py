@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import ResponseRecord
+from engine.groups import GroupResult
+from engine.timeseries import TimeSeries
+
+# Configurações para o teste
+tiers = ((1, 10), (5, 6), (30, 4))  # Resoluções pequenas: 10 s, depois baldes de 5 s e de 30 s
+first_second = 1_700_000_010  # Segundos do relógio de parede, como na série ao vivo (múltiplo de 30)
+num_seconds = 1_000
+
+# Segundo com `second % 7 + 1` requisições, uma falha a cada 3 segundos e latências de 10 a 16 ms
+def second_group(second):
+    group = GroupResult()
+    for i in range(second % 7 + 1):
+        group.add_result(ResponseRecord(503 if i == 0 and second % 3 == 0 else 200, "HTTP/1.1", "text/plain", None, 0, False), (10 + i) / 1000)
+    return group
+
+def fill(series, seconds):
+    groups = {}
+    for second in seconds:
+        groups[second] = second_group(second)
+        series.add(second, groups[second])
+    return groups
+
+# A série guarda no máximo a soma das capacidades, com os pontos em ordem, sem
+# sobreposição, do mais grosso (antigo) ao mais fino (recente), e nenhuma
+# requisição some sem ser contada como descartada
+def check_tiers():
+    series = TimeSeries(tiers)
+    groups = fill(series, range(first_second, first_second + num_seconds))
+    points = series.points()
+    assert len(series) == len(points) <= sum(capacity for _, capacity in tiers)
+    for before, after in zip(points, points[1:]):
+        assert before["second"] + before["span"] == after["second"]
+    assert [point["span"] for point in points[-10:]] == [1] * 10
+    assert {point["span"] for point in points[:-10]} <= {5, 30}
+    # As resoluções mais grossas começam em múltiplos da sua duração
+    assert all(point["second"] % point["span"] == 0 for point in points)
+    kept = sum(point["requests"] for point in points)
+    assert series.total_requests == sum(group.total_requests for group in groups.values())
+    assert kept + series.dropped_requests == series.total_requests
+    # Cada balde tem as requisições e falhas exatas dos seus segundos
+    for point in points:
+        covered = [groups[second] for second in range(point["second"], point["second"] + point["span"])]
+        assert point["requests"] == sum(group.total_requests for group in covered)
+        assert point["successes"] == sum(group.success_count for group in covered)
+        assert point["server_errors"] == sum(group.server_errors for group in covered)
+
+# Segundos sem requisições (sem ponto na série ao vivo) não quebram a junção:
+# os baldes continuam em ordem e sem sobreposição
+def check_gaps():
+    series = TimeSeries(tiers)
+    seconds = [second for second in range(first_second, first_second + 200) if second % 4]
+    groups = fill(series, seconds)
+    points = series.points()
+    for before, after in zip(points, points[1:]):
+        assert before["second"] + before["span"] <= after["second"]
+    assert points[-1]["second"] == seconds[-1]
+    assert sum(point["requests"] for point in points) + series.dropped_requests == sum(group.total_requests for group in groups.values())
+
+# Janela móvel: os últimos segundos pelos baldes mais finos que os cobrem
+def check_rolling():
+    series = TimeSeries(tiers)
+    groups = fill(series, range(first_second, first_second + 100))
+    rolling = series.rolling(5)
+    last = [groups[second] for second in range(first_second + 95, first_second + 100)]
+    assert rolling["seconds"] == 5
+    assert rolling["requests"] == sum(group.total_requests for group in last)
+    assert rolling["successes"] == sum(group.success_count for group in last)
+    # Além da resolução mais fina, só entram os baldes inteiros dentro do intervalo
+    assert series.rolling(12)["seconds"] == 10
+    assert series.rolling(15)["seconds"] == 15
+    assert TimeSeries(tiers).rolling(5) is None
+
+if __name__ == "__main__":
+    check_tiers()
+    check_gaps()
+    check_rolling()
+    print("OK")
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import LoadTestClient
+from engine.mock_server import make_mock_config, mock_server
+from engine.profiles import profile_points
+from engine.users import VirtualUsers, make_think_time, make_users, ramp_users, run_virtual_users, think_time_sampler
+
+# Configurações para o teste
+num_users = 20  # Usuários no platô
+ramp_up = 1  # Subida (s)
+hold = 2  # Platô (s)
+latency = 0.05  # Tempo de resposta do servidor simulado (s)
+think = 0.05  # Tempo de pensar (s)
+tolerance = 0.2  # Diferença relativa aceita entre o medido e a lei de Little
+num_samples = 50_000  # Sorteios por distribuição
+seed = 1
+
+def expect_error(*arguments):
+    try:
+        make_think_time(*arguments)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("tempo de pensar inválido aceito: {}".format(arguments))
+
+# Distribuições do tempo de pensar: a média sorteada é a pedida (a normal é
+# cortada em zero), e nenhum tempo é negativo
+def check_think_time():
+    expect_error("pareto", 1.0)
+    expect_error("constant", -1.0)
+    expect_error("normal", 1.0, -0.1)
+    random.seed(seed)
+    for think_time, mean in ((make_think_time("constant", 0.5), 0.5), (make_think_time("uniform", 0.5, 0.2), 0.5),
+                             (make_think_time("exponential", 0.5), 0.5), (make_think_time("normal", 0.5, 0.1), 0.5)):
+        sample = think_time_sampler(think_time)
+        values = [sample() for _ in range(num_samples)]
+        assert min(values) >= 0
+        assert abs(statistics.fmean(values) - mean) < 0.01, think_time
+    uniform = [think_time_sampler(make_think_time("uniform", 0.5, 0.2))() for _ in range(1000)]
+    assert 0.3 <= min(uniform) and max(uniform) <= 0.7
+    # Faixa da uniforme maior que a média: começa em zero; exponencial de média zero: sem pausa
+    assert min(think_time_sampler(make_think_time("uniform", 0.1, 0.5))() for _ in range(1000)) >= 0
+    assert think_time_sampler(make_think_time("exponential", 0.0))() == 0.0
+    # Normal com média baixa: os valores negativos viram zero, sem deslocar os demais
+    clipped = [think_time_sampler(make_think_time("normal", 0.0, 1.0))() for _ in range(1000)]
+    assert min(clipped) == 0.0 and 0.3 < clipped.count(0.0) / len(clipped) < 0.7
+
+# Rampa de usuários: sobe de zero, mantém o platô e, opcionalmente, desce
+def check_ramp():
+    assert profile_points(ramp_users(num_users, ramp_up, hold)) == [(0, 0), (1, 20), (3, 20)]
+    assert profile_points(ramp_users(num_users, ramp_up, hold, 4)) == [(0, 0), (1, 20), (3, 20), (7, 0)]
+
+# Os usuários do perfil são divididos entre os processos: o usuário i fica com
+# o processo i % parts, e as partes somam o total
+def check_shares():
+    users = make_users(ramp_users(num_users, ramp_up, hold))
+    for total in (0, 1, 7, 20):
+        shares = [VirtualUsers(None, "", users, 1, 0, part=part, parts=3)._share(total) for part in range(3)]
+        assert sum(shares) == total and shares == [len(range(part, total, 3)) for part in range(3)]
+
+# Execução contra o servidor simulado: no platô, a média de usuários ativos é
+# a do perfil e a vazão segue a lei de Little: usuários / (resposta + pensar)
+async def check_run(url):
+    users = make_users(ramp_users(num_users, ramp_up, hold), make_think_time("constant", think))
+    client = LoadTestClient()
+    start = time.perf_counter()
+    async with client:
+        groups = await run_virtual_users(client, url, users, 1)
+    elapsed = time.perf_counter() - start
+    assert len(groups) == ramp_up + hold and all(group.windows == 1 for group in groups)
+    assert all(group.success_count == group.total_requests for group in groups)
+    expected = num_users / (latency + think)
+    for group in groups[ramp_up:]:
+        print(f"usuários {group.users:.1f}, vazão {group.total_requests} req/s (lei de Little: {expected:.0f} req/s)")
+        assert abs(group.users - num_users) / num_users < tolerance
+        assert abs(group.total_requests - expected) / expected < tolerance
+    # Na subida, em média metade dos usuários
+    assert groups[0].users < num_users * (0.5 + tolerance)
+    # O fim espera as requisições em andamento, mas cancela quem está pensando
+    assert elapsed < ramp_up + hold + latency + 0.5
+
+if __name__ == "__main__":
+    check_think_time()
+    check_ramp()
+    check_shares()
+    with mock_server(make_mock_config(make_think_time("constant", latency))) as url:
+        asyncio.run(check_run(url))
+    print("OK")
@@ -0,0 +1,87 @@
+import os
+import sys
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine.client import ResponseRecord
+from engine.groups import GroupResult, WindowedGroups, merge_window_lists
+
+# Configurações para o teste
+tiers = ((1, 30), (10, 15), (100, 15))  # Resoluções menores que as padrão, para o teste ser rápido
+num_windows = 50_000  # Janelas de um teste longo (ex.: ~14 h com janelas de 1 s)
+requests_per_window = 3
+max_growth = 1.5  # Crescimento máximo da memória entre 1/5 do teste e o teste inteiro
+seed = 1
+
+def response(status=200):
+    return ResponseRecord(status, "HTTP/1.1", "text/plain", None, 0, False)
+
+def fill(windows, first, last, rng):
+    for index in range(first, last):
+        group = windows.group_at(index)
+        for latency in rng.lognormal(np.log(0.02), 0.5, requests_per_window):
+            group.add_result(response(), latency)
+
+# A memória das janelas cresce com o logaritmo do número de janelas: entre 1/5
+# do teste e o fim, fica praticamente igual, e nenhuma requisição se perde
+def check_memory(rng):
+    windows = WindowedGroups(tiers=tiers)
+    tracemalloc.start()
+    fill(windows, 0, num_windows // 5, rng)
+    early, _ = tracemalloc.get_traced_memory()
+    fill(windows, num_windows // 5, num_windows, rng)
+    late, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    groups = windows.groups
+    print(f"{len(groups)} grupos para {num_windows} janelas, memória {early / 1e6:.2f} MB → {late / 1e6:.2f} MB")
+    assert late < max_growth * early
+    assert len(groups) <= sum(capacity for _, capacity in tiers) + 2 * tiers[-1][1]
+    assert sum(group.windows for group in groups) == num_windows
+    assert sum(group.total_requests for group in groups) == num_windows * requests_per_window
+    assert sum(group.histogram.total_count for group in groups) == num_windows * requests_per_window
+    # As janelas mais recentes continuam separadas
+    assert [group.windows for group in groups[-tiers[0][1]:]] == [1] * tiers[0][1]
+
+# Um resultado atrasado vai para o grupo que já juntou a sua janela
+def check_late_result():
+    windows = WindowedGroups(tiers=tiers)
+    for index in range(200):
+        windows.group_at(index)
+    old = windows.group_at(5)
+    assert old.windows > 1
+    old.add_result(response(), 0.01)
+    assert sum(group.total_requests for group in windows.groups) == 1
+
+# Processos que terminaram em janelas diferentes, com as janelas antigas
+# juntadas de formas diferentes, são somados janela a janela; as médias
+# (usuários ativos) são ponderadas pelo número de janelas
+def check_merge_lists():
+    lists = []
+    for length in (180, 187, 240):
+        windows = WindowedGroups(lambda: GroupResult(users=0.0), tiers)
+        for index in range(length):
+            group = windows.group_at(index)
+            group.add_result(response(), 0.01)
+            group.users = 2.0
+        lists.append(windows.groups)
+    merged = merge_window_lists(lists)
+    starts = np.cumsum([0] + [group.windows for group in merged])
+    assert starts[-1] == 240
+    assert sum(group.total_requests for group in merged) == 180 + 187 + 240
+    for first, group in zip(starts, merged):
+        # Cada grupo tem a soma dos processos que chegaram às suas janelas
+        running = sum(1 for length in (180, 187, 240) for index in range(first, first + group.windows) if index < length)
+        assert group.total_requests == running
+        assert abs(group.users - 2.0 * running / group.windows) < 1e-9
+    # Grupo juntado, enviado entre processos e de volta, mantém as janelas
+    copy = GroupResult.from_bytes(merged[0].to_bytes())
+    assert copy.windows == merged[0].windows and copy.users == merged[0].users
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(seed)
+    check_memory(rng)
+    check_late_result()
+    check_merge_lists()
+    print("OK")